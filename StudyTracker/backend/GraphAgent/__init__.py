@@ -1,5 +1,25 @@
-from .graph import WorkFlow
-from .nodes import Nodes
-from .state import AssistantState
+from importlib import import_module
 
-__all__ = ['WorkFlow', 'Nodes', 'AssistantState']
\ No newline at end of file
+# Exports are resolved on first access, so lightweight submodules (router,
+# history) can be imported without pulling in langgraph
+_EXPORTS = {
+    'WorkFlow': '.graph',
+    'Nodes': '.nodes',
+    'AssistantState': '.state',
+    'WorkFlowPool': '.pool',
+    'FastPathRouter': '.router',
+    'RouteDecision': '.router',
+    'build_history': '.history',
+    'summarize_messages': '.history',
+    'SummaryRefresher': '.history',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
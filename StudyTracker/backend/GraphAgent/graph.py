@@ -4,12 +4,23 @@ from .state import AssistantState
 from .nodes import Nodes
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+from typing import Iterator, Optional, Tuple
+from uuid import uuid4
+import threading
 load_dotenv()
 
 class WorkFlow:
-    def __init__(self):
+    # The compiled graph and its Nodes are stateless between invocations (all
+    # per-conversation state lives in the checkpointer under a thread id), so
+    # every WorkFlow instance shares them.
+    _shared_nodes = None
+    _shared_app = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, thread_id: Optional[str] = None):
+        self.thread_id = thread_id or str(uuid4())
+        self.lock = threading.Lock()
         self.chat_history = []
-        self._nodes = None
         # Update the SystemMessage to be more verbose and explicit
         initial_message = SystemMessage(content=(
             "You are the LangGraph GraphAgent specializing in student task management and scheduling. "
@@ -30,44 +41,60 @@ class WorkFlow:
             "- Maintain the conversation context and task history to ensure continuity."
         ))
         self.chat_history.append(initial_message)
-        self._app = None
 
     @property
-    def nodes(self):
-        if self._nodes is None:
-            self._nodes = Nodes()
-        return self._nodes
+    def nodes(self) -> Nodes:
+        if WorkFlow._shared_nodes is None:
+            with WorkFlow._shared_lock:
+                if WorkFlow._shared_nodes is None:
+                    WorkFlow._shared_nodes = Nodes()
+        return WorkFlow._shared_nodes
 
     @property
     def app(self):
-        if self._app is None:
-            self._initialize_workflow()
-        return self._app
+        if WorkFlow._shared_app is None:
+            nodes = self.nodes
+            with WorkFlow._shared_lock:
+                if WorkFlow._shared_app is None:
+                    WorkFlow._shared_app = self._initialize_workflow(nodes)
+        return WorkFlow._shared_app
 
-    def _initialize_workflow(self):
+    @staticmethod
+    def _initialize_workflow(nodes: Nodes):
         workflow = StateGraph(AssistantState)
 
         # Add nodes
-        workflow.add_node("respond_or_query", self.nodes.respond_or_query)
-        workflow.add_node("crewai_agent_query", self.nodes.crewai_query)
-        workflow.add_node("main_conversation", self.nodes.main_conversation)
+        workflow.add_node("respond_or_query", nodes.respond_or_query)
+        workflow.add_node("crewai_agent_query", nodes.crewai_query)
+        workflow.add_node("task_tools", nodes.task_tools)
+        workflow.add_node("main_conversation", nodes.main_conversation)
 
         # Add edges
         workflow.set_entry_point("respond_or_query")
         workflow.add_conditional_edges(
             "respond_or_query",
-            lambda x: "crewai_agent_query" if x["task_decision"] == "query" else (
-                "main_conversation" if x["task_decision"] == "respond" else "respond_or_query"),
+            lambda x: {"query": "crewai_agent_query", "tasks": "task_tools"}.get(x["task_decision"], "main_conversation"),
             {
                 "crewai_agent_query": "crewai_agent_query",
-                "main_conversation": "main_conversation",
-                "respond_or_query": "respond_or_query"
+                "task_tools": "task_tools",
+                "main_conversation": "main_conversation"
             }
         )
         workflow.add_edge("crewai_agent_query", "respond_or_query")
+        workflow.add_edge("task_tools", "main_conversation")
         workflow.add_edge("main_conversation", END)
 
-        self._app = workflow.compile(MemorySaver())
+        return workflow.compile(MemorySaver())
+
+    @staticmethod
+    def _turn_reset() -> dict:
+        """Per-turn routing state; without this the checkpointer carries the previous
+        turn's agent responses and fast-path rule into the next turn's decision."""
+        return {
+            "database_agent_responses": [],
+            "crew_query": None,
+            "fast_path_rule": None,
+        }
 
     def display_graph(self) -> str:
         return self.app.get_graph().draw_mermaid()
@@ -83,20 +110,79 @@ class WorkFlow:
         result = self.app.invoke({
             "messages": [message],  # Only pass the current message
             "chat_history": self.chat_history,  # Pass the full history
-        },config={"configurable": {"thread_id": "1"}},debug=debugMode)
+            **self._turn_reset(),
+        },config={"configurable": {"thread_id": self.thread_id}},debug=debugMode)
         
         if "chat_history" in result:
             self.chat_history = result["chat_history"]
         
         return result
 
+    def stream(self, user_input: str) -> Iterator[Tuple[str, dict]]:
+        """Run one turn, yielding ``(event, data)`` pairs as the graph progresses.
+
+        Events are ``progress`` (the crew or task tools started or finished), ``token`` (a chunk
+        of the main_conversation reply) and finally ``done`` with the full reply.
+        """
+        if isinstance(user_input, str):
+            message = HumanMessage(content=user_input)
+        else:
+            message = user_input
+
+        self.chat_history.append(message)
+
+        final_message = None
+        for mode, payload in self.app.stream({
+            "messages": [message],
+            "chat_history": self.chat_history,
+            **self._turn_reset(),
+        }, config={"configurable": {"thread_id": self.thread_id}}, stream_mode=["messages", "updates"]):
+            if mode == "messages":
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") == "main_conversation" and chunk.content:
+                    yield "token", {"content": chunk.content}
+                continue
+
+            for node, update in payload.items():
+                if node == "respond_or_query" and update.get("task_decision") == "query":
+                    yield "progress", {"node": "crewai_agent_query", "status": "started"}
+                elif node == "respond_or_query" and update.get("task_decision") == "tasks":
+                    yield "progress", {"node": "task_tools", "status": "started"}
+                elif node in ("crewai_agent_query", "task_tools"):
+                    yield "progress", {"node": node, "status": "finished"}
+                elif node == "main_conversation":
+                    final_message = update["messages"][-1]
+                    self.chat_history = update.get("chat_history", self.chat_history)
+
+        yield "done", {"content": final_message.content if final_message else ""}
+
     def clear(self):
         self.chat_history = []
+        self.drop_checkpoints()
+
+    def drop_checkpoints(self) -> None:
+        """Forget the checkpointed graph state stored under this thread id."""
+        if WorkFlow._shared_app is None:
+            return
+        checkpointer = WorkFlow._shared_app.checkpointer
+        if hasattr(checkpointer, 'delete_thread'):
+            checkpointer.delete_thread(self.thread_id)
+            return
+        # Older MemorySaver releases have no delete_thread; prune its dicts directly
+        checkpointer.storage.pop(self.thread_id, None)
+        for key in [k for k in checkpointer.writes if k[0] == self.thread_id]:
+            checkpointer.writes.pop(key, None)
 
     def set_chat_history(self, chat_history: list) -> None:
         """Set the chat history for the workflow."""
         self.chat_history = chat_history
 
+    @staticmethod
+    def router_stats() -> dict:
+        """Fast-path router counters; empty until the shared Nodes have been built."""
+        nodes = WorkFlow._shared_nodes
+        return nodes.router.stats() if nodes is not None else {}
+
 if __name__ == "__main__":
     wf = WorkFlow()
     while True:
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from llm_usage import label
+from tracing import span
+from typing import Callable, List, Optional, Tuple
+import logging
+import os
+import threading
+
+__all__ = [
+    'HISTORY_KEEP_TURNS',
+    'HISTORY_TOKEN_BUDGET',
+    'SUMMARY_BATCH_MESSAGES',
+    'estimate_tokens',
+    'build_history',
+    'summarize_messages',
+    'SummaryRefresher',
+]
+
+logger = logging.getLogger(__name__)
+
+# Most recent user/assistant turns sent to the prompts verbatim
+HISTORY_KEEP_TURNS = int(os.getenv('HISTORY_KEEP_TURNS', '6'))
+# Upper bound on summary + verbatim history tokens in each prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '3000'))
+# Messages folded into the summary per LLM call during a refresh
+SUMMARY_BATCH_MESSAGES = int(os.getenv('SUMMARY_BATCH_MESSAGES', '40'))
+# The summary is asked to stay within this many words
+SUMMARY_MAX_WORDS = 250
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English with Llama tokenizers)."""
+    return len(text) // 4 + 1
+
+
+def _role_and_content(message) -> Tuple[str, str]:
+    if isinstance(message, BaseMessage):
+        return {'human': 'user', 'ai': 'assistant'}.get(message.type, message.type), str(message.content)
+    return message.get('role', 'user'), str(message.get('content', ''))
+
+
+def _as_message(message) -> BaseMessage:
+    if isinstance(message, BaseMessage):
+        return message
+    role, content = _role_and_content(message)
+    return AIMessage(content=content) if role == 'assistant' else HumanMessage(content=content)
+
+
+def build_history(summary: Optional[str], messages: list, keep_turns: int = HISTORY_KEEP_TURNS,
+                  token_budget: int = HISTORY_TOKEN_BUDGET) -> List[BaseMessage]:
+    """Compact history for the prompts: the rolling summary plus the last turns verbatim.
+
+    At most keep_turns user/assistant pairs are kept, and older ones are
+    dropped until summary and messages fit token_budget; the latest message
+    is always kept.
+    """
+    recent = list(messages)[-keep_turns * 2:] if keep_turns > 0 else []
+    budget = token_budget
+    head = []
+    if summary:
+        head = [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")]
+        budget -= estimate_tokens(summary)
+
+    kept = []
+    for message in reversed(recent):
+        cost = estimate_tokens(_role_and_content(message)[1])
+        if kept and cost > budget:
+            break
+        kept.append(_as_message(message))
+        budget -= cost
+    kept.reverse()
+    return head + kept
+
+
+_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You maintain a running summary of a conversation between a student and their study assistant.
+
+Update the existing summary with the new messages. Keep facts that later turns may rely on:
+the student's courses, goals, preferences, deadlines, tasks that were created or changed, and
+open questions. Drop greetings and small talk. Write at most {max_words} words of plain prose.
+
+Existing summary:
+{summary}
+
+New messages:
+{transcript}
+
+Updated summary:"""),
+])
+
+
+def summarize_messages(previous_summary: Optional[str], messages: list, chat=None) -> str:
+    """Fold `messages` into `previous_summary` with one LLM call; the input is bounded by the batch size."""
+    if chat is None:
+        from .nodes import get_chat_groq
+        chat = get_chat_groq()
+    transcript = "\n".join(
+        f"{role}: {content}" for role, content in (_role_and_content(m) for m in messages)
+    )
+    with label('summary'):
+        result = (_SUMMARY_PROMPT | chat).invoke({
+            "summary": previous_summary or "(none yet)",
+            "transcript": transcript,
+            "max_words": SUMMARY_MAX_WORDS,
+        })
+    return result.content.strip()
+
+
+class SummaryRefresher:
+    """Runs summary refreshes off the request path, at most one in flight per chat.
+
+    A refresh requested while one is already running for the same chat is
+    coalesced into a single follow-up run.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chat-summary')
+        self._lock = threading.Lock()
+        self._running = set()
+        self._again = set()
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+
+    def schedule(self, chat_id: str, refresh: Callable[[str], None]) -> None:
+        with self._lock:
+            if chat_id in self._running:
+                self._again.add(chat_id)
+                return
+            self._running.add(chat_id)
+            self.scheduled += 1
+        self._executor.submit(self._run, chat_id, refresh)
+
+    def _run(self, chat_id: str, refresh: Callable[[str], None]) -> None:
+        while True:
+            try:
+                with span('chat.summary_refresh', chat_id=chat_id):
+                    refresh(chat_id)
+                with self._lock:
+                    self.completed += 1
+            except Exception:
+                logger.exception("Error refreshing summary for chat %s", chat_id)
+                with self._lock:
+                    self.failed += 1
+            with self._lock:
+                if chat_id not in self._again:
+                    self._running.discard(chat_id)
+                    return
+                self._again.discard(chat_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'running': len(self._running),
+                'scheduled': self.scheduled,
+                'completed': self.completed,
+                'failed': self.failed,
+            }
@@ -1,40 +1,29 @@
 from .state import AssistantState
+from .router import FastPathRouter
+from .task_tools import TASK_TOOLS, TASK_TOOLS_BY_NAME
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import MessagesPlaceholder, ChatPromptTemplate
-from typing import List, Optional
+from langchain_core.pydantic_v1 import BaseModel, Field
+from typing import Literal, Optional
 from datetime import datetime
-import importlib
-from functools import lru_cache
+import json
+import logging
+from llm_usage import usage_handler
+from tracing import set_attributes, span, traced
+
+logger = logging.getLogger(__name__)
 
 # LLM_MODEL = "llama-3.2-90b-text-preview"
 LLM_MODEL = "llama-3.1-70b-versatile"
 
-RESPOND_OR_QUERY_MAX_INVALIDS = 3
-
-# Debug configuration flags
-DEBUG_CONFIG = {
-    'SHOW_STATE_CHANGES': True,        # Show state changes between nodes
-    'SHOW_TIMING': True,               # Show execution time for each step
-    'SHOW_DECISION_PROCESS': True,     # Show the task decision process
-    'SHOW_CREWAI_DETAILS': True,       # Show CrewAI interaction details
-    'COLORED_OUTPUT': True,            # Use colored terminal output
-}
-
-# ANSI color codes
-class Colors:
-    HEADER = '\033[95m' if DEBUG_CONFIG['COLORED_OUTPUT'] else ''
-    BLUE = '\033[94m' if DEBUG_CONFIG['COLORED_OUTPUT'] else ''
-    GREEN = '\033[92m' if DEBUG_CONFIG['COLORED_OUTPUT'] else ''
-    YELLOW = '\033[93m' if DEBUG_CONFIG['COLORED_OUTPUT'] else ''
-    RED = '\033[91m' if DEBUG_CONFIG['COLORED_OUTPUT'] else ''
-    ENDC = '\033[0m' if DEBUG_CONFIG['COLORED_OUTPUT'] else ''
-
-def log_state(state: dict, step: str) -> None:
-    """Log the current state of the workflow"""
-    if DEBUG_CONFIG['SHOW_STATE_CHANGES']:
-        print(f"\n{Colors.HEADER}=== State at {step} ==={Colors.ENDC}")
-        for key, value in state.items():
-            print(f"{Colors.BLUE}{key}:{Colors.ENDC} {value}")
+# Upper bound on CrewAI round trips within a single turn
+MAX_CREW_QUERIES_PER_TURN = 3
+
+# Settle obvious respond/query decisions with FastPathRouter rules before asking the LLM
+FAST_PATH_ROUTING = True
+
+# Run plain task CRUD through native function calling instead of the CrewAI hierarchy
+DIRECT_TASK_TOOLS = True
 
 # Lazy load expensive imports
 _chat_groq = None
@@ -44,38 +33,42 @@ def get_chat_groq():
     global _chat_groq
     if _chat_groq is None:
         from langchain_groq import ChatGroq
-        if DEBUG_CONFIG['SHOW_TIMING']:
-            print(f"{Colors.YELLOW}Initializing ChatGroq...{Colors.ENDC}")
-        _chat_groq = ChatGroq(model=LLM_MODEL)
+        # usage_handler records tokens and latency for every call, named after the node
+        _chat_groq = ChatGroq(model=LLM_MODEL, callbacks=[usage_handler])
     return _chat_groq
 
 def get_crew():
     global _backendcrew
     if (_backendcrew is None):
-        from backendcrew import backendcrewCrew 
-        if DEBUG_CONFIG['SHOW_TIMING']:
-            print(f"{Colors.YELLOW}Initializing backendcrewCrew...{Colors.ENDC}")
-        _backendcrew = backendcrewCrew()
+        with span('crew.init'):
+            from backendcrew import backendcrewCrew
+            _backendcrew = backendcrewCrew()
     return _backendcrew
 
 def crewai_query(query: str) -> str:
     try:
-        if DEBUG_CONFIG['SHOW_CREWAI_DETAILS']:
-            print(f"{Colors.BLUE}CrewAI Query:{Colors.ENDC} {query}")
         crew = get_crew()
-        response = crew.process_query(query)
-        if DEBUG_CONFIG['SHOW_CREWAI_DETAILS']:
-            print(f"{Colors.GREEN}CrewAI Response:{Colors.ENDC} {response}")
-        return response
+        return crew.process_query(query)
     except Exception as e:
-        print(f"{Colors.RED}Error querying CrewAI: {str(e)}{Colors.ENDC}")
+        logger.exception("Error querying CrewAI")
+        set_attributes(error=str(e))
         return f"Error querying CrewAI: {str(e)}"
 
+class RoutingDecision(BaseModel):
+    """Routing decision for the student's latest message."""
+    decision: Literal["tasks", "query", "respond"] = Field(
+        description="'tasks' for a direct task operation, 'query' to ask the CrewAI agents, "
+                    "'respond' to answer the student directly")
+    crew_query: Optional[str] = Field(
+        default=None,
+        description="When decision is 'query': a clear, specific, self-contained query for the CrewAI agents, "
+                    "including relevant context from the conversation and the student's original intent")
+
+
 class Nodes:
     def __init__(self):
         self._chat = None
-        if DEBUG_CONFIG['SHOW_TIMING']:
-            print(f"{Colors.YELLOW}Initializing Nodes...{Colors.ENDC}")
+        self.router = FastPathRouter()
 
     @property
     def chat(self):
@@ -83,12 +76,24 @@ class Nodes:
             self._chat = get_chat_groq()
         return self._chat
 
+    @traced('graph.respond_or_query')
     def respond_or_query(self, state: AssistantState) -> AssistantState:
-        if DEBUG_CONFIG['SHOW_STATE_CHANGES']:
-            print(f"\n{Colors.HEADER}=== Entering respond_or_query ==={Colors.ENDC}")
-            
-        start_time = datetime.now()
         previous_responses = state.get("database_agent_responses", [])
+
+        if FAST_PATH_ROUTING:
+            # After a crew round trip the turn keeps the router's first decision
+            route = self.router.route(
+                state["messages"][-1].content,
+                answered_by_fast_path=bool(state.get("fast_path_rule")) and bool(previous_responses),
+                deferred_to_llm=not state.get("fast_path_rule") and bool(previous_responses),
+            )
+            if route is not None:
+                set_attributes(decision=route.decision, fast_path_rule=route.rule)
+                return {"task_decision": self._task_route(route.decision), "crew_query": None, "fast_path_rule": route.rule}
+
+        if len(previous_responses) >= MAX_CREW_QUERIES_PER_TURN:
+            return {"task_decision": "respond", "crew_query": None, "fast_path_rule": None}
+
         formatted_responses = "\n".join([f"{i+1}. {resp}" for i, resp in enumerate(previous_responses)])
         
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -98,99 +103,130 @@ class Nodes:
 
 Current Time: {current_time}
 
-As part of your three-step process:
-1. Decide whether to respond directly or query CrewAI agents.
-2. If you decide to query, generate a proper contextual query to ask the CrewAI Agents.
-3. Formulate the final response based on the context and agent responses.
-
-You have access to a comprehensive task management system through CrewAI agents that can:
+You can read and change the student's tasks directly with the task tools:
 - Create new tasks with details (title, description, due date, priority, etc.)
 - Update existing tasks (progress, status, details)
 - Delete tasks when they're no longer needed
 - Retrieve tasks (all tasks, pending tasks, completed tasks, or specific tasks)
 - Check task status and deadlines
 
-IMPORTANT: For ANY task-related queries (creation, updates, status checks, deletions, or listings), 
-ALWAYS choose to QUERY the CrewAI agents. The task management system is maintained by CrewAI agents,
-and you cannot directly access or modify tasks without their involvement.
-
 Previous CrewAI Responses:
 {database_agent_responses}
 
 Based on the above, decide whether to:
 
-1. RESPOND directly if:
+1. Use the TASKS tools if:
+    - The request creates, updates, checks, deletes, lists or searches tasks
+    - The user asks about task status, deadlines, or progress
+
+2. RESPOND directly if:
     - The question is about basic concepts you're confident about
     - It's a simple clarification or follow-up to a previous response
     - It requires general advice without task management
+    - The previous CrewAI responses already answer the question
 
-2. QUERY CrewAI agents if:
-    - The request involves creating, updating, checking, or deleting tasks
-    - The user asks about task status, deadlines, or progress
-    - The question requires accessing or modifying stored information
-    - The user wants to list or search for specific tasks
-    - The request involves task organization or management
+3. QUERY CrewAI agents if:
+    - The request needs several steps or planning across tasks (e.g. building a study schedule)
     - The question requires web searches for current information.
     - It involves complex mathematical solutions.
     - It needs detailed study techniques or in-depth explanations.
     - Fact-checking or verification is necessary.
     - If you DO NOT have enough information to respond directly.
 
-Respond ONLY with 'query' or 'respond'.
-
-Current invalid decisions: {invalid_count}. Over {RESPOND_OR_QUERY_MAX_INVALIDS} invalids will terminate the session."""),
+When you choose to query, also write the query for the CrewAI agents:
+1. Include relevant context from previous exchanges.
+2. Specify the type of information needed.
+3. Maintain the student's original intent.
+4. Focus on one clear question at a time."""),
             MessagesPlaceholder(variable_name="history"),
             ("human", "{input}"),
         ])
 
-        chain = prompt | self.chat
+        chain = prompt | self.chat.with_structured_output(RoutingDecision, include_raw=True)
 
         history = state.get("chat_history", [])
+        user_input = state["messages"][-1].content
 
-        decision = chain.invoke(
-            {"input": state["messages"][-1].content,
-             "invalid_count": state.get("invalid_decision_count", 0),
+        result = chain.invoke(
+            {"input": user_input,
              "database_agent_responses": formatted_responses if previous_responses else "None.",
              "history": history,
-             "current_time": current_time,
-             "RESPOND_OR_QUERY_MAX_INVALIDS": RESPOND_OR_QUERY_MAX_INVALIDS
-             }  # Add current_time to the template variables
+             "current_time": current_time
+             }
         )
 
-        decision_content = decision.content.strip(" \n\t\'.\"\\{}()/").lower()
+        parsed = result.get("parsed")
+        if parsed is None:
+            # The model ignored the schema; answer directly rather than loop on retries
+            logger.warning("Unparseable routing decision: %s", result.get('parsing_error'))
+            decision, crew_query = "respond", None
+        else:
+            decision = self._task_route(parsed.decision)
+            crew_query = ((parsed.crew_query or "").strip() or user_input) if decision == "query" else None
 
-        invalid_decision_count = 0
-        print(decision_content, f"\\Invalid Count: {state.get("invalid_decision_count", 0)}")
+        set_attributes(decision=decision)
+        return {"task_decision": decision, "crew_query": crew_query, "fast_path_rule": None}
 
-        if decision_content.startswith("query") or 'query' in decision_content[:20]:
-            decision_content = "query"
-        elif decision_content.startswith("respond") or 'respond' in decision_content[:20] or state.get("invalid_decision_count", 0) > RESPOND_OR_QUERY_MAX_INVALIDS:
-            decision_content = "respond"
-        else:
-            decision_content = "invalid"
-            invalid_decision_count = state.get("invalid_decision_count", 0) + 1
+    @staticmethod
+    def _task_route(decision: str) -> str:
+        """Send 'tasks' decisions through the crew when the direct tool path is off."""
+        return "query" if decision == "tasks" and not DIRECT_TASK_TOOLS else decision
 
-        print("Task Decision: ", decision_content)
+    @traced('graph.task_tools')
+    def task_tools(self, state: AssistantState) -> AssistantState:
+        """Carry out task CRUD with one function-calling round trip, bypassing the crew."""
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """You manage a student's tasks by calling the available tools.
 
-        if DEBUG_CONFIG['SHOW_TIMING']:
-            duration = (datetime.now() - start_time).total_seconds()
-            print(f"{Colors.YELLOW}respond_or_query duration: {duration:.2f}s{Colors.ENDC}")
-            
-        if DEBUG_CONFIG['SHOW_DECISION_PROCESS']:
-            print(f"{Colors.GREEN}Decision:{Colors.ENDC} {decision_content}")
-            
-        return {"task_decision": decision_content, "invalid_decision_count": invalid_decision_count}
+Current Time: {current_time}
 
+Call the tool(s) needed to carry out the student's latest request. Resolve relative dates
+("tomorrow", "next Friday") against the current time. Use specific search parameters for
+updates and deletions so that only the intended tasks are affected."""),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{input}"),
+        ])
+        chain = prompt | self.chat.bind_tools(TASK_TOOLS)
+        ai_message = chain.invoke({
+            "input": state["messages"][-1].content,
+            "history": state.get("chat_history", []),
+            "current_time": current_time
+        })
+
+        results = []
+        for call in ai_message.tool_calls:
+            tool = TASK_TOOLS_BY_NAME.get(call["name"])
+            try:
+                output = tool.invoke(call["args"]) if tool else f"Unknown tool: {call['name']}"
+            except Exception as e:
+                output = f"Error: {str(e)}"
+            results.append(f"{call['name']}({json.dumps(call['args'])}) -> {output}")
+        if not results:
+            # The model asked for clarification instead of calling a tool
+            results.append(f"No task operation was performed. {ai_message.content}")
+        set_attributes(tool_calls=len(ai_message.tool_calls))
+
+        return {"database_agent_responses": state.get("database_agent_responses", []) + results}
+
+    @traced('graph.crewai_query')
     def crewai_query(self, state: AssistantState) -> AssistantState:
-        if DEBUG_CONFIG['SHOW_STATE_CHANGES']:
-            print(f"\n{Colors.HEADER}=== Entering crewai_query ==={Colors.ENDC}")
-            
-        start_time = datetime.now()
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print("CrewAI Query")
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", """You are an AI assistant.
+            # respond_or_query already wrote the crew query unless a fast-path rule routed the turn
+            query = state.get("crew_query") or self._build_crew_query(state)
+            crew_response = crewai_query(query)
+            responses = state.get("database_agent_responses", []) + [crew_response]
+            return {"database_agent_responses": responses, "crew_query": None}
+        except Exception as e:
+            logger.exception("Error querying CrewAI")
+            set_attributes(error=str(e))
+            return {"database_agent_responses": [f"Error: {str(e)}"], "crew_query": None}
+
+    def _build_crew_query(self, state: AssistantState) -> str:
+        """Rewrite the student's message into a contextual CrewAI query."""
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an AI assistant.
 Current Time: {current_time}
                  
 As part of your three-step process:
@@ -210,33 +246,17 @@ Format the query for the CrewAI agents by:
 4. Focusing on one clear question at a time.
 
 Provide a clear, specific query with necessary context. No additional commentary."""),
-            ])
-            chain = prompt | self.chat
-            result = chain.invoke({
-                "input": state["messages"][-1].content,
-                "database_agent_responses": state.get("database_agent_responses", ["No previous context"]),
-             "current_time": current_time
-            })
-            
-            responses = state.get("database_agent_responses", [])
-            crew_response = crewai_query(result.content)
-            responses.append(crew_response)
-            if DEBUG_CONFIG['SHOW_TIMING']:
-                duration = (datetime.now() - start_time).total_seconds()
-                print(f"{Colors.YELLOW}crewai_query duration: {duration:.2f}s{Colors.ENDC}")
-                
-            return {"database_agent_responses": responses}
-        except Exception as e:
-            print(f"Error querying CrewAI: {str(e)}")
-            return {"database_agent_responses": [f"Error: {str(e)}"]}
-        
-
+        ])
+        chain = prompt | self.chat
+        result = chain.invoke({
+            "input": state["messages"][-1].content,
+            "database_agent_responses": state.get("database_agent_responses", ["No previous context"]),
+            "current_time": current_time
+        })
+        return result.content
 
+    @traced('graph.main_conversation')
     def main_conversation(self, state: AssistantState) -> AssistantState:
-        if DEBUG_CONFIG['SHOW_STATE_CHANGES']:
-            print(f"\n{Colors.HEADER}=== Entering main_conversation ==={Colors.ENDC}")
-            
-        start_time = datetime.now()
         # Format all responses as a numbered list
         responses = state.get("database_agent_responses", [])
         formatted_responses = "\n".join([f"{i+1}. {resp}" for i, resp in enumerate(responses)])
@@ -273,11 +293,7 @@ Provide a helpful and informative response to the student's question."""),
 
         ai_message = AIMessage(content=response.content)
         updated_history = history + [ai_message]
-        
-        if DEBUG_CONFIG['SHOW_TIMING']:
-            duration = (datetime.now() - start_time).total_seconds()
-            print(f"{Colors.YELLOW}main_conversation duration: {duration:.2f}s{Colors.ENDC}")
-            
+
         return {
             "messages": [ai_message],
             "chat_history": updated_history
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional
+import threading
+
+if TYPE_CHECKING:
+    from .graph import WorkFlow
+
+
+class WorkFlowPool:
+    """Bounded LRU pool of per-chat WorkFlow instances.
+
+    Every chat gets its own WorkFlow (and therefore its own checkpointer thread
+    and chat history) while the compiled graph and Nodes stay shared. The pool
+    lock only guards the bookkeeping dict; graph invocations run outside it.
+
+    A chat's turns are serialized by its workflow's lock, so the pool never
+    replaces a workflow whose lock is held: clear() resets it in place once
+    the running turn finishes, and eviction skips busy workflows (the pool
+    may briefly exceed max_size while every older chat is mid-turn).
+    """
+
+    def __init__(self, max_size: int = 256, factory: Optional[Callable[[str], "WorkFlow"]] = None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if factory is None:
+            # Imported here so the pool itself does not need langgraph
+            from .graph import WorkFlow as factory
+        self.max_size = max_size
+        self._factory = factory
+        self._workflows: "OrderedDict[str, WorkFlow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, chat_id: str) -> "WorkFlow":
+        """Return the workflow for chat_id, creating it (and evicting an idle LRU entry) if needed.
+
+        Run turns through checkout() rather than locking the result: the
+        workflow may be evicted before its lock is taken.
+        """
+        evicted = []
+        with self._lock:
+            workflow = self._workflows.get(chat_id)
+            if workflow is not None:
+                self._workflows.move_to_end(chat_id)
+                return workflow
+
+            workflow = self._factory(chat_id)
+            self._workflows[chat_id] = workflow
+            for key in list(self._workflows):
+                if len(self._workflows) <= self.max_size:
+                    break
+                candidate = self._workflows[key]
+                # Held locks mean a turn is running; never pull a workflow out from under it
+                if candidate is workflow or not candidate.lock.acquire(blocking=False):
+                    continue
+                del self._workflows[key]
+                evicted.append(candidate)
+                self.evictions += 1
+
+        for candidate in evicted:
+            try:
+                candidate.drop_checkpoints()
+            finally:
+                candidate.lock.release()
+        return workflow
+
+    @contextmanager
+    def checkout(self, chat_id: str) -> Iterator["WorkFlow"]:
+        """Hold chat_id's workflow lock for one turn and yield the workflow."""
+        while True:
+            workflow = self.get(chat_id)
+            workflow.lock.acquire()
+            with self._lock:
+                current = self._workflows.get(chat_id) is workflow
+            if current:
+                break
+            # Evicted between get() and acquire(); a fresh workflow takes its place
+            workflow.lock.release()
+        try:
+            yield workflow
+        finally:
+            workflow.lock.release()
+
+    def clear(self, chat_id: str) -> None:
+        """Reset a single chat's workflow state without touching other chats.
+
+        Waits for a turn in progress, so the reset never interleaves with it.
+        """
+        with self._lock:
+            workflow = self._workflows.get(chat_id)
+        if workflow is None:
+            # Not pooled, but the checkpointer may still hold state under this thread id
+            self._factory(chat_id).clear()
+            return
+        with self.checkout(chat_id) as workflow:
+            workflow.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._workflows),
+                'max_size': self.max_size,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._workflows)
+
+    def __contains__(self, chat_id: str) -> bool:
+        return chat_id in self._workflows
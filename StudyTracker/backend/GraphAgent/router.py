@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+import re
+import threading
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    decision: str       # 'tasks', 'query' or 'respond'
+    rule: str           # name of the rule that fired
+    confidence: float
+
+
+def _compile(rules: List[Tuple[str, str]]) -> List[Tuple[str, Pattern]]:
+    return [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in rules]
+
+
+# Trigger phrases mirror the manager agent backstory in backendcrew/config/agents.yaml.
+# Task rules only fire on clear commands: an imperative at the start of the message
+# ("add a task ...", "delete the ... assignment") or a task noun with a possessive
+# ("show my tasks"). Study questions that merely mention tasks or deadlines are left
+# to the LLM router.
+TASK_RULES = _compile([
+    ('task_create', r"^\s*(please\s+)?((add|create|make|set up)\s+(a\s+|an\s+)?(new\s+)?(task|assignment|homework|deadline|reminder)s?\b"
+                    r"|remind me to\b)"
+                    r"|\b(add|put)\b.{1,60}\b(to|on) my (task|to-?do)s?( list)?\b"),
+    ('task_query', r"\b(show|list|display|get|what are|what's|whats)\s+(me\s+)?(all\s+)?(of\s+)?my\s+(\w+\s+)?(tasks|assignments|deadlines|to-?dos)\b"
+                   r"|\bwhich of my (tasks|assignments|deadlines)\b"
+                   r"|\bdo i have (any\s+)?(\w+\s+)?(tasks|assignments|deadlines)\b"),
+    ('task_update', r"^\s*(please\s+)?update (the |my )[\w\s]{0,40}?\b(task|assignment)\b"
+                    r"|\bmark (it|this|that|(the|my) [\w\s]{1,40}?) as (done|complete|completed|finished|in progress)\b"
+                    r"|\b(completed|finished|done with) \d{1,3}\s?% of (my|the)\b"),
+    ('task_delete', r"^\s*(please\s+)?(remove|delete|cancel) (the |my |a |all (of )?my |all )?[\w\s]{0,40}?\b(task|assignment|deadline|reminder)s?\b"),
+])
+
+QUERY_RULES = _compile([
+    ('schedule', r"\b(create (a |my )?(study )?schedule|study plan|weekly plan|timetable)\b"),
+    ('performance', r"\b(analy[sz]e (my )?performance|improve (my )?study habits|test results)\b"),
+    ('notebook', r"\b(organi[sz]e (my )?notes|study materials|resource repository)\b"),
+    ('web_lookup', r"\b(weather|forecast|latest news|current events|today'?s news)\b"),
+])
+
+RESPOND_RULES = _compile([
+    ('smalltalk', r"^\s*(hi|hello|hey|yo|thanks|thank you|thx|ok(ay)?|cool|great|bye|good (morning|afternoon|evening|night))[\s!.?]*$"),
+])
+
+# Phrasing that asks for an explanation or advice rather than an operation
+EXPLANATION_CUES = re.compile(
+    r"\b(explain|why|how (do|can|should|would) (i|you|we)|what is|what are the|tips?|advice|help me understand|teach me|typical)\b",
+    re.IGNORECASE,
+)
+
+# Rules below this confidence defer to the LLM router
+ROUTE_CONFIDENCE_THRESHOLD = 0.7
+
+
+def rule_confidence(match: re.Match, text: str, competing: int) -> float:
+    """How sure a rule match is, from evidence in the message.
+
+    An imperative at the very start of the message is the strongest signal
+    (0.9), a match later in the sentence weaker (0.75). Explanation or
+    advice phrasing costs 0.2 and every match from another rule family 0.1.
+    """
+    confidence = 0.9 if not text[:match.start()].strip() else 0.75
+    if EXPLANATION_CUES.search(text):
+        confidence -= 0.2
+    confidence -= 0.1 * competing
+    return round(max(confidence, 0.0), 2)
+
+
+class FastPathRouter:
+    """Rule-based router that settles obvious respond/query decisions without an LLM call.
+
+    `route` returns None whenever the rules are not confident (no match,
+    matches pointing both ways, or a confidence below
+    ROUTE_CONFIDENCE_THRESHOLD) so the caller can fall back to the LLM.
+    """
+
+    def __init__(self, threshold: float = ROUTE_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {'hits': 0, 'fallbacks': 0}
+        self._rule_counts: Dict[str, int] = {}
+
+    def route(self, text: str, answered_by_fast_path: bool = False,
+              deferred_to_llm: bool = False) -> Optional[RouteDecision]:
+        """Decide for `text`, or return None to defer to the LLM.
+
+        `answered_by_fast_path` is set when this turn was already routed to
+        the crew by a rule and the crew has replied, so the turn can finish.
+        `deferred_to_llm` is set when the rules already deferred this turn
+        and the LLM sent it to the crew; the rules would defer again, so
+        the fallback is not counted twice.
+        'tasks' decisions go straight to the task tools, bypassing the crew.
+        """
+        if answered_by_fast_path:
+            return self._hit(RouteDecision('respond', 'crew_answered', 1.0))
+        if deferred_to_llm:
+            return None
+
+        task_matches = self._matches(TASK_RULES, text)
+        query_matches = self._matches(QUERY_RULES, text)
+        respond_matches = self._matches(RESPOND_RULES, text)
+
+        decision = None
+        # Rules pointing both ways are not confident; let the LLM decide
+        if not (respond_matches and (task_matches or query_matches)):
+            if task_matches and not query_matches:
+                name, match = task_matches[0]
+                decision = RouteDecision('tasks', name, rule_confidence(match, text, 0))
+            elif query_matches or task_matches:
+                # Task phrasing mixed with planning/research intent is left to the crew
+                name, match = (query_matches + task_matches)[0]
+                decision = RouteDecision('query', name, rule_confidence(match, text, len(task_matches)))
+            elif respond_matches:
+                # Smalltalk rules match the whole message
+                decision = RouteDecision('respond', respond_matches[0][0], 1.0)
+
+        if decision is not None and decision.confidence >= self.threshold:
+            return self._hit(decision)
+        with self._lock:
+            self._counts['fallbacks'] += 1
+        return None
+
+    @staticmethod
+    def _matches(rules: List[Tuple[str, Pattern]], text: str) -> List[Tuple[str, re.Match]]:
+        matches = []
+        for name, pattern in rules:
+            match = pattern.search(text)
+            if match:
+                matches.append((name, match))
+        return matches
+
+    def _hit(self, decision: RouteDecision) -> RouteDecision:
+        with self._lock:
+            self._counts['hits'] += 1
+            self._rule_counts[decision.rule] = self._rule_counts.get(decision.rule, 0) + 1
+        return decision
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/fallback counters; every hit is one respond_or_query LLM call saved."""
+        with self._lock:
+            total = self._counts['hits'] + self._counts['fallbacks']
+            return {
+                'hits': self._counts['hits'],
+                'fallbacks': self._counts['fallbacks'],
+                'llm_calls_saved': self._counts['hits'],
+                'hit_rate': self._counts['hits'] / total if total else 0.0,
+                'rules': dict(self._rule_counts),
+            }
@@ -5,5 +5,6 @@ from langchain_core.messages import BaseMessage
 class AssistantState(MessagesState):
     task_decision: Optional[str]
     database_agent_responses: List[str]
-    invalid_decision_count: int
-    chat_history: List[BaseMessage]
\ No newline at end of file
+    crew_query: Optional[str]
+    chat_history: List[BaseMessage]
+    fast_path_rule: Optional[str]
\ No newline at end of file
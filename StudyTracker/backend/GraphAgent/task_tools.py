@@ -0,0 +1,166 @@
+from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_core.tools import StructuredTool
+from typing import List, Literal, Optional
+
+# Lazy load the backendcrew tool implementations (crewai_tools is slow to import)
+_backend_tools = None
+
+def get_backend_tools() -> dict:
+    global _backend_tools
+    if _backend_tools is None:
+        from backendcrew.tools import AddTaskTool, QueryTasksTool, UpdateTaskTool, DeleteTaskTool, GetAllTasksTool, BulkTaskTool
+        _backend_tools = {
+            'add': AddTaskTool(),
+            'query': QueryTasksTool(),
+            'update': UpdateTaskTool(),
+            'delete': DeleteTaskTool(),
+            'get_all': GetAllTasksTool(),
+            'bulk': BulkTaskTool(),
+        }
+    return _backend_tools
+
+
+def _as_dict(model: Optional[BaseModel]) -> dict:
+    if model is None:
+        return {}
+    if isinstance(model, BaseModel):
+        return model.dict(exclude_none=True)
+    return {k: v for k, v in dict(model).items() if v is not None}
+
+
+class NewTask(BaseModel):
+    title: str = Field(description="Short task title, e.g. 'Math Homework'")
+    description: str = Field(description="What needs to be done")
+    type: str = Field(description="Task type, e.g. 'Homework', 'Assignment', 'Project', 'Exam'")
+    dueDate: str = Field(description="Deadline as 'YYYY-MM-DDTHH:MM:SS', 'YYYY-MM-DDTHH:MM' or 'YYYY-MM-DD'")
+    priority: Optional[Literal['High', 'Medium', 'Low']] = None
+    progress: Optional[int] = Field(default=None, description="Completion percentage, 0-100")
+
+
+class TaskUpdates(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    type: Optional[str] = None
+    dueDate: Optional[str] = Field(default=None, description="'YYYY-MM-DDTHH:MM:SS', 'YYYY-MM-DDTHH:MM' or 'YYYY-MM-DD'")
+    priority: Optional[Literal['High', 'Medium', 'Low']] = None
+    progress: Optional[int] = Field(default=None, description="Completion percentage, 0-100")
+    completed: Optional[bool] = None
+
+
+class TaskSearch(BaseModel):
+    title: Optional[str] = Field(default=None, description="Text or regex matched against task titles")
+    description: Optional[str] = Field(default=None, description="Text or regex matched against task descriptions")
+    status: Optional[Literal['completed', 'pending', 'overdue']] = None
+    type: Optional[str] = None
+    priority: Optional[Literal['High', 'Medium', 'Low']] = None
+    progress: Optional[int] = Field(default=None, description="Exact completion percentage")
+    progress_min: Optional[int] = Field(default=None, description="Minimum completion percentage, inclusive")
+    progress_max: Optional[int] = Field(default=None, description="Maximum completion percentage, inclusive")
+    due: Optional[Literal['today', 'tomorrow', 'this_week', 'next_week', 'next_7_days', 'this_month']] = Field(
+        default=None, description="Deadline window, e.g. 'this_week' for tasks due this week")
+    due_before: Optional[str] = Field(default=None, description="Only tasks due before this date, 'YYYY-MM-DD'")
+    due_after: Optional[str] = Field(default=None, description="Only tasks due on or after this date, 'YYYY-MM-DD'")
+
+
+class PageOptions(BaseModel):
+    limit: Optional[int] = Field(default=None, description="Tasks per page, default 20, max 100")
+    cursor: Optional[str] = Field(default=None, description="next_cursor from the previous result, to fetch the next page")
+    fields: Optional[List[str]] = Field(default=None, description="Task fields to return; omit for a compact set without descriptions")
+    sort_by: Optional[Literal['dueDate', 'priority']] = Field(default=None, description="Use with limit for the top-k tasks")
+    order: Optional[Literal['asc', 'desc']] = None
+
+
+class AddTaskArgs(BaseModel):
+    task: NewTask
+
+
+class QueryTasksArgs(BaseModel):
+    search_params: TaskSearch
+    page: Optional[PageOptions] = None
+
+
+class UpdateTaskArgs(BaseModel):
+    search_params: TaskSearch = Field(description="Identifies the task(s) to update")
+    updates: TaskUpdates = Field(description="Only the fields that change")
+    dry_run: bool = Field(default=False, description="List the matching tasks without updating them")
+
+
+class DeleteTaskArgs(BaseModel):
+    search_params: TaskSearch = Field(description="Identifies the task(s) to delete; be specific")
+    dry_run: bool = Field(default=False, description="List the matching tasks without deleting them")
+
+
+class GetAllTasksArgs(BaseModel):
+    query: str = Field(default="", description="Optional keyword matched against titles and descriptions")
+    page: Optional[PageOptions] = None
+
+
+class BulkOperation(BaseModel):
+    op: Literal['add', 'update', 'delete']
+    task: Optional[NewTask] = Field(default=None, description="The new task, for 'add'")
+    search_params: Optional[TaskSearch] = Field(default=None, description="Which task(s), for 'update' and 'delete'")
+    updates: Optional[TaskUpdates] = Field(default=None, description="Fields to change, for 'update'")
+
+
+class BulkTasksArgs(BaseModel):
+    operations: List[BulkOperation]
+    ordered: bool = Field(default=True, description="Reject the whole batch if any operation is invalid")
+
+
+def add_task(task: NewTask) -> str:
+    return get_backend_tools()['add']._run(_as_dict(task))
+
+
+def query_tasks(search_params: TaskSearch, page: Optional[PageOptions] = None) -> list:
+    return get_backend_tools()['query']._run(_as_dict(search_params), **_as_dict(page))
+
+
+def update_task(search_params: TaskSearch, updates: TaskUpdates, dry_run: bool = False) -> str:
+    return get_backend_tools()['update']._run(_as_dict(search_params), _as_dict(updates), dry_run=dry_run)
+
+
+def delete_task(search_params: TaskSearch, dry_run: bool = False) -> str:
+    return get_backend_tools()['delete']._run(_as_dict(search_params), dry_run=dry_run)
+
+
+def get_all_tasks(query: str = "", page: Optional[PageOptions] = None) -> list:
+    return get_backend_tools()['get_all']._run(query, **_as_dict(page))
+
+
+def bulk_tasks(operations: List[BulkOperation], ordered: bool = True) -> dict:
+    payload = []
+    for operation in operations:
+        item = {'op': operation.op}
+        for field in ('task', 'search_params', 'updates'):
+            if getattr(operation, field) is not None:
+                item[field] = _as_dict(getattr(operation, field))
+        payload.append(item)
+    return get_backend_tools()['bulk']._run(payload, ordered)
+
+
+TASK_TOOLS = [
+    StructuredTool.from_function(
+        func=add_task, name="add_task", args_schema=AddTaskArgs,
+        description="Create a new task for the student."),
+    StructuredTool.from_function(
+        func=query_tasks, name="query_tasks", args_schema=QueryTasksArgs,
+        description="Find tasks by status (completed/pending/overdue), title, description, type, priority or progress. "
+                    "Returns counts plus one page of tasks; use page.cursor to fetch more."),
+    StructuredTool.from_function(
+        func=update_task, name="update_task", args_schema=UpdateTaskArgs,
+        description="Update fields of the task(s) matching the search parameters, e.g. progress or completed."),
+    StructuredTool.from_function(
+        func=delete_task, name="delete_task", args_schema=DeleteTaskArgs,
+        description="Permanently delete the task(s) matching the search parameters. "
+                    "If the match is ambiguous, call with dry_run=true first and confirm with the student."),
+    StructuredTool.from_function(
+        func=get_all_tasks, name="get_all_tasks", args_schema=GetAllTasksArgs,
+        description="List tasks with completed/pending/overdue counts, optionally filtered by a keyword. "
+                    "Returns one page; use page.sort_by and page.limit for e.g. the 5 highest-priority tasks."),
+    StructuredTool.from_function(
+        func=bulk_tasks, name="bulk_tasks", args_schema=BulkTasksArgs,
+        description="Add, update or delete several tasks in one call, e.g. all assignments from a syllabus. "
+                    "Reports the outcome of each operation."),
+]
+
+TASK_TOOLS_BY_NAME = {tool.name: tool for tool in TASK_TOOLS}
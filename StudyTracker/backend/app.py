@@ -1,28 +1,106 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, g, request, jsonify, make_response, stream_with_context
 from flask_cors import CORS
 from uuid import uuid4
 from datetime import datetime, timedelta
-from GraphAgent import WorkFlow
-from typing import Dict, List
+from GraphAgent import WorkFlow, WorkFlowPool, SummaryRefresher, build_history, summarize_messages
+from GraphAgent.history import HISTORY_KEEP_TURNS, SUMMARY_BATCH_MESSAGES
+from jobs import JobQueue, QueueFullError
+from typing import Dict, Iterator, List
 import random
+import json
+import io
+import sys
 from langchain_core.messages import HumanMessage
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+from database import chat_repository, task_repository, database_stats
+from llm_usage import USAGE_COUNTERS, metered, usage_header, usage_stats
+from tracing import close_span, metrics, open_span, render_gauges, span, trace_buffer
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app, origins="*")
+CORS(app, origins="*", expose_headers=["X-Next-Cursor"])
 app.config['CORS_HEADERS'] = 'Content-Type'
 
-# MongoDB connection
-client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/studytracker'))
-db = client.studytracker
-chats_collection = db.chats
-
-# Create a single global workflow instance
-global_workflow = WorkFlow()
+CHAT_PAGE_DEFAULT_LIMIT = 50
+CHAT_PAGE_MAX_LIMIT = 200
+CHAT_PREVIEW_CHARS = 120
+DUPLICATE_KEY_ERROR = 11000
+MESSAGE_PAGE_DEFAULT_LIMIT = 50
+MESSAGE_PAGE_MAX_LIMIT = 200
+# Number of most recent messages returned by GET /chats/<id> and fed to the workflow
+CHAT_HISTORY_WINDOW = int(os.getenv('CHAT_HISTORY_WINDOW', '50'))
+# Scrape and debug endpoints are not traced themselves
+UNTRACED_PATHS = ('/metrics', '/traces')
+TRACES_MAX_LIMIT = 200
+
+http_requests = metrics.counter(
+    'studybuddy_http_requests_total', 'HTTP requests by route and status', label_names=('method', 'route', 'status')
+)
+
+
+@app.before_request
+def start_request_trace():
+    if request.path not in UNTRACED_PATHS:
+        g.request_span = open_span('http.request', method=request.method, path=request.path)
+
+
+@app.after_request
+def record_request_status(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_requests.inc(method=request.method, route=route, status=response.status_code)
+    if 'request_span' in g:
+        g.request_span[0].attributes.update(route=route, status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    # Streamed responses tear down only once the stream has finished
+    if 'request_span' in g:
+        close_span(*g.pop('request_span'), error)
+
+_indexes_ready = False
+
+def ensure_indexes() -> None:
+    """Create the chat indexes once per process (lazily, so importing app.py stays offline)."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    chat_repository.chats.create_index('id')
+    chat_repository.chats.create_index([('created_at', DESCENDING), ('id', DESCENDING)])
+    chat_repository.messages.create_index([('chat_id', ASCENDING), ('seq', ASCENDING)], unique=True)
+    _indexes_ready = True
+
+def encode_chat_cursor(chat: dict) -> str:
+    return f"{chat['created_at'].isoformat()}|{chat['id']}"
+
+def decode_chat_cursor(cursor: str) -> tuple[datetime, str]:
+    created_at, _, chat_id = cursor.partition('|')
+    if not chat_id:
+        raise ValueError("Malformed cursor")
+    return datetime.fromisoformat(created_at), chat_id
+
+# One workflow per chat, bounded with LRU eviction; all of them share the compiled graph
+workflow_pool = WorkFlowPool(max_size=int(os.getenv('WORKFLOW_POOL_SIZE', '256')))
+
+# Background executor for opt-in asynchronous chat turns
+job_queue = JobQueue(
+    max_workers=int(os.getenv('CHAT_JOB_WORKERS', '4')),
+    max_pending=int(os.getenv('CHAT_JOB_MAX_PENDING', '32')),
+    result_ttl=int(os.getenv('CHAT_JOB_RESULT_TTL', '600')),
+)
+JOB_MAX_WAIT = 30
+
+# Folds turns that leave the verbatim window into each chat's rolling summary
+summary_refresher = SummaryRefresher()
+
+def usage_increments(totals: dict) -> dict:
+    """$inc document adding a meter's totals to the chat's running `usage`."""
+    return {f'usage.{counter}': totals[counter] for counter in USAGE_COUNTERS if totals.get(counter)}
 
 class ChatStorage:
     @staticmethod
@@ -31,43 +109,233 @@ class ChatStorage:
         chat = {
             'id': chat_id,
             'title': title,
-            'messages': [],
-            'created_at': datetime.now()
+            'created_at': datetime.now(),
+            'message_seq': 0,
+            'message_count': 0,
+            'last_message': None,
         }
-        chats_collection.insert_one(chat)
+        chat_repository.chats.insert_one(chat)
+        chat.pop('_id', None)
+        chat['messages'] = []
+        return chat
+
+    @staticmethod
+    def get_chat_meta(chat_id: str) -> dict:
+        """Fetch the chat document without any message bodies."""
+        chat = chat_repository.chats.find_one({'id': chat_id}, {'_id': 0})
+        if chat is not None and chat.get('messages'):
+            # Chats written before messages moved to their own collection
+            ChatStorage._migrate_embedded_messages(chat)
+        if chat is not None:
+            chat.pop('messages', None)
+        return chat
+
+    @staticmethod
+    def get_chat(chat_id: str, window: int = CHAT_HISTORY_WINDOW) -> dict:
+        """Fetch a chat with its most recent `window` messages.
+
+        Older messages are paged through GET /chats/<id>/messages using the
+        returned `messages_before` cursor.
+        """
+        chat = ChatStorage.get_chat_meta(chat_id)
+        if chat is None:
+            return None
+        messages, before = ChatStorage.get_messages(chat_id, limit=window)
+        chat['messages'] = messages
+        chat['messages_before'] = before
         return chat
 
     @staticmethod
-    def get_chat(chat_id: str) -> dict:
-        return chats_collection.find_one({'id': chat_id}, {'_id': 0})
+    def get_prompt_history(chat_id: str) -> list:
+        """History for the prompts: the chat's rolling summary plus its last turns verbatim."""
+        chat = chat_repository.chats.find_one({'id': chat_id}, {'_id': 0, 'summary': 1})
+        messages, _ = ChatStorage.get_messages(chat_id, limit=HISTORY_KEEP_TURNS * 2)
+        return build_history((chat or {}).get('summary'), messages)
+
+    @staticmethod
+    def refresh_summary(chat_id: str) -> None:
+        """Fold messages older than the verbatim window into the chat's summary.
+
+        Batches of SUMMARY_BATCH_MESSAGES are folded one LLM call at a time.
+        Each save is conditional on summary_seq being unchanged, so a chat
+        cleared (or summarized elsewhere) meanwhile is never overwritten.
+        """
+        chat = chat_repository.chats.find_one(
+            {'id': chat_id}, {'_id': 0, 'summary': 1, 'summary_seq': 1, 'message_seq': 1}
+        )
+        if chat is None:
+            return
+        cutoff = chat.get('message_seq', 0) - HISTORY_KEEP_TURNS * 2
+        summary, summary_seq = chat.get('summary'), chat.get('summary_seq')
+        while (summary_seq or 0) < cutoff:
+            batch = list(chat_repository.messages.find(
+                {'chat_id': chat_id, 'seq': {'$gt': summary_seq or 0, '$lte': cutoff}},
+                {'_id': 0, 'role': 1, 'content': 1, 'seq': 1},
+            ).sort('seq', ASCENDING).limit(SUMMARY_BATCH_MESSAGES))
+            if not batch:
+                return
+            with metered(chat_id) as meter:
+                summary = summarize_messages(summary, batch)
+            update = {'$set': {'summary': summary, 'summary_seq': batch[-1]['seq']}}
+            increments = usage_increments(meter.totals())
+            if increments:
+                update['$inc'] = increments
+            # summary_seq: None also matches chats that have never been summarized
+            result = chat_repository.chats.update_one({'id': chat_id, 'summary_seq': summary_seq}, update)
+            if result.matched_count == 0:
+                return
+            summary_seq = batch[-1]['seq']
+
+    @staticmethod
+    def _migrate_embedded_messages(chat: dict) -> None:
+        """Move a legacy embedded `messages` array into the messages collection.
+
+        Safe to run concurrently (two first reads of the same chat) or again
+        after a crash: a message already copied hits the unique (chat_id, seq)
+        index and is skipped, and only the first run to finish updates the chat.
+        """
+        ensure_indexes()
+        legacy = chat['messages']
+        docs = [
+            {**message, 'chat_id': chat['id'], 'seq': seq}
+            for seq, message in enumerate(legacy, start=1)
+        ]
+        try:
+            chat_repository.messages.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            if any(error.get('code') != DUPLICATE_KEY_ERROR for error in e.details.get('writeErrors', [])):
+                raise
+        last = legacy[-1]
+        chat_repository.chats.update_one(
+            {'id': chat['id'], 'messages': {'$exists': True}},
+            {
+                '$unset': {'messages': ''},
+                '$set': {
+                    'message_seq': len(legacy),
+                    'message_count': len(legacy),
+                    'last_message': {'role': last.get('role'), 'preview': str(last.get('content', ''))[:CHAT_PREVIEW_CHARS]},
+                },
+            }
+        )
+
+    @staticmethod
+    def get_messages(chat_id: str, before: int = None, limit: int = MESSAGE_PAGE_DEFAULT_LIMIT) -> tuple[List[dict], int]:
+        """Return up to `limit` messages older than seq `before` (oldest first).
+
+        The second element is the cursor for the previous page (the oldest
+        returned seq), or None once the start of the chat is reached.
+        """
+        query = {'chat_id': chat_id}
+        if before is not None:
+            query['seq'] = {'$lt': before}
+        cursor = chat_repository.messages.find(query, {'_id': 0, 'chat_id': 0}) \
+            .sort('seq', DESCENDING).limit(limit + 1)
+        messages = list(cursor)
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        messages.reverse()
+        return messages, (messages[0]['seq'] if has_more and messages else None)
 
     @staticmethod
-    def get_all_chats() -> List[dict]:
-        return list(chats_collection.find({}, {'_id': 0}))
+    def get_chat_summaries(limit: int = CHAT_PAGE_DEFAULT_LIMIT, cursor: str = None) -> tuple[List[dict], str]:
+        """Return one page of chat summaries, newest first, plus the cursor for the next page.
+
+        Message bodies never leave the database: only the count and a short
+        preview of the last message are projected.
+        """
+        ensure_indexes()
+        match = {}
+        if cursor:
+            created_at, chat_id = decode_chat_cursor(cursor)
+            match = {'$or': [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, 'id': {'$lt': chat_id}},
+            ]}
+
+        pipeline = [
+            {'$match': match},
+            {'$sort': {'created_at': -1, 'id': -1}},
+            {'$limit': limit + 1},
+            {'$project': {
+                '_id': 0,
+                'id': 1,
+                'title': 1,
+                'created_at': 1,
+                # Counters are maintained on write; legacy chats still carry an embedded array
+                'message_count': {'$ifNull': ['$message_count', {'$size': {'$ifNull': ['$messages', []]}}]},
+                'last_message': {'$ifNull': ['$last_message', {'$let': {
+                    'vars': {'last': {'$arrayElemAt': [{'$ifNull': ['$messages', []]}, -1]}},
+                    'in': {
+                        'role': '$$last.role',
+                        'preview': {'$substrCP': [{'$ifNull': ['$$last.content', '']}, 0, CHAT_PREVIEW_CHARS]},
+                    },
+                }}]},
+            }},
+        ]
+        summaries = list(chat_repository.chats.aggregate(pipeline))
+        next_cursor = None
+        if len(summaries) > limit:
+            summaries = summaries[:limit]
+            next_cursor = encode_chat_cursor(summaries[-1])
+        for summary in summaries:
+            if not summary['message_count']:
+                summary['last_message'] = None
+        return summaries, next_cursor
 
     @staticmethod
     def add_message(chat_id: str, message: dict) -> None:
-        chats_collection.update_one(
+        ChatStorage.add_messages(chat_id, [message])
+
+    @staticmethod
+    def add_messages(chat_id: str, messages: List[dict], usage: dict = None) -> None:
+        """Append messages, reserving their sequence numbers with a single $inc.
+
+        `usage` (a meter's totals) is added to the chat's LLM usage in the same update.
+        """
+        if not messages:
+            return
+        ensure_indexes()
+        last = messages[-1]
+        chat = chat_repository.chats.find_one_and_update(
             {'id': chat_id},
-            {'$push': {'messages': message}}
+            {
+                '$inc': {'message_seq': len(messages), 'message_count': len(messages), **usage_increments(usage or {})},
+                '$set': {'last_message': {'role': last.get('role'), 'preview': str(last.get('content', ''))[:CHAT_PREVIEW_CHARS]}},
+            },
+            projection={'_id': 0, 'message_seq': 1},
+            return_document=ReturnDocument.AFTER,
         )
+        if chat is None:
+            return
+        first_seq = chat['message_seq'] - len(messages) + 1
+        chat_repository.messages.insert_many([
+            {**message, 'chat_id': chat_id, 'seq': first_seq + offset}
+            for offset, message in enumerate(messages)
+        ])
 
     @staticmethod
     def clear_chat(chat_id: str) -> None:
-        chats_collection.update_one(
+        chat_repository.messages.delete_many({'chat_id': chat_id})
+        # Pipeline update: summary_seq jumps to the current seq so an in-flight refresh cannot save
+        chat_repository.chats.update_one(
             {'id': chat_id},
-            {'$set': {'messages': []}}
+            [
+                {'$set': {'message_count': 0, 'last_message': None, 'summary': None, 'summary_seq': '$message_seq'}},
+                {'$unset': 'messages'},
+            ]
         )
-        global_workflow.clear()  # Clear the workflow state
+        workflow_pool.clear(chat_id)  # Clear only this chat's workflow state
 
     @staticmethod
     def delete_chat(chat_id: str) -> bool:
-        result = chats_collection.delete_one({'id': chat_id})
+        result = chat_repository.chats.delete_one({'id': chat_id})
+        chat_repository.messages.delete_many({'chat_id': chat_id})
+        workflow_pool.clear(chat_id)
         return result.deleted_count > 0
 
     @staticmethod
     def update_chat_title(chat_id: str, new_title: str) -> dict:
-        chats_collection.update_one(
+        chat_repository.chats.update_one(
             {'id': chat_id},
             {'$set': {'title': new_title}}
         )
@@ -76,8 +344,26 @@ class ChatStorage:
 # Update route handlers to use the new MongoDB-based ChatStorage
 @app.route('/chats', methods=['GET'])
 def get_chats():
-    """Get all chats"""
-    return jsonify(ChatStorage.get_all_chats())
+    """List chat summaries, newest first.
+
+    Supports ?limit=&cursor=; the cursor for the next page is returned in the
+    X-Next-Cursor header so the body stays a plain list for the sidebar.
+    """
+    try:
+        limit = int(request.args.get('limit', CHAT_PAGE_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, CHAT_PAGE_MAX_LIMIT))
+
+    try:
+        summaries, next_cursor = ChatStorage.get_chat_summaries(limit, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    response = make_response(jsonify(summaries))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 
 @app.route('/chats', methods=['POST'])
@@ -95,19 +381,35 @@ def get_chat(chat_id):
     chat = ChatStorage.get_chat(chat_id)
     if chat is None:
         return jsonify({'error': 'Chat not found'}), 404
-    print('Return Chat:', chat)
     return jsonify(chat)
 
 
+@app.route('/chats/<chat_id>/messages', methods=['GET'])
+def get_messages(chat_id):
+    """Page backwards through a chat's messages with ?before=<seq>&limit="""
+    if ChatStorage.get_chat_meta(chat_id) is None:
+        return jsonify({'error': 'Chat not found'}), 404
+
+    try:
+        before = request.args.get('before')
+        before = int(before) if before else None
+        limit = int(request.args.get('limit', MESSAGE_PAGE_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'before and limit must be integers'}), 400
+    limit = max(1, min(limit, MESSAGE_PAGE_MAX_LIMIT))
+
+    messages, next_before = ChatStorage.get_messages(chat_id, before, limit)
+    return jsonify({'messages': messages, 'before': next_before})
+
+
 @app.route('/chats/<chat_id>/messages', methods=['POST'])
 def send_message(chat_id):
     """Send a message in a specific chat"""
-    chat = ChatStorage.get_chat(chat_id)
+    chat = ChatStorage.get_chat_meta(chat_id)
     if chat is None:
         return jsonify({'error': 'Chat not found'}), 404
 
     data = request.get_json()
-    print(data)
     user_message = data.get('content')
 
     if not user_message:
@@ -128,34 +430,158 @@ def send_message(chat_id):
             'content': 'Command not recognized.'
         })
 
-    # Set the chat history for the global workflow
-    global_workflow.set_chat_history(chat.get('messages', []))
+    include_usage = wants_usage()
+    if wants_event_stream():
+        return stream_message_response(chat_id, user_message, include_usage)
+
+    if wants_async():
+        try:
+            job = job_queue.submit(process_turn, chat_id, user_message, include_usage)
+        except QueueFullError as e:
+            response = make_response(jsonify({'error': 'Too many pending messages, try again later'}), 429)
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        response = make_response(jsonify(job_payload(job)), 202)
+        response.headers['Location'] = f"/jobs/{job['id']}"
+        return response
 
     try:
-        # Process message using the global workflow
-        user_message_obj = HumanMessage(content=user_message)
-        response = global_workflow.invoke(user_message_obj)
-        
-        ai_message = {
-            'id': str(uuid4()),
-            'role': 'assistant',
-            'content': response['messages'][-1].content
-        }
-        
-        # Store messages in MongoDB
-        ChatStorage.add_message(chat_id, {
-            'id': str(uuid4()),
-            'role': 'user',
-            'content': user_message
-        })
-        ChatStorage.add_message(chat_id, ai_message)
-        
-        return jsonify(ai_message)
+        message = process_turn(chat_id, user_message, include_usage)
+        response = jsonify(message)
+        if include_usage:
+            response.headers['X-LLM-Usage'] = usage_header(message['usage'])
+        return response
     except Exception as e:
-        print(f"Error processing message: {str(e)}")
+        app.logger.exception("Error processing message")
         return jsonify({'error': f'Error processing message: {str(e)}'}), 500
 
 
+def process_turn(chat_id: str, user_message: str, include_usage: bool = False) -> dict:
+    """Run one chat turn through the chat's workflow and persist both messages.
+
+    With include_usage the returned message carries the turn's LLM usage
+    under `usage`; it is added to the chat's totals either way.
+    """
+    # Turns within one chat run one at a time; different chats run in parallel
+    with span('chat.turn', chat_id=chat_id), workflow_pool.checkout(chat_id) as workflow, metered(chat_id) as meter:
+        workflow.set_chat_history(ChatStorage.get_prompt_history(chat_id))
+        user_message_obj = HumanMessage(content=user_message)
+        response = workflow.invoke(user_message_obj)
+
+    ai_message = {
+        'id': str(uuid4()),
+        'role': 'assistant',
+        'content': response['messages'][-1].content
+    }
+
+    # Store both turns in MongoDB with one sequence reservation
+    ChatStorage.add_messages(chat_id, [{
+        'id': str(uuid4()),
+        'role': 'user',
+        'content': user_message
+    }, ai_message], usage=meter.totals())
+    summary_refresher.schedule(chat_id, ChatStorage.refresh_summary)
+    if include_usage:
+        return {**ai_message, 'usage': meter.summary()}
+    return ai_message
+
+
+def wants_usage() -> bool:
+    """Clients opt into the turn's LLM usage with ?usage=1 or an X-Debug-Usage: 1 header."""
+    if request.args.get('usage', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.headers.get('X-Debug-Usage', '').lower() in ('1', 'true', 'yes')
+
+
+def wants_async() -> bool:
+    """Clients opt into job mode with ?async=1 or a Prefer: respond-async header."""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+
+def job_payload(job: dict) -> dict:
+    payload = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/jobs/{job['id']}",
+    }
+    if job['status'] == 'succeeded':
+        payload['message'] = job['result']
+    elif job['status'] == 'failed':
+        payload['error'] = f"Error processing message: {job['error']}"
+    return payload
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll an asynchronous chat turn; ?wait=<seconds> blocks until it completes"""
+    try:
+        wait = min(float(request.args.get('wait', 0)), JOB_MAX_WAIT)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number'}), 400
+
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_payload(job))
+
+
+def wants_event_stream() -> bool:
+    """Clients opt into SSE with ?stream=1 or an Accept: text/event-stream header."""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_message_response(chat_id: str, user_message: str, include_usage: bool = False) -> Response:
+    """Stream a turn as server-sent events and persist it once the reply is complete.
+
+    Emits `progress` events while CrewAI agents are being queried, `token`
+    events for the main_conversation output and a final `message` event
+    carrying the stored assistant message (plus `usage` with include_usage),
+    or `error` on failure.
+    """
+    def generate() -> Iterator[str]:
+        with span('chat.turn', chat_id=chat_id, streamed=True) as turn_span:
+            try:
+                with workflow_pool.checkout(chat_id) as workflow, metered(chat_id) as meter:
+                    workflow.set_chat_history(ChatStorage.get_prompt_history(chat_id))
+                    content = ''
+                    for event, data in workflow.stream(HumanMessage(content=user_message)):
+                        if event == 'done':
+                            content = data['content']
+                        else:
+                            yield sse_event(event, data)
+
+                ai_message = {
+                    'id': str(uuid4()),
+                    'role': 'assistant',
+                    'content': content
+                }
+                ChatStorage.add_messages(chat_id, [{
+                    'id': str(uuid4()),
+                    'role': 'user',
+                    'content': user_message
+                }, ai_message], usage=meter.totals())
+                summary_refresher.schedule(chat_id, ChatStorage.refresh_summary)
+                yield sse_event('message', {**ai_message, 'usage': meter.summary()} if include_usage else ai_message)
+            except Exception as e:
+                turn_span.error = f'{type(e).__name__}: {e}'
+                app.logger.exception("Error streaming message")
+                yield sse_event('error', {'error': f'Error processing message: {str(e)}'})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/chats/<chat_id>', methods=['DELETE'])
 def delete_chat(chat_id):
     """Delete a specific chat"""
@@ -167,7 +593,7 @@ def delete_chat(chat_id):
 @app.route('/chats/<chat_id>/title', methods=['PATCH'])
 def update_chat_title(chat_id):
     """Update chat title"""
-    chat = ChatStorage.get_chat(chat_id)
+    chat = ChatStorage.get_chat_meta(chat_id)
     if chat is None:
         return jsonify({'error': 'Chat not found'}), 404
 
@@ -180,6 +606,173 @@ def update_chat_title(chat_id):
     return jsonify(chat)
 
 
+@app.route('/tasks/bulk', methods=['POST'])
+def bulk_tasks():
+    """Apply many task add/update/delete operations in one bulk_write.
+
+    Body: {"operations": [{"op": "add", "task": {...}}, ...], "ordered": true}.
+    Responds 200 when every operation succeeded, otherwise 207 with the
+    per-operation results.
+    """
+    # Imported here: backendcrew pulls in CrewAI, which the chat routes load lazily
+    from backendcrew.tools import run_bulk_operations
+
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+
+    result = run_bulk_operations(operations, ordered=bool(data.get('ordered', True)))
+    if 'results' not in result:
+        return jsonify(result), 400
+    all_ok = all(r['status'] == 'ok' for r in result['results'])
+    return jsonify(result), 200 if all_ok else 207
+
+
+@app.route('/tasks/import', methods=['POST'])
+def import_tasks():
+    """Import tasks from an uploaded CSV or iCalendar file without going through the LLM.
+
+    Upload the file as multipart field `file`; the format comes from
+    ?format=csv|ics or the file extension. The file is parsed and inserted
+    in chunks, so memory does not grow with its size. With ?stream=1 (or
+    Accept: text/event-stream) a `progress` event is sent after each chunk
+    and a final `done` event carries the report.
+    """
+    from backendcrew.tools import invalidate_task_cache
+    from backendcrew.task_import import (
+        IMPORT_FORMATS, ImportFileError, parse_csv, parse_ics, iter_import, import_tasks as run_import,
+    )
+
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'Upload a file in the "file" field'}), 400
+    file_format = (request.args.get('format') or upload.filename.rsplit('.', 1)[-1]).lower()
+    if file_format == 'ical':
+        file_format = 'ics'
+    if file_format not in IMPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format; use one of: {', '.join(IMPORT_FORMATS)}"}), 400
+
+    # Werkzeug spools large uploads to disk; read them back line by line
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    parse = parse_csv if file_format == 'csv' else parse_ics
+    default_type = request.args.get('type')
+    records = parse(lines, default_type) if default_type else parse(lines)
+
+    # Each chunk is committed as it goes, so cached task reads go stale per chunk
+    if not wants_event_stream():
+        try:
+            report = run_import(records, task_repository.collection, on_insert=invalidate_task_cache)
+        except ImportFileError as e:
+            return jsonify({'error': str(e), 'report': e.report}), 400
+        return jsonify(report), 200 if not report['invalid'] and not report['failed'] else 207
+
+    def generate() -> Iterator[str]:
+        report = None
+        try:
+            for report in iter_import(records, task_repository.collection, on_insert=invalidate_task_cache):
+                yield sse_event('progress', {k: v for k, v in report.items() if k != 'errors'})
+            yield sse_event('done', report)
+        except ImportFileError as e:
+            yield sse_event('error', {'error': str(e), 'report': e.report})
+        except Exception as e:
+            yield sse_event('error', {'error': f'Import failed: {str(e)}', 'report': report})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+# Query string filters accepted by the export endpoint, compiled with the task tools' filter compiler
+EXPORT_FILTER_PARAMS = ('status', 'type', 'priority', 'title', 'description', 'due', 'due_before', 'due_after')
+
+
+@app.route('/tasks/export', methods=['GET'])
+def export_tasks():
+    """Stream tasks as NDJSON (?format=ndjson, default) or iCalendar (?format=ics).
+
+    Filters (?status=, ?due=this_week, ?due_after=, ?due_before=, ?type=,
+    ?priority=) run in MongoDB. Documents are read off the cursor in
+    batches and written as they arrive, so memory stays flat and the first
+    bytes go out immediately. The body is gzipped when the client accepts
+    it, unless ?gzip=0.
+    """
+    from backendcrew.tools import build_search_query, validate_search_params, task_status
+    from backendcrew.task_export import EXPORT_FORMATS, iter_tasks, ndjson_lines, ics_lines, chunked, gzip_chunks
+    from backendcrew.task_query import ensure_task_indexes
+
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format; use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    filters = {key: request.args[key] for key in EXPORT_FILTER_PARAMS if request.args.get(key)}
+    if filters:
+        is_valid, message = validate_search_params(filters)
+        if not is_valid:
+            return jsonify({'error': message}), 400
+    # Title/description/type filters need the search fields backfilled
+    ensure_task_indexes(task_repository.collection)
+    tasks = iter_tasks(task_repository.collection, build_search_query(filters))
+
+    if export_format == 'ics':
+        body = chunked(ics_lines(tasks))
+    else:
+        body = chunked(ndjson_lines(tasks, task_status))
+
+    headers = {
+        'Content-Disposition': f'attachment; filename="tasks.{export_format}"',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Vary': 'Accept-Encoding',
+    }
+    if request.args.get('gzip', '1').lower() not in ('0', 'false', 'no') and 'gzip' in request.accept_encodings:
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format], headers=headers)
+
+
+@app.route('/usage', methods=['GET'])
+def get_usage():
+    """LLM usage since startup: totals and rolling token/latency percentiles per node or agent"""
+    return jsonify(usage_stats.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition: span latency histograms, request counters and component gauges"""
+    components = {
+        'workflow_pool': workflow_pool.stats(),
+        'job_queue': job_queue.stats(),
+        'router': WorkFlow.router_stats(),
+        'summary_refresher': summary_refresher.stats(),
+        'database': database_stats(),
+        'llm': usage_stats.stats(),
+        'traces': trace_buffer.stats(),
+    }
+    # The task tools (and their cache) are only loaded once a turn has used them
+    tools = sys.modules.get('backendcrew.tools')
+    if tools is not None:
+        components['task_cache'] = tools.task_cache.stats()
+    body = metrics.render() + ''.join(
+        render_gauges(f'studybuddy_{name}', stats) for name, stats in components.items()
+    )
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/traces', methods=['GET'])
+def get_traces():
+    """Most recent sampled request traces, newest first (?limit=)"""
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, TRACES_MAX_LIMIT))
+    return jsonify({'traces': trace_buffer.recent(limit), **trace_buffer.stats()})
+
+
 @app.route('/performance', methods=['GET'])
 def get_performance():
     # Generate mock data for demonstration
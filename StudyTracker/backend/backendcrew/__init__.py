@@ -1,12 +1,24 @@
-from .crew import backendcrewCrew
-from .tools import CustomCalenderTool, AddTaskTool, QueryTasksTool, UpdateTaskTool, DeleteTaskTool, GetAllTasksTool
-
-__all__ = [
-    'backendcrewCrew',
-    'CustomCalenderTool',
-    'AddTaskTool',
-    'QueryTasksTool',
-    'UpdateTaskTool',
-    'DeleteTaskTool',
-    'GetAllTasksTool'
-]
+from importlib import import_module
+
+# Exports are resolved on first access, so the crewai-free helpers (task_query,
+# task_schema, task_cache, routing, ...) can be imported on their own
+_EXPORTS = {
+    'backendcrewCrew': '.crew',
+    'CustomCalenderTool': '.tools',
+    'AddTaskTool': '.tools',
+    'QueryTasksTool': '.tools',
+    'UpdateTaskTool': '.tools',
+    'DeleteTaskTool': '.tools',
+    'GetAllTasksTool': '.tools',
+    'BulkTaskTool': '.tools',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -4,14 +4,27 @@ from crewai.project import CrewBase, agent, crew, task
 from langchain_community.tools import DuckDuckGoSearchRun
 
 from .tools import *
+from .routing import AgentResolver, RoutingCache
+from llm_usage import install_litellm_callback, label
+from tracing import set_attributes, span
 
+from types import MappingProxyType
+from typing import Mapping, Tuple
+import logging
 import os
+import threading
+import time
 os.environ["OTEL_SDK_DISABLED"] = "true"
 # set CREWAI_TELEMETRY_OPT_OUT=True
 __all__ = ['backendcrewCrew']
 
 load_dotenv(find_dotenv())
 
+logger = logging.getLogger(__name__)
+
+# Agents call Groq through litellm; report those calls to llm_usage
+install_litellm_callback()
+
 
 @CrewBase
 class backendcrewCrew:
@@ -26,6 +39,20 @@ class backendcrewCrew:
         # self.llm = "groq/llama3-groq-70b-8192-tool-use-preview"
         self.function_calling_llm = "groq/llama-3.2-90b-text-preview"
         self.cached_crew = None
+        # agent key -> (Agent, Task), built alongside cached_crew
+        self.dispatch_table: Mapping[str, Tuple[Agent, Task]] = MappingProxyType({})
+        self.build_stats = {}
+        self._crew_lock = threading.Lock()
+        self._agent_resolver = None
+        # Normalized query -> agent key, so repeated queries skip the selection call
+        self.routing_cache = RoutingCache()
+
+    @property
+    def agent_resolver(self) -> AgentResolver:
+        # agents_config is only loaded from YAML once CrewBase's __init__ has run
+        if self._agent_resolver is None:
+            self._agent_resolver = AgentResolver(self.agents_config)
+        return self._agent_resolver
 
     @agent
     def notebook_resource_manager(self) -> Agent:
@@ -65,7 +92,7 @@ class backendcrewCrew:
     def task_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['task_agent'],
-            tools=[AddTaskTool(), QueryTasksTool(), UpdateTaskTool(), DeleteTaskTool(),GetAllTasksTool()],
+            tools=[AddTaskTool(), QueryTasksTool(), UpdateTaskTool(), DeleteTaskTool(),GetAllTasksTool(), BulkTaskTool()],
             llm=self.llm,
             verbose=True
         )
@@ -158,56 +185,76 @@ class backendcrewCrew:
         )
         
     
+    def get_cached_crew(self) -> Crew:
+        """Build the crew and its dispatch table once, timing both steps."""
+        if self.cached_crew is None:
+            with self._crew_lock:
+                if self.cached_crew is None:
+                    with span('crew.build'):
+                        start = time.perf_counter()
+                        crew = self.crew()
+                        crew_seconds = time.perf_counter() - start
+
+                        start = time.perf_counter()
+                        self.dispatch_table = self._build_dispatch_table(crew)
+                        dispatch_seconds = time.perf_counter() - start
+
+                        self.build_stats = {
+                            'crew_seconds': crew_seconds,
+                            'dispatch_seconds': dispatch_seconds,
+                            'agents': len(crew.agents),
+                            'tasks': len(crew.tasks),
+                            'routes': len(self.dispatch_table),
+                        }
+                        set_attributes(**self.build_stats)
+                    logger.info("Built crew in %.3fs and its dispatch table (%d routes) in %.6fs",
+                                crew_seconds, len(self.dispatch_table), dispatch_seconds)
+                    self.cached_crew = crew
+        return self.cached_crew
+
+    def _build_dispatch_table(self, crew: Crew) -> Mapping[str, Tuple[Agent, Task]]:
+        """Pair every agent key with its crew Agent and the Task assigned to it in tasks.yaml."""
+        agents_by_role = {agent.role: agent for agent in crew.agents}
+        tasks_by_description = {task.description: task for task in crew.tasks}
+        table = {}
+        for agent_key, agent_config in self.agents_config.items():
+            agent = agents_by_role.get(agent_config['role'])
+            if agent is None:
+                continue
+            for task_config in self.tasks_config.values():
+                if getattr(task_config.get('agent'), 'role', None) == agent_config['role']:
+                    task = tasks_by_description.get(task_config['description'])
+                    if task is not None:
+                        table[agent_key] = (agent, task)
+                    break
+        return MappingProxyType(table)
+
     def process_query(self, query: str) -> str:
-        if not self.cached_crew:
-            self.cached_crew = self.crew()
-        crew = self.cached_crew
-
-        valid_agents = list(self.agents_config.keys())
-        max_retries = 10
-        retry_count = 0
-        selected_agent_name = None
-
-        # Retry loop for agent selection
-        while retry_count < max_retries:
-            selected_agent_name = crew.manager_agent.execute_task(
-                self.select_agent(), 
-                context={
-                    'query': query,
-                    'invalid_count': retry_count
-                }
-            )
-            
-            # Clean up selected agent name
-            if selected_agent_name:
-                selected_agent_name = selected_agent_name.strip().strip('"\'').lower()
-            
-            # Check if valid agent was selected
-            if selected_agent_name in valid_agents:
-                break
-                
-            print(f"Attempt {retry_count + 1}: Invalid agent selection '{selected_agent_name}'")
-            retry_count += 1
-
-        # If no valid agent was selected after all retries
-        if retry_count >= max_retries or selected_agent_name not in valid_agents:
-            print(f"Failed to select valid agent after {max_retries} attempts. Defaulting to misc_agent")
-            selected_agent_name = 'misc_agent'
-
-        selected_agent_with_role = self.agents_config[selected_agent_name]['role']
+        crew = self.get_cached_crew()
+
+        selected_agent_name = self.routing_cache.get(query)
+        if selected_agent_name is None:
+            # One selection call; the answer is fuzzily matched against agent keys and roles
+            with span('crew.select_agent') as selection_span, label('crew:select_agent'):
+                selection = crew.manager_agent.execute_task(
+                    self.select_agent(),
+                    context={'query': query}
+                )
+                selected_agent_name, confidence = self.agent_resolver.resolve(selection)
+                selection_span.attributes.update(agent=selected_agent_name, confidence=round(confidence, 2))
+            if selected_agent_name is None:
+                logger.warning("Could not resolve agent selection %r (best score %.2f). Defaulting to misc_agent",
+                               selection, confidence)
+                selected_agent_name = 'misc_agent'
+            else:
+                self.routing_cache.put(query, selected_agent_name)
+
         response = None
-        agent_task = None
-
-        # Find matching agent and task
-        for agent in crew.agents:
-            if agent.role == selected_agent_with_role:
-                for task in self.tasks_config.values():
-                    if getattr(task.get('agent', 'found_none'), 'role', {}) == selected_agent_with_role:
-                        agent_task = [i for i in crew.tasks if i.description==task['description']][0]
-                        break
-                if agent_task:
-                    response = agent.execute_task(agent_task, context={'query': query})
-                break
+        route = self.dispatch_table.get(selected_agent_name)
+        if route is not None:
+            agent, agent_task = route
+            with span('crew.agent', agent=selected_agent_name), label(f'crew:{selected_agent_name}'):
+                response = agent.execute_task(agent_task, context={'query': query})
 
         return response if response else f"No response from {selected_agent_name}. The query may need to be reformulated."
 
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, Optional, Tuple
+import re
+import threading
+
+__all__ = ['AgentResolver', 'RoutingCache', 'normalize_text']
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse punctuation/underscores/whitespace to single spaces."""
+    return _NON_WORD.sub(' ', str(text).lower()).strip()
+
+
+class AgentResolver:
+    """Resolve free-form manager output to an agent key from agents.yaml.
+
+    Scores every agent key and role against the output by normalized edit
+    distance and token overlap, and accepts the best one only above
+    `threshold`, so a single selection call is enough.
+    """
+
+    def __init__(self, agents_config: Dict[str, dict], threshold: float = 0.6, exclude=('manager_agent',)):
+        self.threshold = threshold
+        self._candidates = {}
+        for key, config in agents_config.items():
+            if key in exclude:
+                continue
+            names = {normalize_text(key), normalize_text(config.get('role', ''))}
+            self._candidates[key] = [name for name in names if name]
+
+    @property
+    def agent_keys(self):
+        return list(self._candidates)
+
+    def resolve(self, output: str) -> Tuple[Optional[str], float]:
+        """Return (agent_key, confidence), or (None, best_score) when not confident."""
+        text = normalize_text(output or '')
+        if not text:
+            return None, 0.0
+
+        best_key, best_score, best_length = None, 0.0, 0
+        for key, names in self._candidates.items():
+            for name in names:
+                score = self._score(text, name)
+                # On a tie the longer name wins: "miscellaneous task manager" also contains "task manager"
+                if (score, len(name)) > (best_score, best_length):
+                    best_key, best_score, best_length = key, score, len(name)
+
+        if best_score < self.threshold:
+            return None, best_score
+        return best_key, best_score
+
+    @staticmethod
+    def _score(text: str, name: str) -> float:
+        if text == name:
+            return 1.0
+        # Verbose answers such as "I would delegate this to task agent."
+        if re.search(rf'\b{re.escape(name)}\b', text):
+            return 0.95
+        edit = SequenceMatcher(None, text, name).ratio()
+        text_tokens, name_tokens = set(text.split()), set(name.split())
+        overlap = len(text_tokens & name_tokens) / len(name_tokens)
+        return max(edit, 0.9 * overlap)
+
+
+class RoutingCache:
+    """Thread-safe LRU map of normalized query -> agent key."""
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[str]:
+        key = normalize_text(query)
+        with self._lock:
+            agent = self._entries.get(key)
+            if agent is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return agent
+
+    def put(self, query: str, agent: str) -> None:
+        key = normalize_text(query)
+        with self._lock:
+            self._entries[key] = agent
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
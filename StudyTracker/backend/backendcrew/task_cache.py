@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import copy
+import json
+import threading
+import time
+
+__all__ = ['TaskReadCache']
+
+
+class TaskReadCache:
+    """Thread-safe TTL + LRU cache of task tool results, versioned by collection writes.
+
+    Every write through the task tools calls invalidate(), which bumps the
+    version; entries stored under an older version are never served, even
+    if a slow reader finishes after the write. Writes that bypass the tools
+    (the frontend's /api/db route) are bounded by the TTL instead.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Normalize a compiled filter (plus paging options) into a stable key."""
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self._version or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[2]
+        # Callers reformat tool output in place, so never hand out the cached object
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any, version: int) -> None:
+        """Store value computed from data read at `version`; dropped if a write happened since."""
+        if not self.enabled:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,137 @@
+from datetime import datetime
+from pymongo.collection import Collection
+from typing import Callable, Iterable, Iterator, Optional
+import json
+import zlib
+
+from .task_query import legacy_due_date_string, DERIVED_SEARCH_FIELDS
+from .task_stats import DUE_DATE_EXPRESSION
+
+__all__ = [
+    'EXPORT_BATCH_SIZE',
+    'EXPORT_FORMATS',
+    'iter_tasks',
+    'ndjson_lines',
+    'ics_lines',
+    'chunked',
+    'gzip_chunks',
+]
+
+# Documents per cursor batch, i.e. per getMore round trip
+EXPORT_BATCH_SIZE = 500
+# Bytes buffered before a chunk is handed to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'ics': 'text/calendar'}
+
+_ICS_PRIORITY = {'High': 1, 'Medium': 5, 'Low': 9}
+
+
+def iter_tasks(collection: Collection, match: dict, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+    """Iterate matching tasks by due date straight off the cursor, batch_size documents at a time.
+
+    The sort is on the normalized due date, so tasks with legacy string and
+    native dates come out in one order; allowDiskUse lets the server spill
+    that sort for large exports.
+    """
+    return collection.aggregate([
+        {'$match': match},
+        {'$addFields': {'_due': DUE_DATE_EXPRESSION}},
+        {'$sort': {'_due': 1, '_id': 1}},
+        {'$project': {field: 0 for field in ('_due', *DERIVED_SEARCH_FIELDS)}},
+    ], batchSize=batch_size, allowDiskUse=True)
+
+
+def _due(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+
+def ndjson_lines(tasks: Iterable[dict], status: Callable[[dict, datetime], str]) -> Iterator[str]:
+    """One JSON object per line, with the string id and dueDate form the frontend already reads."""
+    now = datetime.now()
+    for task in tasks:
+        task['id'] = str(task.pop('_id'))
+        task['status'] = status(task, now)
+        due = _due(task.get('dueDate'))
+        if due:
+            task['dueDate'] = legacy_due_date_string(due)
+        yield json.dumps(task, default=str) + '\n'
+
+
+def _ics_escape(value) -> str:
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _ics_fold(line: str) -> str:
+    """Fold to 75-octet lines as RFC 5545 requires, never splitting a UTF-8 sequence."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ics_lines(tasks: Iterable[dict], calendar_name: str = 'StudyBuddy Tasks') -> Iterator[str]:
+    """A VCALENDAR with one VEVENT per task, starting at its dueDate."""
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//StudyBuddy//Tasks//EN\r\n'
+    yield _ics_fold(f'X-WR-CALNAME:{_ics_escape(calendar_name)}')
+    for task in tasks:
+        due = _due(task.get('dueDate'))
+        if due is None:
+            continue
+        lines = [
+            'BEGIN:VEVENT',
+            f"UID:{task['_id']}@studybuddy",
+            f'DTSTAMP:{stamp}',
+            f"DTSTART:{due.strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{_ics_escape(task.get('title', ''))}",
+        ]
+        if task.get('description'):
+            lines.append(f"DESCRIPTION:{_ics_escape(task['description'])}")
+        if task.get('type'):
+            lines.append(f"CATEGORIES:{_ics_escape(task['type'])}")
+        if task.get('priority') in _ICS_PRIORITY:
+            lines.append(f"PRIORITY:{_ICS_PRIORITY[task['priority']]}")
+        if task.get('completed'):
+            lines.append('X-STUDYBUDDY-COMPLETED:TRUE')
+        lines.append('END:VEVENT')
+        yield ''.join(_ics_fold(line) for line in lines)
+    yield 'END:VCALENDAR\r\n'
+
+
+def chunked(pieces: Iterable[str], size: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """Coalesce small string pieces into ~size-byte chunks; the first piece is sent at once."""
+    buffer, buffered, first = [], 0, True
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        buffered += len(data)
+        if first or buffered >= size:
+            yield b''.join(buffer)
+            buffer, buffered, first = [], 0, False
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a chunk stream incrementally, flushing after each chunk so clients see data promptly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
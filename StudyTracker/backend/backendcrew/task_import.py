@@ -0,0 +1,231 @@
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+import csv
+import re
+
+from .task_query import ensure_task_indexes, with_search_fields
+from .task_schema import TASK_SCHEMA, TaskSchema
+
+__all__ = [
+    'IMPORT_CHUNK_SIZE', 'IMPORT_FORMATS', 'ImportFileError', 'parse_csv', 'parse_ics', 'iter_import', 'import_tasks',
+]
+
+# Tasks buffered per insert_many; memory stays bounded by this, not the file size
+IMPORT_CHUNK_SIZE = 500
+# Per-record errors kept in the report; the rest are only counted
+IMPORT_MAX_ERRORS = 50
+IMPORT_FORMATS = ('csv', 'ics')
+
+# Accepted CSV header spellings, matched case-insensitively
+_CSV_COLUMNS = {
+    'title': 'title', 'name': 'title', 'summary': 'title', 'task': 'title',
+    'description': 'description', 'details': 'description', 'notes': 'description',
+    'type': 'type', 'category': 'type',
+    'duedate': 'dueDate', 'due': 'dueDate', 'due date': 'dueDate', 'due_date': 'dueDate', 'deadline': 'dueDate',
+    'priority': 'priority',
+    'progress': 'progress',
+    'completed': 'completed', 'done': 'completed',
+}
+_TRUE = {'true', 'yes', 'y', '1', 'x', 'done', 'completed'}
+_FALSE = {'false', 'no', 'n', '0', '', 'pending'}
+
+_ICS_DATE = re.compile(r'^(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2})?Z?)?$')
+_ICS_ESCAPES = re.compile(r'\\([\\;,nN])')
+
+
+class ImportFileError(ValueError):
+    """Raised when the uploaded file cannot be read as text or CSV part way through an import.
+
+    `report` is the progress so far; chunks before the bad line are already inserted.
+    """
+
+    def __init__(self, error: Exception, report: dict):
+        super().__init__(f"Could not read the file: {error}")
+        self.report = report
+
+
+def _with_defaults(task: dict, default_type: str) -> dict:
+    """Fill the fields calendar/syllabus exports commonly leave out."""
+    if task.get('title') and not task.get('description'):
+        task['description'] = task['title']
+    if not task.get('type'):
+        task['type'] = default_type
+    return task
+
+
+def parse_csv(lines: Iterable[str], default_type: str = 'Task') -> Iterator[Tuple[int, dict]]:
+    """Yield (row_number, task) pairs from a CSV export, one row at a time.
+
+    Headers are matched loosely ('Due Date', 'deadline', 'Name', ...);
+    unknown columns are ignored.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [_CSV_COLUMNS.get(name.strip().lower()) for name in header]
+    for row_number, row in enumerate(reader, start=2):
+        task = {}
+        for field, value in zip(columns, row):
+            value = value.strip()
+            if field and value:
+                task[field] = value
+        if not task:
+            continue
+        if 'completed' in task:
+            flag = task['completed'].lower()
+            task['completed'] = True if flag in _TRUE else False if flag in _FALSE else task['completed']
+        yield row_number, _with_defaults(task, default_type)
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Join RFC 5545 folded lines (continuations start with a space or tab)."""
+    current, start = None, 0
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, number
+    if current is not None:
+        yield start, current
+
+
+def _ics_text(value: str) -> str:
+    return _ICS_ESCAPES.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value).strip()
+
+
+def _ics_date(value: str) -> str:
+    """Convert 20240501 / 20240501T143000[Z] into a format validate_task_data accepts."""
+    match = _ICS_DATE.match(value.strip())
+    if not match:
+        return value
+    year, month, day, hour, minute, second = match.groups()
+    if hour is None:
+        return f"{year}-{month}-{day}"
+    return f"{year}-{month}-{day}T{hour}:{minute}:{second or '00'}"
+
+
+def _ics_priority(value: str) -> Optional[str]:
+    # RFC 5545: 1-4 high, 5 medium, 6-9 low, 0 undefined
+    try:
+        level = int(value)
+    except ValueError:
+        return None
+    if 1 <= level <= 4:
+        return 'High'
+    if level == 5:
+        return 'Medium'
+    if 6 <= level <= 9:
+        return 'Low'
+    return None
+
+
+def parse_ics(lines: Iterable[str], default_type: Optional[str] = None) -> Iterator[Tuple[int, dict]]:
+    """Yield (line_number, task) pairs for every VEVENT/VTODO in an iCalendar file.
+
+    VTODO DUE (or else DTSTART) becomes dueDate, SUMMARY the title,
+    CATEGORIES the type, and STATUS/PERCENT-COMPLETE/PRIORITY map onto
+    completed/progress/priority.
+    """
+    component, start, task = None, 0, None
+    for number, line in _unfold(lines):
+        name, _, value = line.partition(':')
+        name, _, params = name.partition(';')
+        name = name.upper()
+        if name == 'BEGIN' and value.upper() in ('VEVENT', 'VTODO'):
+            component, start, task = value.upper(), number, {}
+        elif name == 'END' and component and value.upper() == component:
+            default = default_type or ('Task' if component == 'VTODO' else 'Event')
+            yield start, _with_defaults(task, default)
+            component, task = None, None
+        elif task is None:
+            continue
+        elif name == 'SUMMARY':
+            task['title'] = _ics_text(value)
+        elif name == 'DESCRIPTION':
+            task['description'] = _ics_text(value)
+        elif name == 'CATEGORIES':
+            task['type'] = _ics_text(value).split(',')[0].strip()
+        elif name == 'DUE' or (name == 'DTSTART' and 'dueDate' not in task):
+            task['dueDate'] = _ics_date(value)
+        elif name == 'PRIORITY':
+            priority = _ics_priority(value)
+            if priority:
+                task['priority'] = priority
+        elif name == 'PERCENT-COMPLETE':
+            task['progress'] = value.strip()
+        elif name == 'STATUS':
+            task['completed'] = value.strip().upper() == 'COMPLETED'
+        elif name == 'X-STUDYBUDDY-COMPLETED':
+            # Written by task_export so backups round-trip the completed flag
+            task['completed'] = value.strip().upper() == 'TRUE'
+
+
+def iter_import(records: Iterable[Tuple[int, dict]], collection: Collection,
+                schema: TaskSchema = TASK_SCHEMA, chunk_size: int = IMPORT_CHUNK_SIZE,
+                on_insert: Optional[Callable[[], None]] = None) -> Iterator[dict]:
+    """Validate and insert parsed tasks in insert_many chunks, yielding a progress report per chunk.
+
+    `records` is one of the parse_* generators. Each chunk is checked with
+    schema.validate_many, the same rules validate_task_data applies.
+    on_insert runs after every chunk that inserted tasks, e.g. to invalidate
+    a read cache. The last report yielded is the final one. Raises
+    ImportFileError if the file turns out not to be valid text or CSV.
+    """
+    ensure_task_indexes(collection)
+    report = {'processed': 0, 'inserted': 0, 'invalid': 0, 'failed': 0, 'errors': []}
+    chunk = []
+
+    def record_error(where: int, message: str) -> None:
+        if len(report['errors']) < IMPORT_MAX_ERRORS:
+            report['errors'].append({'line': where, 'error': message})
+
+    def flush() -> None:
+        valid, errors = schema.validate_many(task for _, task in chunk)
+        report['processed'] += len(chunk)
+        report['invalid'] += len(errors)
+        for error in errors:
+            record_error(chunk[error['index']][0], error['error'])
+        lines = [chunk[index][0] for index, _ in valid]
+        chunk.clear()
+        if not valid:
+            return
+        inserted_before = report['inserted']
+        try:
+            result = collection.insert_many([with_search_fields(task) for _, task in valid], ordered=False)
+            report['inserted'] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            report['inserted'] += e.details.get('nInserted', 0)
+            for error in e.details.get('writeErrors', []):
+                report['failed'] += 1
+                record_error(lines[error['index']], error.get('errmsg', 'Write failed'))
+        if on_insert is not None and report['inserted'] > inserted_before:
+            on_insert()
+
+    # The parse_* generators decode and split the upload lazily, so a bad byte
+    # or malformed CSV row only surfaces here
+    try:
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                flush()
+                yield dict(report, errors=list(report['errors']))
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFileError(e, report) from e
+    if chunk:
+        flush()
+    yield report
+
+
+def import_tasks(records: Iterable[Tuple[int, dict]], collection: Collection,
+                 schema: TaskSchema = TASK_SCHEMA, chunk_size: int = IMPORT_CHUNK_SIZE,
+                 on_insert: Optional[Callable[[], None]] = None) -> dict:
+    """Run iter_import to completion and return the final report."""
+    report = None
+    for report in iter_import(records, collection, schema, chunk_size, on_insert):
+        pass
+    return report
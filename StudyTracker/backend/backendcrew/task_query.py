@@ -0,0 +1,331 @@
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+from typing import Any, Iterator, Optional
+import os
+import re
+import threading
+
+from .task_schema import parse_task_date
+
+__all__ = [
+    'CollectionScanError',
+    'UnboundedScanError',
+    'TASK_DATES_DUAL_READ',
+    'DUE_WINDOWS',
+    'PROGRESS_OPERATORS',
+    'SEARCH_FIELDS',
+    'DERIVED_SEARCH_FIELDS',
+    'search_tokens',
+    'type_key',
+    'with_search_fields',
+    'backfill_search_fields',
+    'ensure_task_indexes',
+    'due_window',
+    'legacy_due_date_string',
+    'due_date_range',
+    'due_date_predicate',
+    'compile_task_filter',
+    'keyword_filter',
+    'assert_index_backed',
+]
+
+# dueDate is stored as a native BSON date. Until migrate_task_dates.py has converted
+# every legacy "...T23:59:00.000Z" string, date filters match both representations.
+TASK_DATES_DUAL_READ = os.getenv('TASK_DATES_DUAL_READ', 'true').lower() in ('1', 'true', 'yes')
+
+DUE_WINDOWS = ('today', 'tomorrow', 'this_week', 'next_week', 'next_7_days', 'this_month')
+
+# Accepted keys in a progress range, e.g. {'gte': 50} or {'min': 20, 'max': 80}
+PROGRESS_OPERATORS = {
+    'gt': '$gt', 'gte': '$gte', 'lt': '$lt', 'lte': '$lte', 'min': '$gte', 'max': '$lte',
+    '$gt': '$gt', '$gte': '$gte', '$lt': '$lt', '$lte': '$lte',
+}
+
+# Normalized copies of the searchable fields. title and type are left exactly as
+# entered because the frontend displays them (and compares type by name).
+SEARCH_FIELDS = {'title': 'title_tokens', 'description': 'description_tokens'}
+DERIVED_SEARCH_FIELDS = (*SEARCH_FIELDS.values(), 'type_key')
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+_indexes_lock = threading.Lock()
+_indexed_collections = set()
+
+
+class CollectionScanError(AssertionError):
+    """Raised by assert_index_backed when a query's winning plan contains a COLLSCAN."""
+
+
+class UnboundedScanError(AssertionError):
+    """Raised by assert_index_backed when a query examines more index keys than allowed."""
+
+
+def search_tokens(text: Any) -> list:
+    """Lowercase words of `text`, deduplicated in order: 'Math HW-2' -> ['math', 'hw', '2']."""
+    return list(dict.fromkeys(_TOKEN.findall(str(text).lower())))
+
+
+def type_key(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+def with_search_fields(task: dict) -> dict:
+    """Return a copy of a task (or a $set payload) with its normalized search fields filled in.
+
+    Only fields present in `task` are derived, so partial updates keep the
+    other fields' tokens as they are.
+    """
+    task = dict(task)
+    for field, tokens_field in SEARCH_FIELDS.items():
+        if field in task:
+            task[tokens_field] = search_tokens(task[field])
+    if 'type' in task:
+        task['type_key'] = type_key(task['type'])
+    return task
+
+
+def backfill_search_fields(collection: Collection, batch_size: int = 500) -> int:
+    """Fill in the search fields of tasks written without them; returns how many were updated."""
+    missing = {'$or': [{field: {'$exists': False}} for field in DERIVED_SEARCH_FIELDS]}
+    updated = 0
+    while True:
+        batch = list(collection.find(missing, {'title': 1, 'description': 1, 'type': 1}).limit(batch_size))
+        if not batch:
+            return updated
+        operations = []
+        for task in batch:
+            fields = {field: task.get(field) or '' for field in ('title', 'description', 'type')}
+            derived = with_search_fields(fields)
+            for field in fields:
+                del derived[field]
+            operations.append(UpdateOne({'_id': task['_id']}, {'$set': derived}))
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+
+
+def ensure_task_indexes(collection: Collection) -> None:
+    """Create the indexes task tool queries rely on, once per collection per process.
+
+    The indexes are maintained by the server, so tasks written directly by
+    the frontend's /api/db route are covered as well. Tasks stored before
+    the search fields existed are backfilled on the first call.
+    """
+    key = collection.full_name
+    if key in _indexed_collections:
+        return
+    with _indexes_lock:
+        if key in _indexed_collections:
+            return
+        # Multikey word indexes: a title/description search is an exact or
+        # anchored-prefix lookup on one word, i.e. a bounded range of keys
+        collection.create_index([('title_tokens', ASCENDING)], name='task_title_tokens')
+        collection.create_index([('description_tokens', ASCENDING)], name='task_description_tokens')
+        # Status filters: completed flag plus a dueDate range, sorted by dueDate
+        collection.create_index([('completed', ASCENDING), ('dueDate', ASCENDING)], name='task_completed_due')
+        collection.create_index([('dueDate', ASCENDING)], name='task_due')
+        # Equality on type/priority followed by the usual dueDate sort
+        collection.create_index([('type_key', ASCENDING), ('dueDate', ASCENDING)], name='task_type_key_due')
+        collection.create_index([('priority', ASCENDING), ('dueDate', ASCENDING)], name='task_priority_due')
+        collection.create_index([('progress', ASCENDING)], name='task_progress')
+        backfill_search_fields(collection)
+        _indexed_collections.add(key)
+
+
+def _token_predicate(text: Any) -> dict:
+    """Match every word of `text`, the last one as a prefix ('intro calc' finds 'Intro Calculus').
+
+    The prefix regex is anchored and case-sensitive against lowercase
+    tokens, so the index scans only the keys starting with it.
+    """
+    tokens = search_tokens(text)
+    if not tokens:
+        # Nothing searchable (e.g. only punctuation) matches nothing
+        return {'$in': []}
+    predicate = {'$regex': f'^{re.escape(tokens[-1])}'}
+    if len(tokens) > 1:
+        predicate['$all'] = tokens[:-1]
+    return predicate
+
+
+def due_window(name: str, current_time: datetime) -> tuple[datetime, datetime]:
+    """Return the [start, end) dueDate range for a named window such as 'this_week'.
+
+    Weeks start on Monday; 'next_7_days' starts now rather than at midnight.
+    """
+    name = name.strip().lower().replace(' ', '_')
+    today = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    if name == 'today':
+        return today, today + timedelta(days=1)
+    if name == 'tomorrow':
+        return today + timedelta(days=1), today + timedelta(days=2)
+    if name == 'this_week':
+        monday = today - timedelta(days=today.weekday())
+        return monday, monday + timedelta(days=7)
+    if name == 'next_week':
+        monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        return monday, monday + timedelta(days=7)
+    if name == 'next_7_days':
+        return current_time, current_time + timedelta(days=7)
+    if name == 'this_month':
+        first = today.replace(day=1)
+        return first, (first + timedelta(days=32)).replace(day=1)
+    raise ValueError(f"Unknown due window '{name}'. Must be one of: {', '.join(DUE_WINDOWS)}")
+
+
+def legacy_due_date_string(when: datetime) -> str:
+    """Render a date the way the frontend stores it, e.g. '2024-05-01T23:59:00.000Z'."""
+    return when.strftime('%Y-%m-%dT%H:%M:%S.') + f"{when.microsecond // 1000:03d}Z"
+
+
+def due_date_range(bounds: dict) -> dict:
+    """Filter on dueDate bounds that also matches legacy string values while dual-read is on.
+
+    The legacy strings are fixed-width ISO timestamps, so comparing them as
+    strings orders them the same way as the dates they encode.
+    """
+    if not TASK_DATES_DUAL_READ:
+        return {'dueDate': bounds}
+    legacy = {op: legacy_due_date_string(when) for op, when in bounds.items()}
+    return {'$or': [{'dueDate': bounds}, {'dueDate': legacy}]}
+
+
+def due_date_predicate(operator: str, when: datetime) -> dict:
+    return due_date_range({operator: when})
+
+
+def _merge_predicate(query: dict, predicate: dict) -> dict:
+    """Add predicate to query, moving any clause whose key is already taken into $and."""
+    for key, value in predicate.items():
+        if key not in query:
+            query[key] = value
+        elif key == '$and':
+            query['$and'].extend(value)
+        else:
+            query.setdefault('$and', []).append({key: value})
+    return query
+
+
+def _parse_date(value: Any) -> datetime:
+    """Read due_before/due_after exactly as validate_search_params accepted them (date-only is 23:59)."""
+    is_valid, result = parse_task_date(value if isinstance(value, datetime) else str(value))
+    if not is_valid:
+        raise ValueError(result)
+    return result
+
+
+def _progress_predicate(search_params: dict) -> Optional[dict]:
+    progress = search_params.get('progress')
+    bounds = {}
+    if isinstance(progress, dict):
+        for key, value in progress.items():
+            bounds[PROGRESS_OPERATORS[key]] = int(value)
+    elif progress is not None:
+        bounds['$eq'] = int(progress)
+    if search_params.get('progress_min') is not None:
+        bounds['$gte'] = int(search_params['progress_min'])
+    if search_params.get('progress_max') is not None:
+        bounds['$lte'] = int(search_params['progress_max'])
+    if not bounds:
+        return None
+    return {'progress': bounds['$eq'] if list(bounds) == ['$eq'] else bounds}
+
+
+def compile_task_filter(search_params: dict, current_time: Optional[datetime] = None) -> dict:
+    """Turn tool search params into a Mongo filter that an index can serve.
+
+    This is the one place search params become a query, so the query,
+    update, delete and export paths all filter in the database the same way:
+
+    - title/description: case-insensitive word match, the last word as a
+      prefix ('Math' finds 'Mathematics'), via the *_tokens fields
+    - type: case-insensitive exact match on type_key; priority: exact value or list
+    - progress: exact value, a range dict, or progress_min/progress_max
+    - status: completed / pending / overdue relative to current_time
+    - due: a named window from DUE_WINDOWS; due_before/due_after: dates
+
+    Params are assumed to have passed validate_search_params.
+    """
+    current_time = current_time or datetime.now()
+    query = {}
+    for field, tokens_field in SEARCH_FIELDS.items():
+        if field in search_params:
+            query[tokens_field] = _token_predicate(search_params[field])
+
+    if search_params.get('type'):
+        query['type_key'] = type_key(search_params['type'])
+
+    priority = search_params.get('priority')
+    if isinstance(priority, (list, tuple)):
+        query['priority'] = {'$in': list(priority)}
+    elif priority:
+        query['priority'] = priority
+
+    progress = _progress_predicate(search_params)
+    if progress:
+        query.update(progress)
+
+    if 'status' in search_params:
+        status = search_params['status'].lower()
+        if status == 'completed':
+            query['completed'] = True
+        elif status == 'pending':
+            query['completed'] = False
+            _merge_predicate(query, due_date_predicate('$gt', current_time))
+        elif status == 'overdue':
+            query['completed'] = False
+            _merge_predicate(query, due_date_predicate('$lt', current_time))
+
+    bounds = {}
+    if search_params.get('due'):
+        bounds['$gte'], bounds['$lt'] = due_window(search_params['due'], current_time)
+    if search_params.get('due_after'):
+        bounds['$gte'] = max(bounds.get('$gte', datetime.min), _parse_date(search_params['due_after']))
+    if search_params.get('due_before'):
+        bounds['$lt'] = min(bounds.get('$lt', datetime.max), _parse_date(search_params['due_before']))
+    if bounds:
+        _merge_predicate(query, due_date_range(bounds))
+
+    return query
+
+
+def keyword_filter(keyword: str) -> dict:
+    """Filter for a free-text keyword matched against title or description.
+
+    Both $or branches are indexed, so the plan is an OR of two bounded index scans.
+    """
+    predicate = _token_predicate(keyword)
+    return {'$or': [{field: predicate} for field in SEARCH_FIELDS.values()]}
+
+
+def _plan_stages(plan: dict) -> Iterator[str]:
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan['stage']
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _plan_stages(child)
+
+
+def assert_index_backed(collection: Collection, query: dict, sort: Optional[list] = None,
+                        max_keys_examined: Optional[int] = None) -> dict:
+    """Explain `query` and raise if its winning plan scans the collection.
+
+    An IXSCAN over every key is no better than a COLLSCAN, so with
+    max_keys_examined set the executed plan must also stay within that
+    many index keys (UnboundedScanError otherwise).
+    """
+    cursor = collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    explanation = cursor.explain()
+    winning_plan = explanation.get('queryPlanner', {}).get('winningPlan', {})
+    if 'COLLSCAN' in set(_plan_stages(winning_plan)):
+        raise CollectionScanError(f"Query falls back to COLLSCAN: {query}")
+    if max_keys_examined is not None:
+        examined = explanation.get('executionStats', {}).get('totalKeysExamined', 0)
+        if examined > max_keys_examined:
+            raise UnboundedScanError(f"Query examined {examined} index keys (limit {max_keys_examined}): {query}")
+    return explanation
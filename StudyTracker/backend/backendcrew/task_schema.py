@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+import re
+
+__all__ = ['DATE_FORMAT_ERROR', 'parse_task_date', 'TaskSchema', 'TASK_SCHEMA']
+
+DATE_FORMAT_ERROR = "Invalid date format. Use 'YYYY-MM-DDTHH:MM:SS', 'YYYY-MM-DDTHH:MM', or 'YYYY-MM-DD'"
+
+# One pattern covers the three accepted formats; strptime also allowed 1-digit parts
+_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:T(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?')
+
+_PRIORITIES = ('High', 'Medium', 'Low')
+_BOOLEAN_STRINGS = {'true': True, 'false': False}
+
+
+def parse_task_date(value: Any) -> Tuple[bool, Any]:
+    """Parse a task date without exceptions on the common path.
+
+    Returns (True, datetime) or (False, DATE_FORMAT_ERROR). Date-only values
+    are due at 23:59.
+    """
+    if isinstance(value, datetime):
+        return True, value
+    if not isinstance(value, str):
+        return False, DATE_FORMAT_ERROR
+    match = _DATE.fullmatch(value)
+    if not match:
+        return False, DATE_FORMAT_ERROR
+    year, month, day, hour, minute, second = match.groups()
+    try:
+        if hour is None:
+            return True, datetime(int(year), int(month), int(day), 23, 59)
+        return True, datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0))
+    except ValueError:
+        # Well-formed but impossible, e.g. 2024-02-30
+        return False, DATE_FORMAT_ERROR
+
+
+# Field checks return (error, value); error is None when the value is accepted
+
+def _check_string(field: str) -> Callable[[Any], Tuple[Optional[str], Any]]:
+    message = f"Invalid {field}: must be non-empty string"
+
+    def check(value):
+        if not isinstance(value, str) or not value.strip():
+            return message, None
+        return None, value
+    return check
+
+
+def _check_due_date(value):
+    is_valid, result = parse_task_date(value)
+    return (None, result) if is_valid else (result, None)
+
+
+def _check_priority(value):
+    if not isinstance(value, str) or not value.strip():
+        return "Invalid priority: must be non-empty string", None
+    if value not in _PRIORITIES:
+        return f"Invalid priority. Must be one of: {', '.join(_PRIORITIES)}", None
+    return None, value
+
+
+def _check_progress(value):
+    if isinstance(value, bool):
+        return "Progress must be an integer", None
+    try:
+        progress = int(value)
+    except (TypeError, ValueError):
+        return "Progress must be an integer", None
+    if not 0 <= progress <= 100:
+        return "Progress must be between 0 and 100", None
+    return None, progress
+
+
+def _check_completed(value):
+    if isinstance(value, bool):
+        return None, value
+    if isinstance(value, str) and value.strip().lower() in _BOOLEAN_STRINGS:
+        return None, _BOOLEAN_STRINGS[value.strip().lower()]
+    return "Completed must be a boolean", None
+
+
+class TaskSchema:
+    """Task payload validator, compiled once into a flat list of field checks.
+
+    validate() replaces the old validate_task_data/validate_update_task_data
+    pair (partial=True skips the required-field check) and validate_many()
+    checks a batch with one error per failing record.
+    """
+
+    def __init__(self, required: Iterable[str], checks: List[Tuple[str, Callable]]):
+        self.required = tuple(required)
+        self._checks = tuple(checks)
+
+    def validate(self, data: Any, partial: bool = False) -> Tuple[bool, str, dict]:
+        """Return (is_valid, message, cleaned_copy); the input dict is left untouched."""
+        if not isinstance(data, dict):
+            return False, "Task data must be a dictionary", {}
+        if not partial:
+            missing = [field for field in self.required if field not in data]
+            if missing:
+                return False, f"Missing required fields: {', '.join(missing)}", {}
+
+        cleaned = dict(data)
+        for field, check in self._checks:
+            if field in cleaned:
+                error, value = check(cleaned[field])
+                if error is not None:
+                    return False, error, {}
+                cleaned[field] = value
+        return True, "Valid task data", cleaned
+
+    def validate_many(self, records: Iterable[Any], partial: bool = False) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+        """Validate a batch; returns (valid, errors).
+
+        valid holds (index, cleaned_copy) pairs and errors {'index', 'error'}
+        dicts, both indexed by position in `records`.
+        """
+        valid, errors = [], []
+        validate = self.validate
+        for index, record in enumerate(records):
+            is_valid, message, cleaned = validate(record, partial)
+            if is_valid:
+                valid.append((index, cleaned))
+            else:
+                errors.append({'index': index, 'error': message})
+        return valid, errors
+
+
+TASK_SCHEMA = TaskSchema(
+    required=('title', 'description', 'type', 'dueDate'),
+    checks=[
+        ('title', _check_string('title')),
+        ('description', _check_string('description')),
+        ('type', _check_string('type')),
+        ('priority', _check_priority),
+        ('dueDate', _check_due_date),
+        ('progress', _check_progress),
+        ('completed', _check_completed),
+    ],
+)
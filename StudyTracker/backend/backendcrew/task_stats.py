@@ -0,0 +1,167 @@
+from datetime import datetime
+from pymongo.collection import Collection
+from typing import List, Optional, Tuple
+
+__all__ = [
+    'DEFAULT_TASK_LIMIT',
+    'MAX_TASK_LIMIT',
+    'COMPACT_TASK_FIELDS',
+    'PAGE_OPTION_KEYS',
+    'DUE_DATE_EXPRESSION',
+    'validate_page_options',
+    'task_stats_pipeline',
+    'query_tasks_with_stats',
+]
+
+# Tool output is pasted into the agent's prompt, so pages are small by default
+DEFAULT_TASK_LIMIT = 20
+MAX_TASK_LIMIT = 100
+
+TASK_FIELDS = ('title', 'description', 'type', 'dueDate', 'priority', 'progress', 'completed', 'status')
+COMPACT_TASK_FIELDS = ('title', 'type', 'dueDate', 'priority', 'progress', 'status')
+SORT_FIELDS = ('dueDate', 'priority')
+PAGE_OPTION_KEYS = ('limit', 'cursor', 'fields', 'sort_by', 'order')
+
+# dueDate may still be a legacy ISO string during the native-date migration. Sort
+# on this instead of the raw field: BSON orders by type first, so strings and
+# dates would come out as two separately sorted runs.
+DUE_DATE_EXPRESSION = {'$cond': [
+    {'$eq': [{'$type': '$dueDate'}, 'string']},
+    {'$dateFromString': {'dateString': '$dueDate', 'onError': None, 'onNull': None}},
+    '$dueDate',
+]}
+
+# Sorting the priority strings alphabetically would put Low before Medium
+_PRIORITY_RANK = {'$switch': {
+    'branches': [
+        {'case': {'$eq': ['$priority', 'High']}, 'then': 0},
+        {'case': {'$eq': ['$priority', 'Medium']}, 'then': 1},
+        {'case': {'$eq': ['$priority', 'Low']}, 'then': 2},
+    ],
+    'default': 3,
+}}
+
+
+def validate_page_options(options: dict) -> tuple[bool, str, dict]:
+    """Validate limit/cursor/fields/sort_by/order and normalize them for query_tasks_with_stats.
+
+    The cursor is the opaque `next_cursor` string from a previous page.
+    `fields` is a list of task fields, or 'all'; by default a compact set
+    without descriptions is returned.
+    """
+    limit = options.get('limit')
+    if limit is None:
+        limit = DEFAULT_TASK_LIMIT
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return False, "Limit must be an integer", {}
+    if not 1 <= limit <= MAX_TASK_LIMIT:
+        return False, f"Limit must be between 1 and {MAX_TASK_LIMIT}", {}
+
+    cursor = options.get('cursor')
+    try:
+        skip = int(cursor) if cursor not in (None, '') else 0
+    except (TypeError, ValueError):
+        return False, "Invalid cursor; pass the next_cursor value from a previous result", {}
+    if skip < 0:
+        return False, "Invalid cursor; pass the next_cursor value from a previous result", {}
+
+    fields = options.get('fields')
+    if fields in (None, '', []):
+        fields = COMPACT_TASK_FIELDS
+    elif fields == 'all':
+        fields = TASK_FIELDS
+    else:
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in TASK_FIELDS]
+        if unknown:
+            return False, f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(TASK_FIELDS)}", {}
+        fields = tuple(fields)
+
+    sort_by = options.get('sort_by') or 'dueDate'
+    if sort_by not in SORT_FIELDS:
+        return False, f"Invalid sort_by. Must be one of: {', '.join(SORT_FIELDS)}", {}
+    order = (options.get('order') or 'asc').lower()
+    if order not in ('asc', 'desc'):
+        return False, "Invalid order. Must be 'asc' or 'desc'", {}
+
+    return True, "Valid page options", {
+        'limit': limit, 'skip': skip, 'fields': fields, 'sort_by': sort_by, 'descending': order == 'desc',
+    }
+
+
+def _status_expression(current_time: datetime) -> dict:
+    return {'$switch': {
+        'branches': [
+            {'case': {'$eq': ['$completed', True]}, 'then': 'completed'},
+            {'case': {'$and': [{'$ne': ['$_due', None]}, {'$lt': ['$_due', current_time]}]}, 'then': 'overdue'},
+        ],
+        'default': 'pending',
+    }}
+
+
+def task_stats_pipeline(match: dict, current_time: datetime, limit: int = DEFAULT_TASK_LIMIT, skip: int = 0,
+                        fields: Tuple[str, ...] = COMPACT_TASK_FIELDS, sort_by: str = 'dueDate',
+                        descending: bool = False) -> list:
+    """Aggregation that returns status/type/priority counts and one page of tasks together.
+
+    The $match runs first so it can use the taskEntries indexes; tasks are
+    then sorted on the normalized due date (_due), so legacy string and
+    native dates interleave correctly. The $facet branches share that single
+    pass over the matching tasks. The page fetches limit + 1 tasks to detect
+    a next page.
+    """
+    direction = -1 if descending else 1
+    pipeline = [{'$match': match}, {'$addFields': {'_due': DUE_DATE_EXPRESSION}}]
+    if sort_by == 'priority':
+        pipeline.append({'$addFields': {'_priority_rank': _PRIORITY_RANK}})
+        pipeline.append({'$sort': {'_priority_rank': direction, '_due': 1, '_id': 1}})
+    else:
+        pipeline.append({'$sort': {'_due': direction, '_id': 1}})
+    pipeline += [
+        {'$addFields': {'status': _status_expression(current_time)}},
+        {'$facet': {
+            'by_status': [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}],
+            'by_type': [{'$group': {'_id': '$type', 'count': {'$sum': 1}}}],
+            'by_priority': [{'$group': {'_id': '$priority', 'count': {'$sum': 1}}}],
+            'tasks': [{'$skip': skip}, {'$limit': limit + 1}, {'$project': {field: 1 for field in fields}}],
+        }},
+    ]
+    return pipeline
+
+
+def query_tasks_with_stats(collection: Collection, match: dict, current_time: Optional[datetime] = None,
+                           limit: int = DEFAULT_TASK_LIMIT, skip: int = 0,
+                           fields: Tuple[str, ...] = COMPACT_TASK_FIELDS, sort_by: str = 'dueDate',
+                           descending: bool = False) -> Tuple[dict, List[dict], Optional[str]]:
+    """Run the stats pipeline and return (counts, page_of_tasks, next_cursor).
+
+    counts has 'total', 'completed', 'pending', 'overdue', 'by_type' and
+    'by_priority' over every matching task; memory on this side grows with
+    `limit`, not with the number of matching tasks. next_cursor is None on
+    the last page.
+    """
+    current_time = current_time or datetime.now()
+    pipeline = task_stats_pipeline(match, current_time, limit, skip, fields, sort_by, descending)
+    # The $sort runs over every matching task before $facet pages it, so a
+    # large task list must be allowed to spill past the 100MB in-memory limit
+    result = next(collection.aggregate(pipeline, allowDiskUse=True), None) or {}
+
+    by_status = {row['_id']: row['count'] for row in result.get('by_status', [])}
+    counts = {
+        'total': sum(by_status.values()),
+        'completed': by_status.get('completed', 0),
+        'pending': by_status.get('pending', 0),
+        'overdue': by_status.get('overdue', 0),
+        'by_type': {row['_id'] or 'Unspecified': row['count'] for row in result.get('by_type', [])},
+        'by_priority': {row['_id'] or 'Unspecified': row['count'] for row in result.get('by_priority', [])},
+    }
+
+    tasks = result.get('tasks', [])
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = str(skip + limit)
+    return counts, tasks, next_cursor
@@ -1,5 +1,6 @@
 from crewai_tools import BaseTool
-from pymongo import MongoClient
+from pymongo import InsertOne, UpdateMany, DeleteMany
+from pymongo.errors import BulkWriteError
 from typing import List, Dict, Optional, Any
 from bson.objectid import ObjectId
 from datetime import datetime
@@ -8,155 +9,269 @@ import re
 from dotenv import load_dotenv
 import os
 
-__all__ = ['CustomCalenderTool', 'AddTaskTool', 'QueryTasksTool', 'UpdateTaskTool', 'DeleteTaskTool', 'GetAllTasksTool']
+# Shared lazily-created client; see database.py
+from database import task_repository
+from tracing import traced
+
+from .task_query import (
+    ensure_task_indexes, compile_task_filter, keyword_filter, due_window, with_search_fields,
+    DUE_WINDOWS, PROGRESS_OPERATORS, legacy_due_date_string,
+)
+from .task_cache import TaskReadCache
+from .task_schema import TASK_SCHEMA, parse_task_date
+from .task_stats import query_tasks_with_stats, validate_page_options, PAGE_OPTION_KEYS, DUE_DATE_EXPRESSION
+
+__all__ = ['CustomCalenderTool', 'AddTaskTool', 'QueryTasksTool', 'UpdateTaskTool', 'DeleteTaskTool', 'GetAllTasksTool', 'BulkTaskTool']
 
 load_dotenv()
-# MongoDB connection
-client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/studytracker'))
-db = client.studytracker
-tasks_collection = db.taskEntries
 
-def validate_date_format(date_str: str) -> tuple[bool, str]:
-    """Validate and normalize date string format."""
+# Read cache shared by the query tools; writes through the tools invalidate it.
+# TASK_CACHE_TTL=0 disables it.
+task_cache = TaskReadCache(
+    ttl=float(os.getenv('TASK_CACHE_TTL', '60')),
+    max_size=int(os.getenv('TASK_CACHE_SIZE', '256')),
+)
+
+def invalidate_task_cache() -> None:
+    """Call after any write to taskEntries made outside the task tools' own write paths."""
+    task_cache.invalidate()
+
+def _cache_time() -> datetime:
+    # Status filters compare against "now"; rounding to the minute keeps the
+    # compiled filter, and so the cache key, stable between calls
+    return datetime.now().replace(second=0, microsecond=0)
+
+def parse_due_date(value: Any) -> Optional[datetime]:
+    """Read a dueDate that may be a native datetime or a legacy ISO string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    return None
+
+def format_due_date(value: Any) -> Any:
+    """Render a dueDate for tool output in the same string form the agents have always seen."""
+    due_date = parse_due_date(value)
+    return legacy_due_date_string(due_date) if due_date else value
+
+def build_search_query(search_params: dict, current_time: Optional[datetime] = None) -> dict:
+    """Build the Mongo filter shared by the query, update and delete tools."""
+    return compile_task_filter(search_params, current_time)
+
+# Most tasks a dry run lists before summarising the rest as a count
+DRY_RUN_PREVIEW_LIMIT = 10
+
+def preview_matches(query: dict, action: str) -> str:
+    """Describe the tasks a write would touch, by id and title, without changing anything."""
+    total = task_repository.collection.count_documents(query)
+    if not total:
+        return "No matching tasks found."
+    # Ordered by the normalized due date so legacy string and native dates interleave
+    preview = task_repository.collection.aggregate([
+        {'$match': query},
+        {'$addFields': {'_due': DUE_DATE_EXPRESSION}},
+        {'$sort': {'_due': 1, '_id': 1}},
+        {'$limit': DRY_RUN_PREVIEW_LIMIT},
+        {'$project': {'title': 1}},
+    ])
+    lines = [f"- {task['_id']}: {task.get('title', '(untitled)')}" for task in preview]
+    if total > len(lines):
+        lines.append(f"- ...and {total - len(lines)} more")
+    return f"Dry run: {total} task(s) would be {action}:\n" + "\n".join(lines)
+
+def task_status(task: dict, current_time: datetime) -> str:
+    if task.get('completed', False):
+        return 'completed'
+    due_date = parse_due_date(task.get('dueDate'))
+    return 'overdue' if due_date and due_date < current_time else 'pending'
+
+def validate_date_format(date_str: str) -> tuple[bool, Any]:
+    """Validate a date string and return it as a datetime for storage."""
+    return parse_task_date(date_str)
+
+def _validate_progress_value(value: Any) -> tuple[bool, str]:
     try:
-        # First try parsing with seconds
-        datetime.strptime(date_str, '%Y-%m-%dT%H:%M:%S')
-        return True, f"{date_str}.000Z"
-    except ValueError:
-        try:
-            # Try parsing without seconds
-            parsed_date = datetime.strptime(date_str, '%Y-%m-%dT%H:%M')
-            return True, f"{parsed_date.strftime('%Y-%m-%dT%H:%M:00')}.000Z"
-        except ValueError:
-            try:
-                # Try parsing just date
-                parsed_date = datetime.strptime(date_str, '%Y-%m-%d')
-                return True, f"{parsed_date.strftime('%Y-%m-%dT23:59:00')}.000Z"
-            except ValueError:
-                return False, "Invalid date format. Use 'YYYY-MM-DDTHH:MM:SS', 'YYYY-MM-DDTHH:MM', or 'YYYY-MM-DD'"
+        progress = int(value)
+    except (TypeError, ValueError):
+        return False, "Progress must be an integer"
+    if not 0 <= progress <= 100:
+        return False, "Progress must be between 0 and 100"
+    return True, "Valid progress"
 
 def validate_search_params(params: dict) -> tuple[bool, str]:
     """Validate search parameters."""
     if not isinstance(params, dict):
         return False, "Search parameters must be a dictionary"
     
-    valid_fields = {'title', 'description', 'status', 'type', 'priority','progress'}
+    valid_fields = {'title', 'description', 'status', 'type', 'priority', 'progress',
+                    'progress_min', 'progress_max', 'due', 'due_before', 'due_after'}
     if not any(field in valid_fields for field in params.keys()):
-        return False, f"At least one valid search field required: {', '.join(valid_fields)}"
+        return False, f"At least one valid search field required: {', '.join(sorted(valid_fields))}"
     
     if 'status' in params:
         valid_statuses = {'completed', 'pending', 'overdue'}
-        if params['status'].lower() not in valid_statuses:
+        if str(params['status']).lower() not in valid_statuses:
             return False, f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
-            
-    return True, "Valid parameters"
 
-def validate_task_data(data: dict) -> tuple[bool, str, dict]:
-    """Validate task data for creation/update."""
-    if not isinstance(data, dict):
-        try:
-            eval_input = eval(data)
-            if isinstance(eval_input, bool):
-                data = eval_input
-        except:
-            pass
-        return False, "Task data must be a dictionary", {}
-
-    required_fields = {'title', 'description', 'type', 'dueDate'}
-    missing = [f for f in required_fields if f not in data]
-    if missing:
-        return False, f"Missing required fields: {', '.join(missing)}", {}
-
-    # Validate string fields
-    string_fields = {'title', 'description', 'type', 'priority'}
-    for field in string_fields & data.keys():
-        if not isinstance(data[field], str) or not data[field].strip():
-            return False, f"Invalid {field}: must be non-empty string", {}
-
-    # Validate dueDate
-    if 'dueDate' in data:
-        is_valid, result = validate_date_format(data['dueDate'])
-        if not is_valid:
-            return False, result, {}
-        data['dueDate'] = result
+    if 'type' in params:
+        if not isinstance(params['type'], str) or not params['type'].strip():
+            return False, "Invalid type: must be non-empty string"
 
-    # Validate priority if present
-    if 'priority' in data:
+    if 'priority' in params:
         valid_priorities = {'High', 'Medium', 'Low'}
-        if data['priority'] not in valid_priorities:
-            return False, f"Invalid priority. Must be one of: {', '.join(valid_priorities)}", {}
+        priorities = params['priority'] if isinstance(params['priority'], (list, tuple)) else [params['priority']]
+        if not priorities or any(p not in valid_priorities for p in priorities):
+            return False, f"Invalid priority. Must be one of: {', '.join(valid_priorities)}"
+
+    if isinstance(params.get('progress'), dict):
+        unknown = [op for op in params['progress'] if op not in PROGRESS_OPERATORS]
+        if unknown or not params['progress']:
+            return False, "Progress range keys must be among: gt, gte, lt, lte, min, max"
+        progress_values = list(params['progress'].values())
+    else:
+        progress_values = [params['progress']] if 'progress' in params else []
+    progress_values += [params[key] for key in ('progress_min', 'progress_max') if key in params]
+    for value in progress_values:
+        is_valid, message = _validate_progress_value(value)
+        if not is_valid:
+            return False, message
 
-    # Validate progress if present
-    if 'progress' in data:
+    if 'due' in params:
         try:
-            progress = int(data['progress'])
-            if not 0 <= progress <= 100:
-                return False, "Progress must be between 0 and 100", {}
-            data['progress'] = progress
-        except ValueError:
-            return False, "Progress must be an integer", {}
+            due_window(str(params['due']), datetime.now())
+        except ValueError as e:
+            return False, str(e)
 
-    # Validate completed if present
-    if 'completed' in data:
-        if not isinstance(data['completed'], bool):
-            try:
-                eval_status = eval(data['completed'].capitalize())
-                if isinstance(eval_status, bool):
-                    data['completed'] = eval_status
-            except:
-                pass
-
-            return False, "Completed must be a boolean", {}
+    for key in ('due_before', 'due_after'):
+        if key in params and not isinstance(params[key], datetime):
+            is_valid, result = validate_date_format(str(params[key]))
+            if not is_valid:
+                return False, f"Invalid {key}: {result}"
+            
+    return True, "Valid parameters"
 
-    return True, "Valid task data", data
+def validate_task_data(data: dict) -> tuple[bool, str, dict]:
+    """Validate task data for creation; valid data comes back with its search fields."""
+    is_valid, message, cleaned = TASK_SCHEMA.validate(data)
+    return is_valid, message, with_search_fields(cleaned) if is_valid else cleaned
 
 
 def validate_update_task_data(data: dict) -> tuple[bool, str, dict]:
-    """Validate task data for update."""
-    if not isinstance(data, dict):
-        try:
-            eval_input = eval(data)
-            if isinstance(eval_input, bool):
-                data = eval_input
-        except:
-            pass
-        return False, "Task data must be a dictionary", {}
-
-    # Validate string fields
-    string_fields = {'title', 'description', 'type', 'priority'}
-    for field in string_fields & data.keys():
-        if not isinstance(data[field], str) or not data[field].strip():
-            return False, f"Invalid {field}: must be non-empty string", {}
-
-    # Validate dueDate if present
-    if 'dueDate' in data:
-        is_valid, result = validate_date_format(data['dueDate'])
+    """Validate task data for update; the search fields of changed fields are refreshed too."""
+    is_valid, message, cleaned = TASK_SCHEMA.validate(data, partial=True)
+    return is_valid, message, with_search_fields(cleaned) if is_valid else cleaned
+
+
+# Upper bound on operations accepted by one bulk call
+BULK_MAX_OPERATIONS = 1000
+
+def _validate_bulk_adds(operations: List[dict]) -> Dict[int, tuple]:
+    """Validate the task of every add operation in one batch, keyed by operation index."""
+    adds = [index for index, operation in enumerate(operations)
+            if isinstance(operation, dict) and str(operation.get('op', '')).lower() == 'add']
+    valid, errors = TASK_SCHEMA.validate_many(operations[index].get('task') for index in adds)
+    checked = {adds[position]: (True, "Valid task data", with_search_fields(task)) for position, task in valid}
+    checked.update({adds[error['index']]: (False, error['error'], {}) for error in errors})
+    return checked
+
+def _compile_bulk_operation(operation: dict, checked_task: Optional[tuple] = None) -> tuple[bool, str, Any, Optional[ObjectId]]:
+    """Validate one bulk operation and turn it into a pymongo write model (plus the new id for adds).
+
+    checked_task is an add's (is_valid, message, task) from _validate_bulk_adds.
+    """
+    if not isinstance(operation, dict):
+        return False, "Operation must be a dictionary", None, None
+    op = str(operation.get('op', '')).lower()
+    if op == 'add':
+        is_valid, message, task = checked_task or validate_task_data(operation.get('task'))
         if not is_valid:
-            return False, result, {}
-        data['dueDate'] = result
-
-    # Validate priority if present
-    if 'priority' in data:
-        valid_priorities = {'High', 'Medium', 'Low'}
-        if data['priority'] not in valid_priorities:
-            return False, f"Invalid priority. Must be one of: {', '.join(valid_priorities)}", {}
-
-    # Validate progress if present
-    if 'progress' in data:
-        try:
-            progress = int(data['progress'])
-            if not 0 <= progress <= 100:
-                return False, "Progress must be between 0 and 100", {}
-            data['progress'] = progress
-        except ValueError:
-            return False, "Progress must be an integer", {}
-
-    # Validate completed if present
-    if 'completed' in data:
-        if not isinstance(data['completed'], bool):
-            return False, "Completed must be a boolean", {}
-
-    return True, "Valid task data", data
+            return False, message, None, None
+        # Assign the id up front so each insert can be reported individually
+        task['_id'] = ObjectId()
+        return True, "Valid operation", InsertOne(task), task['_id']
+    if op in ('update', 'delete'):
+        is_valid, message = validate_search_params(operation.get('search_params'))
+        if not is_valid:
+            return False, f"Error in search parameters: {message}", None, None
+        query = build_search_query(operation['search_params'])
+        if op == 'delete':
+            return True, "Valid operation", DeleteMany(query), None
+        is_valid, message, updates = validate_update_task_data(operation.get('updates'))
+        if not is_valid or not updates:
+            return False, f"Error in update data: {message if not is_valid else 'no fields to update'}", None, None
+        return True, "Valid operation", UpdateMany(query, {'$set': updates}), None
+    return False, "Invalid op. Must be one of: add, update, delete", None, None
+
+def run_bulk_operations(operations: List[dict], ordered: bool = True) -> dict:
+    """Validate every operation, then send the valid ones in a single bulk_write.
+
+    With ordered=True a batch containing any invalid operation is rejected
+    before anything is written, and a write error stops the remaining
+    operations. With ordered=False invalid operations are skipped and the
+    rest are applied. Each operation gets a result entry in input order.
+    """
+    if not isinstance(operations, list) or not operations:
+        return {"error": "Operations must be a non-empty list"}
+    if len(operations) > BULK_MAX_OPERATIONS:
+        return {"error": f"At most {BULK_MAX_OPERATIONS} operations per call"}
+
+    results, requests, positions, inserted_ids = [], [], [], {}
+    checked_tasks = _validate_bulk_adds(operations)
+    for index, operation in enumerate(operations):
+        is_valid, message, request, task_id = _compile_bulk_operation(operation, checked_tasks.get(index))
+        op = operation.get('op') if isinstance(operation, dict) else None
+        results.append({'index': index, 'op': op, 'status': 'pending' if is_valid else 'invalid'})
+        if is_valid:
+            if task_id is not None:
+                inserted_ids[len(requests)] = str(task_id)
+            requests.append(request)
+            positions.append(index)
+        else:
+            results[index]['error'] = message
+
+    invalid = len(operations) - len(requests)
+    summary = {'ordered': ordered, 'operations': len(operations), 'invalid': invalid,
+               'inserted': 0, 'matched': 0, 'modified': 0, 'deleted': 0, 'failed': 0}
+    if ordered and invalid:
+        for result in results:
+            if result['status'] == 'pending':
+                result['status'] = 'not_run'
+        return {**summary, 'error': "Batch rejected: fix the invalid operations or send ordered=False", 'results': results}
+    if not requests:
+        return {**summary, 'results': results}
+
+    ensure_task_indexes(task_repository.collection)
+    failed = {}
+    try:
+        write = task_repository.collection.bulk_write(requests, ordered=ordered)
+        details = write.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        failed = {error['index']: error.get('errmsg', 'Write failed') for error in details.get('writeErrors', [])}
+
+    stopped = ordered and failed
+    first_failure = min(failed) if failed else None
+    for request_index, index in enumerate(positions):
+        result = results[index]
+        if request_index in failed:
+            result['status'], result['error'] = 'failed', failed[request_index]
+        elif stopped and request_index > first_failure:
+            result['status'] = 'not_run'
+        else:
+            result['status'] = 'ok'
+            if request_index in inserted_ids:
+                result['id'] = inserted_ids[request_index]
+
+    if details.get('nInserted') or details.get('nModified') or details.get('nRemoved'):
+        task_cache.invalidate()
+    summary.update({
+        'inserted': details.get('nInserted', 0),
+        'matched': details.get('nMatched', 0),
+        'modified': details.get('nModified', 0),
+        'deleted': details.get('nRemoved', 0),
+        'failed': len(failed),
+    })
+    return {**summary, 'results': results}
 
 
 class CustomCalenderTool(BaseTool):
@@ -170,10 +285,10 @@ class CustomCalenderTool(BaseTool):
         "This can help in adjusting your study plans accordingly and staying informed about important dates."
     )
 
+    @traced('tool.calendar')
     def _run(self, argument: str) -> str:
         # Stub Implementation
         # raise AssertionError("This function is called!")
-        print("This function is called")
         return f"{argument} : 'Working Day' "
 
 class AddTaskTool(BaseTool):
@@ -195,90 +310,97 @@ class AddTaskTool(BaseTool):
         "Providing accurate and complete information ensures the task is properly tracked and managed within the system."
     )
 
+    @traced('tool.add_task')
     def _run(self, task_data: dict | List[dict]) -> str:
-        # try:
+        try:
             if isinstance(task_data, list):
+                if len(task_data) > 1:
+                    result = run_bulk_operations([{'op': 'add', 'task': task} for task in task_data], ordered=False)
+                    if 'results' not in result:
+                        return f"Error: {result['error']}"
+                    errors = [f"task {r['index']}: {r.get('error', r['status'])}" for r in result['results'] if r['status'] != 'ok']
+                    message = f"Added {result['inserted']} of {len(task_data)} task(s)."
+                    return message + (f" Errors: {'; '.join(errors)}" if errors else "")
                 task_data = task_data[0]
             is_valid, message, validated_data = validate_task_data(task_data)
             if not is_valid:
                 return f"Error: {message}"
 
-            result = tasks_collection.insert_one(validated_data)
+            result = task_repository.collection.insert_one(validated_data)
+            task_cache.invalidate()
             return f"Task added successfully with ID: {result.inserted_id}"
-        # except Exception as e:
-            # return f"Error adding task: {str(e)}"
+        except Exception as e:
+            return f"Error adding task: {str(e)}"
 
 class QueryTasksTool(BaseTool):
     name: str = "Query Tasks Tool"
     description: str = (
         "This tool allows you to retrieve tasks from your task management system based on various filtering criteria. "
         "You can filter tasks using fields such as 'status' (options are 'completed', 'pending', or 'overdue'), 'title', 'description', 'type', 'priority', and 'progress'. "
-        "For 'title' and 'description', you can use regular expressions to perform flexible and pattern-based searches, making it easier to find tasks that contain certain keywords or match specific patterns. "
+        "'priority' may be a list such as ['High', 'Medium']; 'progress' may be a range such as {'gte': 50} (or use 'progress_min'/'progress_max'). "
+        f"Deadlines can be filtered with 'due' ({', '.join(DUE_WINDOWS)}) or with 'due_before'/'due_after' dates in 'YYYY-MM-DD' format. "
+        "'title' and 'description' match whole words regardless of case, with the last word matched as a prefix, so 'Math' finds 'Mathematics Homework' and 'intro calc' finds 'Intro to Calculus'. "
         "To use this tool, provide a dictionary with your desired search parameters. "
         "For example: `{'status': 'pending'}` will return all tasks that are currently pending, while `{'title': 'Math', 'status': 'overdue'}` will return tasks that have 'Math' in their title and are overdue. "
+        "Results are paged: add 'limit' (default 20, max 100), 'sort_by' ('dueDate' or 'priority') with 'order' ('asc' or 'desc') for the top tasks, "
+        "'fields' (a list, or 'all' to include descriptions) and 'cursor' (the 'next_cursor' from the previous result) to fetch more. "
         "This tool is particularly useful for managing your tasks by allowing you to focus on specific subsets based on your current needs or priorities."
     )
 
-    def _run(self, search_params: dict | List[dict], getObjectID: bool = False) -> List[dict]:
+    @traced('tool.query_tasks')
+    def _run(self, search_params: dict | List[dict], getObjectID: bool = False, **page_options) -> List[dict]:
         try:
             if isinstance(search_params, list):
                 search_params = search_params[0]
+            if isinstance(search_params, dict):
+                # Paging options may arrive inside the search dict from the crew agents
+                search_params = dict(search_params)
+                for key in PAGE_OPTION_KEYS:
+                    if key in search_params:
+                        page_options.setdefault(key, search_params.pop(key))
             is_valid, message = validate_search_params(search_params)
+            if not is_valid:
+                return [{"error": message}]
+            is_valid, message, page = validate_page_options(page_options)
             if not is_valid:
                 return [{"error": message}]
 
-            query = {}
-            current_time = datetime.now()
-            datetime_conversion = lambda x: datetime.fromisoformat(x.replace('Z', '+00:00')).replace(tzinfo=None)
-
-            # Status-based filtering
-            if 'status' in search_params:
-                status = search_params['status'].lower()
-                if status == 'completed':
-                    query['completed'] = True
-                elif status == 'pending':
-                    query['completed'] = False
-                    query['dueDate'] = {'$gt': current_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}
-                elif status == 'overdue':
-                    query['completed'] = False
-                    query['dueDate'] = {'$lt': current_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}
-
-            # Title/description filtering
-            if 'title' in search_params:
-                query['title'] = {'$regex': search_params['title'], '$options': 'i'}
-            if 'description' in search_params:
-                query['description'] = {'$regex': search_params['description'], '$options': 'i'}
-
-            # Execute query with sorting
-            tasks = list(tasks_collection.find(query).sort('dueDate', 1))
-            
+            current_time = _cache_time()
+            query = build_search_query(search_params, current_time)
+
+            cache_key = task_cache.make_key('query', query, page, getObjectID, current_time)
+            cached = task_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            version = task_cache.version
+
+            ensure_task_indexes(task_repository.collection)
+            # Counts and one page of tasks come back from a single aggregation
+            counts, tasks, next_cursor = query_tasks_with_stats(task_repository.collection, query, current_time, **page)
+
             if not tasks:
                 return [{"message": f"No tasks found matching the criteria: {search_params}"}]
-                
-            # Enhance task information
+
             for task in tasks:
-                # Convert dueDate string to datetime for comparison
-                task_due_date = datetime_conversion(task['dueDate'])
-                
-                if not task.get('completed', False):
-                    if task_due_date < current_time:
-                        task['status'] = 'overdue'
-                    else:
-                        task['status'] = 'pending'
-                else:
-                    task['status'] = 'completed'
+                if 'dueDate' in task:
+                    task['dueDate'] = format_due_date(task['dueDate'])
                 if not getObjectID:
                     task.pop('_id', None)
-            
-            # Add statistics
+
             stats = {
-                "total_retrived_tasks": len(tasks),
-                "completed_tasks_in_retrived": len([t for t in tasks if t.get('completed', False)]),
-                "pending_tasks_in_retrived": len([t for t in tasks if not t.get('completed', False) and datetime_conversion(t['dueDate']) >= current_time]),
-                "overdue_tasks_in_retrived": len([t for t in tasks if not t.get('completed', False) and datetime_conversion(t['dueDate']) < current_time])
+                "total_retrived_tasks": counts['total'],
+                "returned_tasks": len(tasks),
+                "next_cursor": next_cursor,
+                "completed_tasks_in_retrived": counts['completed'],
+                "pending_tasks_in_retrived": counts['pending'],
+                "overdue_tasks_in_retrived": counts['overdue'],
+                "tasks_by_type": counts['by_type'],
+                "tasks_by_priority": counts['by_priority'],
             }
 
-            return [stats] + tasks if tasks else [{"message": "No tasks found."}]
+            output = [stats] + tasks
+            task_cache.put(cache_key, output, version)
+            return output
         except Exception as e:
             return [{"error": f"Error querying tasks: {str(e)}"}]
 
@@ -286,17 +408,19 @@ class UpdateTaskTool(BaseTool):
     name: str = "Update Task Tool"
     description: str = (
         "This tool enables you to update existing tasks by specifying search parameters to identify the tasks and providing the new values for the fields you want to update. "
-        "You can use regular expressions in 'search_params' to match tasks based on 'title' or 'description', allowing for flexible and broad identification of tasks. "
+        "'title' and 'description' in 'search_params' match whole words regardless of case, with the last word matched as a prefix, allowing for flexible and broad identification of tasks. "
         "The 'updates' parameter should be a dictionary containing the fields you wish to change, such as 'progress', 'dueDate', 'priority', or 'completed' status. "
         "For example, you might input: "
         "`search_params={'title': 'Math Homework'}, updates={'progress': 50, 'completed': False}`. "
         "This will find all tasks with 'Math Homework' in the title and update their progress to 50% and mark them as not completed. "
         "Ensure that the fields you're updating are valid and the new values are correctly formatted to prevent errors. "
+        "Pass dry_run=True to list the ids and titles of the tasks that would be updated without changing them. "
         "This tool is essential for keeping your task information up-to-date and reflecting the current state of your tasks."
     )
 
-    def _run(self, search_params: dict | List[dict], updates: dict, getObjectID: bool = False) -> str:
-        # try:
+    @traced('tool.update_task')
+    def _run(self, search_params: dict | List[dict], updates: dict, getObjectID: bool = False, dry_run: bool = False) -> str:
+        try:
             # Validate search parameters
             if isinstance(search_params, list):
                 search_params = search_params[0]
@@ -306,109 +430,140 @@ class UpdateTaskTool(BaseTool):
 
             # Validate update data
             is_valid, message, validated_updates = validate_update_task_data(updates)
-            if not is_valid:
-                return f"Error in update data: {message}"
+            if not is_valid or not validated_updates:
+                return f"Error in update data: {message if not is_valid else 'no fields to update'}"
 
-            # Use regex search on 'title' or 'description'
-            query = {}
-            if 'title' in search_params:
-                query['title'] = {'$regex': search_params['title'], '$options': 'i'}
-            if 'description' in search_params:
-                query['description'] = {'$regex': search_params['description'], '$options': 'i'}
+            ensure_task_indexes(task_repository.collection)
+            query = build_search_query(search_params)
 
-            tasks = list(tasks_collection.find(query))
-            if not tasks:
-                return "No matching tasks found."
+            if dry_run:
+                return preview_matches(query, 'updated')
 
-            # Update matching tasks
-            result = tasks_collection.update_many(query, {'$set': validated_updates})
-            return f"Updated {result.modified_count} task(s) successfully."
-        # except Exception as e:
-            # return f"Error updating tasks: {str(e)}"
+            # One round trip: the write result says whether anything matched
+            result = task_repository.collection.update_many(query, {'$set': validated_updates})
+            if result.modified_count:
+                task_cache.invalidate()
+            if not result.matched_count:
+                return "No matching tasks found."
+            return f"Matched {result.matched_count} task(s); updated {result.modified_count} task(s) successfully."
+        except Exception as e:
+            return f"Error updating tasks: {str(e)}"
 
 class DeleteTaskTool(BaseTool):
     name: str = "Delete Task Tool"
     description: str = (
-        "Use this tool to permanently delete tasks from your task management system by matching titles or descriptions using regular expressions. "
+        "Use this tool to permanently delete tasks from your task management system by matching words in their titles or descriptions. "
         "Provide a dictionary with keys like 'title' or 'description' to specify which tasks you want to remove. "
-        "For example, `{'title': 'Old Task'}` will delete all tasks whose titles match 'Old Task'. "
+        "For example, `{'title': 'Old Task'}` will delete all tasks whose titles contain the words 'Old' and 'Task'. "
         "Since deletions cannot be undone, it's important to use this tool carefully and ensure that your search parameters accurately target only the tasks you intend to delete. "
-        "It's advisable to double-check the list of tasks that match your criteria before proceeding with the deletion. "
+        "It's advisable to double-check the list of tasks that match your criteria before proceeding with the deletion: "
+        "pass dry_run=True to list the ids and titles of the tasks that would be deleted without deleting them. "
         "This tool helps in maintaining your task list by removing tasks that are no longer relevant or needed, keeping your task management system organized and current."
     )
 
-    def _run(self, search_params: dict | List[dict], getObjectID: bool = False) -> str:
-        # try:
+    @traced('tool.delete_task')
+    def _run(self, search_params: dict | List[dict], getObjectID: bool = False, dry_run: bool = False) -> str:
+        try:
             if isinstance(search_params, list):
                 search_params = search_params[0]
             is_valid, message = validate_search_params(search_params)
             if not is_valid:
                 return f"Error: {message}"
 
-            # Use regex search on 'title' or 'description'
-            query = {}
-            if 'title' in search_params:
-                query['title'] = {'$regex': search_params['title'], '$options': 'i'}
-            if 'description' in search_params:
-                query['description'] = {'$regex': search_params['description'], '$options': 'i'}
+            ensure_task_indexes(task_repository.collection)
+            query = build_search_query(search_params)
 
-            tasks = list(tasks_collection.find(query))
-            if not tasks:
-                return "No matching tasks found."
+            if dry_run:
+                return preview_matches(query, 'deleted')
 
-            # Delete matching tasks
-            result = tasks_collection.delete_many(query)
+            result = task_repository.collection.delete_many(query)
+            if result.deleted_count:
+                task_cache.invalidate()
+            if not result.deleted_count:
+                return "No matching tasks found."
             return f"Deleted {result.deleted_count} task(s) successfully."
-        # except Exception as e:
-            # return f"Error deleting tasks: {str(e)}"
+        except Exception as e:
+            return f"Error deleting tasks: {str(e)}"
 
 class GetAllTasksTool(BaseTool):
     name: str = "Get All Tasks Tool"
     description: str = (
         "This tool allows you to retrieve all tasks from your task management system or to search for specific tasks using a query string. "
-        "If you provide a query, the tool searches the 'title' and 'description' fields using regular expression matching to find tasks containing the query string. "
+        "If you provide a query, the tool searches the 'title' and 'description' fields for tasks containing the query's words (the last word may be a prefix). "
         "For example, `{'query': 'Exam'}` returns all tasks with 'Exam' in the title or description. "
-        "If no input is provided, it will return all tasks currently stored in the system. "
-        "In addition, the tool provides statistics such as the total number of tasks, and counts of completed, pending, and overdue tasks to give you an overview of your workload. "
+        "If no input is provided, it will return the tasks currently stored in the system, soonest due first, up to one page. "
+        "Optional 'limit' (default 20, max 100), 'sort_by' ('dueDate' or 'priority'), 'order' ('asc' or 'desc'), 'fields' (a list, or 'all') "
+        "and 'cursor' (the 'next_cursor' from the previous result) control paging. "
+        "In addition, the tool provides statistics such as the total number of tasks, counts of completed, pending, and overdue tasks, and counts per type and priority to give you an overview of your workload. "
         "This is particularly useful for reviewing all your tasks at once or for finding all tasks related to a specific subject or keyword. "
         "By using this tool, you can effectively manage and prioritize your tasks based on their status and relevance."
     )
 
-    def _run(self, query: str = "", getObjectID: bool = False) -> List[dict]:
+    @traced('tool.get_all_tasks')
+    def _run(self, query: str = "", getObjectID: bool = False, **page_options) -> List[dict]:
         try:
             # Validate query if provided
             if query and not isinstance(query, str):
                 return [{"error": "Query must be a string"}]
+            is_valid, message, page = validate_page_options(page_options)
+            if not is_valid:
+                return [{"error": message}]
+
+            match = keyword_filter(query) if query else {}
+            current_time = _cache_time()
+            cache_key = task_cache.make_key('get_all', match, page, getObjectID, current_time)
+            cached = task_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            version = task_cache.version
+
+            ensure_task_indexes(task_repository.collection)
+            counts, tasks, next_cursor = query_tasks_with_stats(task_repository.collection, match, current_time, **page)
 
-            if query:
-                query_filter = {
-                    "$or": [
-                        {"title": {"$regex": query, "$options": "i"}},
-                        {"description": {"$regex": query, "$options": "i"}}
-                    ]
-                }
-                tasks = list(tasks_collection.find(query_filter))
-            else:
-                tasks = list(tasks_collection.find({}))
-
-            datetime_conversion = lambda x: datetime.fromisoformat(x.replace('Z', '+00:00')).replace(tzinfo=None)
-            
             stats = {
-                "total_tasks": len(tasks),
-                "completed_tasks": len([t for t in tasks if t.get('completed', False)]),
-                "pending_tasks": len([t for t in tasks if not t.get('completed', False) and datetime_conversion(t['dueDate']) >= datetime.now()]),
-                "overdue_tasks": len([t for t in tasks if not t.get('completed', False) and datetime_conversion(t['dueDate']) < datetime.now()])
+                "total_tasks": counts['total'],
+                "returned_tasks": len(tasks),
+                "next_cursor": next_cursor,
+                "completed_tasks": counts['completed'],
+                "pending_tasks": counts['pending'],
+                "overdue_tasks": counts['overdue'],
+                "tasks_by_type": counts['by_type'],
+                "tasks_by_priority": counts['by_priority'],
             }
 
             for task in tasks:
-                task['dueDate'] = datetime_conversion(task['dueDate']).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                if 'dueDate' in task:
+                    task['dueDate'] = format_due_date(task['dueDate'])
                 if not getObjectID:
                     task.pop('_id', None)
 
-            return [stats] + tasks if tasks else [{"message": "No tasks found."}]
+            output = [stats] + tasks if tasks else [{"message": "No tasks found."}]
+            task_cache.put(cache_key, output, version)
+            return output
         except Exception as e:
             return [{"error": f"Error retrieving tasks: {str(e)}"}]
 
+class BulkTaskTool(BaseTool):
+    name: str = "Bulk Task Tool"
+    description: str = (
+        "Use this tool to add, update or delete many tasks in a single call instead of calling the other task tools repeatedly. "
+        "Provide 'operations', a list where each item is one of: "
+        "`{'op': 'add', 'task': {...same fields as the Add Task Tool...}}`, "
+        "`{'op': 'update', 'search_params': {...}, 'updates': {...}}` or "
+        "`{'op': 'delete', 'search_params': {...}}`. "
+        "With 'ordered' True (the default) nothing is written if any operation is invalid and processing stops at the first failed write; "
+        "with 'ordered' False the valid operations are applied and the invalid ones are reported. "
+        "The result lists the outcome of every operation in order, plus inserted, modified and deleted counts. "
+        "For example, adding five assignments from a syllabus is one call with five 'add' operations."
+    )
+
+    @traced('tool.bulk_tasks')
+    def _run(self, operations: List[dict], ordered: bool = True) -> dict:
+        try:
+            return run_bulk_operations(operations, ordered)
+        except Exception as e:
+            return {"error": f"Error running bulk operations: {str(e)}"}
+
 # Example of a custom tool
 class MyCustomTool(BaseTool):
     name: str = "Name of my tool"
@@ -3,6 +3,9 @@ start_import_time = time.time()
 
 from backendcrew import backendcrewCrew
 from backendcrew.tools import *
+from backendcrew.tools import build_search_query
+from database import task_repository
+from backendcrew.task_query import ensure_task_indexes, keyword_filter, assert_index_backed, CollectionScanError
 import_duration = time.time() - start_import_time
 
 from typing import Any, Dict
@@ -194,6 +197,39 @@ def run_tool_tests(log_file: str) -> None:
     
     save_debug_log(f"Test Summary - Total: {total_tests}, Passed: {tests_passed}", log_file)
 
+def run_query_plan_tests(log_file: str) -> None:
+    """Explain the filters the task tools build and fail on any COLLSCAN"""
+    print(f"\n{Colors.HEADER}Checking task query plans{Colors.ENDC}")
+    save_debug_log("Starting query plan checks", log_file)
+    ensure_task_indexes(task_repository.collection)
+
+    tool_queries = [
+        ('status pending', build_search_query({'status': 'pending'}), [('dueDate', 1)]),
+        ('status overdue', build_search_query({'status': 'overdue'}), [('dueDate', 1)]),
+        ('status completed', build_search_query({'status': 'completed'}), [('dueDate', 1)]),
+        ('title', build_search_query({'title': 'Math'}), [('dueDate', 1)]),
+        ('title + status', build_search_query({'title': 'Math', 'status': 'pending'}), [('dueDate', 1)]),
+        ('description', build_search_query({'description': 'chapter'}), None),
+        ('priority', build_search_query({'priority': 'High'}), [('dueDate', 1)]),
+        ('type + pending', build_search_query({'type': 'Homework', 'status': 'pending'}), [('dueDate', 1)]),
+        ('due this week', build_search_query({'due': 'this_week'}), [('dueDate', 1)]),
+        ('progress range', build_search_query({'progress': {'gte': 50}}), None),
+        ('keyword', keyword_filter('Exam'), None),
+    ]
+
+    failures = 0
+    for name, query, sort in tool_queries:
+        try:
+            assert_index_backed(task_repository.collection, query, sort)
+            print(f"{name}: {Colors.GREEN}index-backed{Colors.ENDC}")
+            save_debug_log(f"Query plan {name}: ok", log_file)
+        except CollectionScanError as e:
+            failures += 1
+            print(f"{name}: {Colors.RED}{e}{Colors.ENDC}")
+            save_debug_log(f"Query plan {name}: COLLSCAN", log_file)
+
+    print(f"Query plan checks failed: {failures}/{len(tool_queries)}")
+
 def test_crew_integration(log_file: str) -> None:
     """Test CrewAI integration with tools"""
     print(f"\n{Colors.HEADER}Testing CrewAI Integration{Colors.ENDC}")
@@ -249,9 +285,10 @@ if __name__ == "__main__":
         print("1. Run tool tests")
         print("2. Run CrewAI integration tests")
         print("3. Run all tests")
-        print("4. Exit")
+        print("4. Check task query plans")
+        print("5. Exit")
         
-        choice = input("\nEnter your choice (1-4): ")
+        choice = input("\nEnter your choice (1-5): ")
         save_debug_log(f"User selected option: {choice}", log_file)
         
         if choice == '1':
@@ -261,7 +298,10 @@ if __name__ == "__main__":
         elif choice == '3':
             run_tool_tests(log_file)
             test_crew_integration(log_file)
+            run_query_plan_tests(log_file)
         elif choice == '4':
+            run_query_plan_tests(log_file)
+        elif choice == '5':
             save_debug_log("Exiting test suite", log_file)
             print(f"{Colors.GREEN}Exiting test suite{Colors.ENDC}")
             break
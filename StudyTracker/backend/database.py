@@ -0,0 +1,215 @@
+"""Shared MongoDB access for the Flask app, the task tools and the scripts.
+
+One MongoClient is created on first use (not at import) and shared by
+every repository. Pool size, timeouts and write concern come from the
+environment:
+
+    MONGODB_URI                       mongodb://localhost:27017/studytracker
+    MONGODB_DB                        studytracker
+    MONGODB_MAX_POOL_SIZE             50
+    MONGODB_MIN_POOL_SIZE             0
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS  5000
+    MONGODB_CONNECT_TIMEOUT_MS        5000
+    MONGODB_SOCKET_TIMEOUT_MS         30000
+    MONGODB_WRITE_CONCERN             1 (or 'majority')
+    MONGODB_WRITE_TIMEOUT_MS          10000
+
+Tests can point MONGODB_URI at a local mongod, use MONGODB_URI=mongomock://
+for an in-memory stand-in (requires the optional mongomock package), or
+pass any client to configure().
+"""
+from pymongo import MongoClient, monitoring
+from pymongo.database import Database
+from pymongo.collection import Collection
+from dotenv import load_dotenv
+from tracing import record_span
+from typing import Dict, Optional
+import os
+import threading
+
+__all__ = [
+    'CommandLatencyListener',
+    'PoolEventListener',
+    'command_listener',
+    'pool_listener',
+    'configure',
+    'get_client',
+    'get_database',
+    'ChatRepository',
+    'TaskRepository',
+    'chat_repository',
+    'task_repository',
+    'database_stats',
+]
+
+load_dotenv()
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Per-command counts, failures and latency (total and max, in ms).
+
+    Each command is also recorded as a `mongo.<command>` span; pymongo
+    publishes these events on the thread that ran the command, so they land
+    in the caller's trace.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands: Dict[str, dict] = {}
+
+    def _record(self, name: str, duration_micros: int, failed: bool) -> None:
+        ms = duration_micros / 1000.0
+        with self._lock:
+            entry = self._commands.setdefault(name, {'count': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['failures'] += int(failed)
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.command_name, event.duration_micros, False)
+        record_span(f'mongo.{event.command_name}', event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self._record(event.command_name, event.duration_micros, True)
+        record_span(f'mongo.{event.command_name}', event.duration_micros / 1e6, error=str(event.failure))
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                name: {**entry, 'avg_ms': entry['total_ms'] / entry['count'] if entry['count'] else 0.0}
+                for name, entry in self._commands.items()
+            }
+
+
+class PoolEventListener(monitoring.ConnectionPoolListener):
+    """Connection pool counters: connections opened/closed and checkout outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            'connections_created': 0, 'connections_closed': 0,
+            'checkouts': 0, 'checkout_failures': 0, 'pool_cleared': 0,
+        }
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def pool_cleared(self, event): self._bump('pool_cleared')
+    def connection_created(self, event): self._bump('connections_created')
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): self._bump('connections_closed')
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): self._bump('checkout_failures')
+    def connection_checked_out(self, event): self._bump('checkouts')
+    def connection_checked_in(self, event): pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+command_listener = CommandLatencyListener()
+pool_listener = PoolEventListener()
+
+_client: Optional[MongoClient] = None
+_database_name: Optional[str] = None
+_client_lock = threading.Lock()
+
+
+def client_options() -> dict:
+    write_concern = os.getenv('MONGODB_WRITE_CONCERN', '1')
+    return {
+        'maxPoolSize': int(os.getenv('MONGODB_MAX_POOL_SIZE', '50')),
+        'minPoolSize': int(os.getenv('MONGODB_MIN_POOL_SIZE', '0')),
+        'serverSelectionTimeoutMS': int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        'connectTimeoutMS': int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '5000')),
+        'socketTimeoutMS': int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '30000')),
+        'w': int(write_concern) if write_concern.isdigit() else write_concern,
+        'wTimeoutMS': int(os.getenv('MONGODB_WRITE_TIMEOUT_MS', '10000')),
+        'event_listeners': [command_listener, pool_listener],
+    }
+
+
+def _create_client(uri: str):
+    if uri.startswith('mongomock://'):
+        # Optional in-memory stand-in for tests; it has no pool or listeners
+        import mongomock
+        return mongomock.MongoClient()
+    return MongoClient(uri, **client_options())
+
+
+def configure(client=None, uri: Optional[str] = None, database: Optional[str] = None) -> None:
+    """Replace the shared client, e.g. with a test mongod or a mongomock client.
+
+    The previous client is closed. Repositories resolve collections on each
+    access, so they pick up the new client immediately.
+    """
+    global _client, _database_name
+    with _client_lock:
+        previous = _client
+        _client = client if client is not None else (_create_client(uri) if uri else None)
+        _database_name = database
+        if previous is not None and previous is not _client:
+            previous.close()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/studytracker'))
+    return _client
+
+
+def get_database() -> Database:
+    return get_client()[_database_name or os.getenv('MONGODB_DB', 'studytracker')]
+
+
+class ChatRepository:
+    """Collections backing chats: chat metadata and their messages."""
+
+    @property
+    def chats(self) -> Collection:
+        return get_database().chats
+
+    @property
+    def messages(self) -> Collection:
+        return get_database().chat_messages
+
+
+class TaskRepository:
+    """The taskEntries collection shared by the task tools and the task endpoints."""
+
+    @property
+    def collection(self) -> Collection:
+        return get_database().taskEntries
+
+    @property
+    def migrations(self) -> Collection:
+        return get_database().migrations
+
+
+chat_repository = ChatRepository()
+task_repository = TaskRepository()
+
+
+def database_stats() -> dict:
+    """Client settings plus command latency and pool counters, for metrics endpoints."""
+    options = client_options()
+    return {
+        'connected': _client is not None,
+        'max_pool_size': options['maxPoolSize'],
+        'min_pool_size': options['minPoolSize'],
+        'write_concern': options['w'],
+        'commands': command_listener.stats(),
+        'pool': pool_listener.stats(),
+    }
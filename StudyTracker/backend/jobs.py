@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+import math
+import threading
+import time
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """Bounded background executor for slow chat turns.
+
+    At most `max_workers` jobs run at once and at most `max_pending` jobs
+    (queued + running) are accepted; beyond that `submit` raises
+    QueueFullError so the caller can answer 429 instead of tying up a
+    request worker. Finished jobs are kept for `result_ttl` seconds so
+    clients can poll for them.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, result_ttl: int = 600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chat-job')
+        self._jobs: Dict[str, dict] = {}
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        # Exponential moving average of job run time, used for Retry-After
+        self._avg_duration = 10.0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> dict:
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_pending:
+                raise QueueFullError(self.retry_after())
+            self._pending += 1
+            job_id = str(uuid4())
+            job = {
+                'id': job_id,
+                'status': 'queued',
+                'created_at': datetime.now(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+            }
+            self._jobs[job_id] = job
+            self._events[job_id] = threading.Event()
+            # Snapshot before the worker can start mutating the job
+            submitted = dict(job)
+
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return submitted
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        job = self._jobs[job_id]
+        job['status'] = 'running'
+        job['started_at'] = datetime.now()
+        start = time.monotonic()
+        try:
+            job['result'] = fn(*args, **kwargs)
+            job['status'] = 'succeeded'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished_at'] = datetime.now()
+            with self._lock:
+                self._pending -= 1
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - start)
+            self._events[job_id].set()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Block up to `timeout` seconds for a job to finish, then return its state."""
+        event = self._events.get(job_id)
+        if event is None:
+            return None
+        event.wait(timeout)
+        return self.get(job_id)
+
+    def retry_after(self) -> int:
+        """Rough number of seconds until a queue slot frees up."""
+        return max(1, math.ceil(self._avg_duration / self.max_workers))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'max_workers': self.max_workers,
+                'avg_duration': round(self._avg_duration, 3),
+            }
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than result_ttl. Caller must hold the lock."""
+        now = datetime.now()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['finished_at'] is not None and (now - job['finished_at']).total_seconds() > self.result_ttl
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
@@ -0,0 +1,330 @@
+"""Token and latency accounting for every LLM call made by the graph and the crew.
+
+A chat turn runs inside metered(chat_id). Each LLM call made while the meter
+is active is recorded twice: in the turn's UsageMeter, whose totals are
+added to the chat document and returned to the client on request, and in
+usage_stats, which keeps running totals and rolling windows per call site.
+
+Graph calls are reported by usage_handler, the LangChain callback attached
+to ChatGroq, and are named after their LangGraph node. Crew calls go
+through litellm. install_litellm_callback() reports them, and they are
+named with label(), e.g. 'crew:task_agent'.
+"""
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import Dict, Iterator, List, Optional
+from uuid import UUID, uuid4
+import os
+import threading
+import time
+
+__all__ = [
+    'USAGE_COUNTERS',
+    'LLMCall',
+    'UsageMeter',
+    'RollingWindow',
+    'UsageStats',
+    'usage_stats',
+    'metered',
+    'label',
+    'current_meter',
+    'record_call',
+    'usage_header',
+    'UsageCallbackHandler',
+    'usage_handler',
+    'install_litellm_callback',
+]
+
+# Samples kept per call site for the percentile summaries
+USAGE_WINDOW = int(os.getenv('LLM_USAGE_WINDOW', '500'))
+
+USAGE_COUNTERS = ('calls', 'prompt_tokens', 'completion_tokens', 'total_tokens', 'latency_ms')
+
+
+@dataclass(frozen=True)
+class LLMCall:
+    name: str               # LangGraph node or crew label
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_ms: float
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+def _empty_totals() -> dict:
+    return {counter: 0 for counter in USAGE_COUNTERS}
+
+
+def _add(totals: dict, call: LLMCall) -> None:
+    totals['calls'] += 1
+    totals['prompt_tokens'] += call.prompt_tokens
+    totals['completion_tokens'] += call.completion_tokens
+    totals['total_tokens'] += call.total_tokens
+    totals['latency_ms'] = round(totals['latency_ms'] + call.latency_ms, 1)
+
+
+class UsageMeter:
+    """The LLM calls made while handling one request."""
+
+    def __init__(self, chat_id: Optional[str] = None, request_id: Optional[str] = None):
+        self.chat_id = chat_id
+        self.request_id = request_id or str(uuid4())
+        self.calls: List[LLMCall] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: LLMCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def totals(self) -> dict:
+        totals = _empty_totals()
+        with self._lock:
+            for call in self.calls:
+                _add(totals, call)
+        return totals
+
+    def summary(self) -> dict:
+        """Totals for the request plus a breakdown per node or agent."""
+        with self._lock:
+            calls = list(self.calls)
+        totals, by_name = _empty_totals(), {}
+        for call in calls:
+            _add(totals, call)
+            _add(by_name.setdefault(call.name, _empty_totals()), call)
+        return {
+            'request_id': self.request_id,
+            **totals,
+            'models': sorted({call.model for call in calls if call.model}),
+            'by_name': by_name,
+        }
+
+
+def usage_header(totals: dict) -> str:
+    """Compact form of a meter's totals for the X-LLM-Usage response header."""
+    return (f"calls={totals['calls']}; prompt={totals['prompt_tokens']}; "
+            f"completion={totals['completion_tokens']}; latency_ms={totals['latency_ms']:.0f}")
+
+
+class RollingWindow:
+    """The last `size` values of one measurement, summarized into percentiles on demand."""
+
+    def __init__(self, size: int = USAGE_WINDOW):
+        self._values = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+
+    def summary(self) -> dict:
+        values = sorted(self._values)
+        if not values:
+            return {'count': 0}
+
+        def quantile(q: float) -> float:
+            return values[min(len(values) - 1, int(q * len(values)))]
+
+        return {
+            'count': len(values),
+            'mean': round(sum(values) / len(values), 1),
+            'p50': quantile(0.5),
+            'p90': quantile(0.9),
+            'p99': quantile(0.99),
+            'max': values[-1],
+        }
+
+
+class UsageStats:
+    """Process-wide totals and rolling windows of tokens and latency per call site."""
+
+    def __init__(self, window: int = USAGE_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._totals = _empty_totals()
+        self._sites: Dict[str, dict] = {}
+
+    def record(self, call: LLMCall) -> None:
+        with self._lock:
+            _add(self._totals, call)
+            site = self._sites.get(call.name)
+            if site is None:
+                site = self._sites[call.name] = {
+                    'totals': _empty_totals(),
+                    'models': set(),
+                    'prompt_tokens': RollingWindow(self.window),
+                    'completion_tokens': RollingWindow(self.window),
+                    'latency_ms': RollingWindow(self.window),
+                }
+            _add(site['totals'], call)
+            if call.model:
+                site['models'].add(call.model)
+            site['prompt_tokens'].add(call.prompt_tokens)
+            site['completion_tokens'].add(call.completion_tokens)
+            site['latency_ms'].add(round(call.latency_ms, 1))
+
+    def stats(self) -> dict:
+        """Totals plus per-site windows, costliest call sites (by total tokens) first."""
+        with self._lock:
+            sites = {
+                name: {
+                    **site['totals'],
+                    'models': sorted(site['models']),
+                    'window': {
+                        'prompt_tokens': site['prompt_tokens'].summary(),
+                        'completion_tokens': site['completion_tokens'].summary(),
+                        'latency_ms': site['latency_ms'].summary(),
+                    },
+                }
+                for name, site in self._sites.items()
+            }
+            totals = dict(self._totals)
+        ordered = sorted(sites.items(), key=lambda item: item[1]['total_tokens'], reverse=True)
+        return {**totals, 'by_name': dict(ordered)}
+
+
+usage_stats = UsageStats()
+
+_meter: ContextVar[Optional[UsageMeter]] = ContextVar('llm_usage_meter', default=None)
+_label: ContextVar[Optional[str]] = ContextVar('llm_usage_label', default=None)
+
+
+def current_meter() -> Optional[UsageMeter]:
+    return _meter.get()
+
+
+@contextmanager
+def metered(chat_id: Optional[str] = None, request_id: Optional[str] = None) -> Iterator[UsageMeter]:
+    """Attribute LLM calls made in this context (and threads copying it) to a new meter."""
+    meter = UsageMeter(chat_id, request_id)
+    token = _meter.set(meter)
+    try:
+        yield meter
+    finally:
+        try:
+            _meter.reset(token)
+        except ValueError:
+            # A streaming generator finished in another context than it started in
+            _meter.set(None)
+
+
+@contextmanager
+def label(name: str) -> Iterator[None]:
+    """Name the LLM calls made in this context that do not come from a graph node."""
+    token = _label.set(name)
+    try:
+        yield
+    finally:
+        try:
+            _label.reset(token)
+        except ValueError:
+            _label.set(None)
+
+
+def record_call(name: Optional[str], model: str, prompt_tokens: int, completion_tokens: int,
+                latency_ms: float, meter: Optional[UsageMeter] = None) -> LLMCall:
+    call = LLMCall(name or _label.get() or 'unknown', model or '', int(prompt_tokens or 0),
+                   int(completion_tokens or 0), float(latency_ms))
+    meter = meter if meter is not None else _meter.get()
+    if meter is not None:
+        meter.add(call)
+    usage_stats.record(call)
+    return call
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Records each chat model call with the LangGraph node (or active label) that made it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata: Optional[dict] = None, **kwargs):
+        metadata = metadata or {}
+        name = metadata.get('langgraph_node') or _label.get()
+        # The meter is captured here; end callbacks are not guaranteed to see the same context
+        with self._lock:
+            self._pending[run_id] = (name, metadata.get('ls_model_name', ''), _meter.get(), time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        name, model, meter, start = pending
+        output = response.llm_output or {}
+        usage = output.get('token_usage') or {}
+        prompt_tokens, completion_tokens = usage.get('prompt_tokens'), usage.get('completion_tokens')
+        if prompt_tokens is None:
+            # Streamed replies carry usage on the aggregated message instead of llm_output
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+                    if metadata:
+                        prompt_tokens = metadata.get('input_tokens', 0)
+                        completion_tokens = metadata.get('output_tokens', 0)
+        record_call(name, output.get('model_name') or model, prompt_tokens, completion_tokens,
+                    (time.perf_counter() - start) * 1000, meter)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        with self._lock:
+            self._pending.pop(run_id, None)
+
+
+usage_handler = UsageCallbackHandler()
+
+_litellm_installed = False
+_litellm_lock = threading.Lock()
+
+
+def install_litellm_callback(max_pending: int = 1024) -> bool:
+    """Record the crew's litellm calls; returns False when litellm is not installed.
+
+    litellm reports success on a worker thread, so the label and meter are
+    captured in the pre-call hook (which runs on the caller's thread) and
+    matched up by litellm_call_id.
+    """
+    global _litellm_installed
+    try:
+        import litellm
+        from litellm.integrations.custom_logger import CustomLogger
+    except ImportError:
+        return False
+
+    class LiteLLMUsageLogger(CustomLogger):
+        def __init__(self):
+            super().__init__()
+            self._lock = threading.Lock()
+            self._pending: "OrderedDict[str, tuple]" = OrderedDict()
+
+        def log_pre_api_call(self, model, messages, kwargs):
+            call_id = kwargs.get('litellm_call_id')
+            if call_id is None:
+                return
+            with self._lock:
+                self._pending[call_id] = (_label.get(), _meter.get())
+                while len(self._pending) > max_pending:
+                    self._pending.popitem(last=False)
+
+        def log_success_event(self, kwargs, response_obj, start_time, end_time):
+            with self._lock:
+                name, meter = self._pending.pop(kwargs.get('litellm_call_id'), (None, None))
+            usage = getattr(response_obj, 'usage', None)
+            record_call(
+                name or 'crew', kwargs.get('model', ''),
+                getattr(usage, 'prompt_tokens', 0), getattr(usage, 'completion_tokens', 0),
+                (end_time - start_time).total_seconds() * 1000, meter,
+            )
+
+        def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+            with self._lock:
+                self._pending.pop(kwargs.get('litellm_call_id'), None)
+
+    with _litellm_lock:
+        if not _litellm_installed:
+            litellm.callbacks.append(LiteLLMUsageLogger())
+            _litellm_installed = True
+    return True
@@ -0,0 +1,88 @@
+"""Convert legacy string dueDate values in taskEntries to native BSON dates.
+
+The migration runs in batches and records its position in the `migrations`
+collection, so an interrupted run resumes where it stopped:
+
+    python migrate_task_dates.py                 # migrate (or resume)
+    python migrate_task_dates.py --dry-run       # count what would change
+    python migrate_task_dates.py --restart       # forget the saved position
+
+Tasks created through the frontend's /api/db route are still written with
+string dates, so re-running this periodically is safe while the tools run with
+TASK_DATES_DUAL_READ enabled.
+"""
+from datetime import datetime
+from pymongo import UpdateOne
+from database import get_database
+import argparse
+
+MIGRATION_ID = 'task_due_dates'
+
+
+def parse_legacy_date(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def migrate(db, batch_size: int = 500, dry_run: bool = False, restart: bool = False) -> dict:
+    tasks = db.taskEntries
+    migrations = db.migrations
+
+    if restart:
+        migrations.delete_one({'_id': MIGRATION_ID})
+    progress = migrations.find_one({'_id': MIGRATION_ID}) or {
+        '_id': MIGRATION_ID, 'last_id': None, 'converted': 0, 'failed': [],
+    }
+
+    while True:
+        query = {'dueDate': {'$type': 'string'}}
+        if progress['last_id'] is not None:
+            query['_id'] = {'$gt': progress['last_id']}
+        batch = list(tasks.find(query, {'dueDate': 1}).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for task in batch:
+            try:
+                due_date = parse_legacy_date(task['dueDate'])
+            except ValueError:
+                progress['failed'].append(str(task['_id']))
+                continue
+            # Guard on the original value so a concurrent edit is never overwritten
+            operations.append(UpdateOne(
+                {'_id': task['_id'], 'dueDate': task['dueDate']},
+                {'$set': {'dueDate': due_date}},
+            ))
+
+        if operations and not dry_run:
+            result = tasks.bulk_write(operations, ordered=False)
+            progress['converted'] += result.modified_count
+        elif dry_run:
+            progress['converted'] += len(operations)
+
+        progress['last_id'] = batch[-1]['_id']
+        progress['updated_at'] = datetime.now()
+        if not dry_run:
+            migrations.replace_one({'_id': MIGRATION_ID}, progress, upsert=True)
+        print(f"Processed batch up to {progress['last_id']}: {progress['converted']} converted, {len(progress['failed'])} unparseable")
+
+    remaining = tasks.count_documents({'dueDate': {'$type': 'string'}})
+    return {
+        'converted': progress['converted'],
+        'failed': progress['failed'],
+        'remaining_string_dates': remaining,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--restart', action='store_true', help='Start again from the first task')
+    args = parser.parse_args()
+
+    summary = migrate(get_database(), args.batch_size, args.dry_run, args.restart)
+    print(f"Done: {summary['converted']} converted, {len(summary['failed'])} unparseable, "
+          f"{summary['remaining_string_dates']} string dates remaining")
+    if summary['failed']:
+        print("Unparseable task ids:", ', '.join(summary['failed']))
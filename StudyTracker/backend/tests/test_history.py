@@ -0,0 +1,77 @@
+import threading
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from GraphAgent.history import SummaryRefresher, build_history, estimate_tokens, summarize_messages
+
+
+def conversation(turns, size=10):
+    messages = []
+    for turn in range(turns):
+        messages.append({'role': 'user', 'content': f'q{turn} ' + 'x' * size})
+        messages.append({'role': 'assistant', 'content': f'a{turn} ' + 'y' * size})
+    return messages
+
+
+def test_keeps_only_the_last_turns_verbatim():
+    history = build_history(None, conversation(10), keep_turns=3)
+    assert len(history) == 6
+    assert history[0].content.startswith('q7') and history[-1].content.startswith('a9')
+    assert isinstance(history[0], HumanMessage) and isinstance(history[-1], AIMessage)
+
+
+def test_summary_is_prepended_as_system_message():
+    history = build_history('Student takes Calculus.', conversation(1))
+    assert isinstance(history[0], SystemMessage)
+    assert 'Student takes Calculus.' in history[0].content
+    assert len(history) == 3
+
+
+def test_token_budget_drops_oldest_messages_first():
+    messages = conversation(4, size=400)
+    per_message = estimate_tokens(messages[0]['content'])
+    history = build_history(None, messages, keep_turns=4, token_budget=per_message * 3)
+    assert [m.content[:2] for m in history] == ['a2', 'q3', 'a3']
+
+
+def test_latest_message_kept_even_over_budget():
+    history = build_history('s' * 10_000, conversation(2, size=4000), token_budget=100)
+    assert len(history) == 2
+    assert history[-1].content.startswith('a1')
+
+
+def test_accepts_langchain_messages_and_zero_turns():
+    messages = [HumanMessage(content='hi'), AIMessage(content='hello')]
+    assert build_history(None, messages) == messages
+    assert build_history(None, messages, keep_turns=0) == []
+
+
+def test_summarize_messages_folds_transcript_into_prompt():
+    chat = FakeListChatModel(responses=['  Student has an essay due Friday.  '])
+    summary = summarize_messages('(old)', [{'role': 'user', 'content': 'Essay due Friday'}], chat=chat)
+    assert summary == 'Student has an essay due Friday.'
+
+
+def test_refresher_coalesces_requests_for_a_running_chat():
+    started, release, done = threading.Event(), threading.Event(), threading.Event()
+    calls = []
+
+    def refresh(chat_id):
+        calls.append(chat_id)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        else:
+            done.set()
+
+    refresher = SummaryRefresher()
+    refresher.schedule('chat', refresh)
+    started.wait(5)
+    refresher.schedule('chat', refresh)
+    refresher.schedule('chat', refresh)
+    release.set()
+    done.wait(5)
+    refresher._executor.shutdown(wait=True)
+    assert calls == ['chat', 'chat']
+    assert refresher.stats() == {'running': 0, 'scheduled': 1, 'completed': 2, 'failed': 0}
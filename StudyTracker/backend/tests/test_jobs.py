@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import threading
+
+import pytest
+
+from jobs import JobQueue, QueueFullError
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(max_workers=1, max_pending=2, result_ttl=60)
+
+
+def test_job_result_and_failure(queue):
+    ok = queue.submit(lambda a, b: a + b, 2, b=3)
+    assert ok['status'] == 'queued'
+    assert queue.wait(ok['id'], 5)['result'] == 5
+    assert queue.get(ok['id'])['status'] == 'succeeded'
+
+    def boom():
+        raise ValueError('bad turn')
+
+    failed = queue.wait(queue.submit(boom)['id'], 5)
+    assert failed['status'] == 'failed' and failed['error'] == 'bad turn'
+    assert queue.stats()['pending'] == 0
+
+
+def test_full_queue_raises_with_retry_after(queue):
+    release = threading.Event()
+    jobs = [queue.submit(release.wait, 5) for _ in range(2)]
+    with pytest.raises(QueueFullError) as error:
+        queue.submit(lambda: None)
+    assert error.value.retry_after == queue.retry_after() >= 1
+    release.set()
+    for job in jobs:
+        queue.wait(job['id'], 5)
+    # Slots free up once the running jobs finish
+    assert queue.wait(queue.submit(lambda: 'ok')['id'], 5)['result'] == 'ok'
+
+
+def test_retry_after_scales_with_average_duration_and_workers():
+    queue = JobQueue(max_workers=4)
+    queue._avg_duration = 10.0
+    assert queue.retry_after() == 3
+    queue._avg_duration = 0.1
+    assert queue.retry_after() == 1
+
+
+def test_finished_jobs_expire_after_ttl(queue):
+    job = queue.submit(lambda: None)
+    queue.wait(job['id'], 5)
+    queue._jobs[job['id']]['finished_at'] = datetime.now() - timedelta(seconds=61)
+    queue.wait(queue.submit(lambda: None)['id'], 5)
+    assert queue.get(job['id']) is None
+    assert queue.wait(job['id'], 0) is None
+
+
+def test_unknown_job():
+    queue = JobQueue()
+    assert queue.get('missing') is None
+    assert queue.wait('missing', 0) is None
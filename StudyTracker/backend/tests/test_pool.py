@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from GraphAgent.pool import WorkFlowPool
+
+
+class FakeWorkFlow:
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.lock = threading.Lock()
+        self.cleared = 0
+        self.dropped = 0
+
+    def clear(self):
+        self.cleared += 1
+
+    def drop_checkpoints(self):
+        self.dropped += 1
+
+
+@pytest.fixture
+def pool():
+    return WorkFlowPool(max_size=2, factory=FakeWorkFlow)
+
+
+def test_get_reuses_and_evicts_least_recently_used(pool):
+    first = pool.get('a')
+    pool.get('b')
+    assert pool.get('a') is first
+    pool.get('c')
+    assert 'b' not in pool and 'a' in pool
+    assert pool.stats() == {'size': 2, 'max_size': 2, 'evictions': 1}
+
+
+def test_busy_workflow_is_not_evicted(pool):
+    with pool.checkout('a') as busy:
+        pool.get('b')
+        pool.get('c')
+        assert 'a' in pool and 'b' not in pool
+        assert busy.dropped == 0
+        # Every other entry is busy too, so the pool goes over size rather than evict
+        with pool.checkout('c'):
+            pool.get('d')
+            assert len(pool) == 3
+    assert pool.get('a') is busy
+
+
+def test_clear_waits_for_running_turn_and_keeps_the_lock(pool):
+    started, release = threading.Event(), threading.Event()
+
+    def turn():
+        with pool.checkout('a'):
+            started.set()
+            release.wait(5)
+
+    runner = threading.Thread(target=turn)
+    runner.start()
+    started.wait(5)
+    workflow = pool.get('a')
+    clearer = threading.Thread(target=pool.clear, args=('a',))
+    clearer.start()
+    clearer.join(0.1)
+    assert clearer.is_alive() and workflow.cleared == 0
+    release.set()
+    runner.join(5)
+    clearer.join(5)
+    assert workflow.cleared == 1
+    # Reset in place: later turns serialize on the same lock
+    assert pool.get('a') is workflow
+
+
+def test_checkout_retries_when_workflow_was_evicted(pool, monkeypatch):
+    stale = pool.get('a')
+    pool._workflows.pop('a')
+    get = pool.get
+    calls = []
+
+    # The first lookup hands out the workflow as it was just before being evicted
+    def racing_get(chat_id):
+        calls.append(chat_id)
+        return stale if len(calls) == 1 else get(chat_id)
+
+    monkeypatch.setattr(pool, 'get', racing_get)
+    with pool.checkout('a') as workflow:
+        assert workflow is not stale
+        assert pool._workflows['a'] is workflow
+    assert not stale.lock.locked()
+
+
+def test_clear_unpooled_chat_drops_its_state(pool):
+    pool.clear('gone')
+    assert 'gone' not in pool
@@ -0,0 +1,75 @@
+import pytest
+
+from GraphAgent.router import FastPathRouter, ROUTE_CONFIDENCE_THRESHOLD
+
+
+@pytest.fixture
+def router():
+    return FastPathRouter()
+
+
+@pytest.mark.parametrize('text', [
+    "I need to understand photosynthesis",
+    "I have to study for my exam, can you explain derivatives?",
+    "What assignments are typical in a calculus course?",
+    "how do I remember to take breaks while studying",
+    "how do I delete a task?",
+    "what is a good way to track my tasks?",
+    "Deadlines stress me out, any advice?",
+])
+def test_study_questions_defer_to_llm(router, text):
+    assert router.route(text) is None
+
+
+@pytest.mark.parametrize('text, rule', [
+    ("add a task to finish my lab report by Friday", 'task_create'),
+    ("Please create a new assignment for chemistry due tomorrow", 'task_create'),
+    ("remind me to email my tutor", 'task_create'),
+    ("add milk to my todo list", 'task_create'),
+    ("show my pending tasks", 'task_query'),
+    ("what are my deadlines this week?", 'task_query'),
+    ("do I have any overdue tasks?", 'task_query'),
+    ("mark the essay task as done", 'task_update'),
+    ("update the math task progress to 50", 'task_update'),
+    ("delete the chemistry assignment", 'task_delete'),
+])
+def test_task_commands_take_fast_path(router, text, rule):
+    decision = router.route(text)
+    assert decision is not None
+    assert (decision.decision, decision.rule) == ('tasks', rule)
+    assert decision.confidence >= ROUTE_CONFIDENCE_THRESHOLD
+
+
+def test_confidence_reflects_position_of_command(router):
+    leading = router.route("list all my tasks")
+    embedded = router.route("could you list all my tasks")
+    assert leading.confidence > embedded.confidence
+
+
+def test_mixed_task_and_planning_intent_is_not_routed_to_tasks(router):
+    decision = router.route("add a task and create a study schedule")
+    assert decision is None or decision.decision == 'query'
+
+
+def test_smalltalk_and_crew_rules(router):
+    assert router.route("thanks!").decision == 'respond'
+    assert router.route("create a study schedule for next week").decision == 'query'
+    assert router.route("hi, add a task for tomorrow") is None
+
+
+def test_stats_count_hits_and_fallbacks(router):
+    router.route("hello")
+    router.route("I need to understand photosynthesis")
+    stats = router.stats()
+    assert stats['hits'] == 1
+    assert stats['fallbacks'] == 1
+    assert stats['rules'] == {'smalltalk': 1}
+
+
+def test_turn_deferred_to_llm_counts_one_fallback(router):
+    # respond_or_query runs again after the crew answers an LLM-routed turn
+    text = "I need to understand photosynthesis"
+    assert router.route(text) is None
+    assert router.route(text, deferred_to_llm=True) is None
+    stats = router.stats()
+    assert (stats['hits'], stats['fallbacks']) == (0, 1)
@@ -0,0 +1,70 @@
+import pytest
+
+from backendcrew.routing import AgentResolver, RoutingCache, normalize_text
+
+AGENTS = {
+    'schedule_agent': {'role': 'Schedule Manager'},
+    'misc_agent': {'role': 'Miscellaneous Task Manager'},
+    'manager_agent': {'role': 'Study Crew Manager'},
+    'task_agent': {'role': 'Task Manager'},
+    'query_clarification_agent': {'role': 'Query Clarification Agent'},
+}
+
+
+@pytest.fixture
+def resolver():
+    return AgentResolver(AGENTS)
+
+
+def test_normalize_text():
+    assert normalize_text('  Task_Agent!\n') == 'task agent'
+
+
+def test_manager_is_never_a_candidate(resolver):
+    assert 'manager_agent' not in resolver.agent_keys
+    assert resolver.resolve('Study Crew Manager')[0] != 'manager_agent'
+
+
+@pytest.mark.parametrize('output, expected', [
+    ('task_agent', 'task_agent'),
+    ('Task Manager', 'task_agent'),
+    ('I would delegate this to the schedule agent.', 'schedule_agent'),
+    ('Miscellaneous Task Manager', 'misc_agent'),
+    ('query clarification', 'query_clarification_agent'),
+    ('schedul_agent', 'schedule_agent'),
+])
+def test_resolves_keys_roles_and_near_misses(resolver, output, expected):
+    agent, confidence = resolver.resolve(output)
+    assert agent == expected
+    assert confidence >= resolver.threshold
+
+
+def test_longest_role_mentioned_wins_regardless_of_config_order():
+    resolver = AgentResolver({'task_agent': {'role': 'Task Manager'}, 'misc_agent': {'role': 'Miscellaneous Task Manager'}})
+    assert resolver.resolve('I would hand this to the Miscellaneous Task Manager.')[0] == 'misc_agent'
+    assert resolver.resolve('I would hand this to the Task Manager.')[0] == 'task_agent'
+
+
+@pytest.mark.parametrize('output', ['', None, 'I am not sure what to do here', 'banana'])
+def test_unconfident_output_resolves_to_none(resolver, output):
+    agent, confidence = resolver.resolve(output)
+    assert agent is None
+    assert confidence < resolver.threshold
+
+
+def test_cache_hits_on_normalized_query():
+    cache = RoutingCache()
+    assert cache.get('Add a task!') is None
+    cache.put('Add a task!', 'task_agent')
+    assert cache.get('add a TASK') == 'task_agent'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RoutingCache(max_size=2)
+    cache.put('one', 'a')
+    cache.put('two', 'b')
+    cache.get('one')
+    cache.put('three', 'c')
+    assert cache.get('two') is None
+    assert cache.get('one') == 'a' and cache.get('three') == 'c'
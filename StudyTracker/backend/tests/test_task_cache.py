@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from backendcrew import task_cache as task_cache_module
+from backendcrew.task_cache import TaskReadCache
+
+
+@pytest.fixture
+def cache():
+    return TaskReadCache(ttl=60, max_size=2)
+
+
+def test_hit_returns_a_copy(cache):
+    key = cache.make_key('query', {'completed': False})
+    cache.put(key, {'tasks': [1]}, cache.version)
+    first = cache.get(key)
+    first['tasks'].append(2)
+    assert cache.get(key) == {'tasks': [1]}
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_make_key_is_order_independent():
+    due = datetime(2024, 5, 1)
+    assert TaskReadCache.make_key('q', {'a': 1, 'b': due}) == TaskReadCache.make_key('q', {'b': due, 'a': 1})
+
+
+def test_invalidate_drops_entries(cache):
+    cache.put('k', 'v', cache.version)
+    cache.invalidate()
+    assert cache.get('k') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_put_read_before_a_write_is_discarded(cache):
+    # A slow reader started before the write finishes after it
+    version = cache.version
+    cache.invalidate()
+    cache.put('k', 'stale', version)
+    assert cache.get('k') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_entries_expire_after_ttl(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(task_cache_module.time, 'monotonic', lambda: now[0])
+    cache.put('k', 'v', cache.version)
+    now[0] += 59
+    assert cache.get('k') == 'v'
+    now[0] += 2
+    assert cache.get('k') is None
+
+
+def test_lru_eviction(cache):
+    for key in ('a', 'b'):
+        cache.put(key, key, cache.version)
+    cache.get('a')
+    cache.put('c', 'c', cache.version)
+    assert cache.get('b') is None and cache.get('a') == 'a'
+    assert cache.stats()['evictions'] == 1
+
+
+@pytest.mark.parametrize('ttl, max_size', [(0, 10), (60, 0)])
+def test_disabled_cache_stores_nothing(ttl, max_size):
+    cache = TaskReadCache(ttl=ttl, max_size=max_size)
+    cache.put('k', 'v', cache.version)
+    assert not cache.enabled
+    assert cache.get('k') is None
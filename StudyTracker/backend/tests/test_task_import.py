@@ -0,0 +1,98 @@
+from datetime import datetime
+import csv
+import io
+
+import mongomock
+import pytest
+
+from backendcrew import task_query
+from backendcrew.task_import import ImportFileError, import_tasks, iter_import, parse_csv, parse_ics
+
+CSV = """Name,Due Date,Category,Notes,Done
+Essay draft,2024-05-01,Homework,Intro and outline,no
+Lab report,2024-05-03T17:00,,,yes
+No date,,Homework,,
+"""
+
+ICS = """BEGIN:VCALENDAR
+BEGIN:VTODO
+SUMMARY:Read chapter 4
+DUE:20240502T090000Z
+PRIORITY:1
+STATUS:COMPLETED
+END:VTODO
+BEGIN:VEVENT
+SUMMARY:Midterm\\, part 1
+DTSTART:20240510
+CATEGORIES:Exam,Math
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+@pytest.fixture
+def collection():
+    tasks = mongomock.MongoClient().studytracker_test.taskEntries
+    task_query._indexed_collections.discard(tasks.full_name)
+    return tasks
+
+
+def test_parse_csv_maps_loose_headers():
+    rows = list(parse_csv(CSV.splitlines()))
+    assert [line for line, _ in rows] == [2, 3, 4]
+    assert rows[0][1] == {'title': 'Essay draft', 'dueDate': '2024-05-01', 'type': 'Homework',
+                          'description': 'Intro and outline', 'completed': False}
+    # Missing description/type are filled in
+    assert rows[1][1]['description'] == 'Lab report' and rows[1][1]['type'] == 'Task'
+
+
+def test_parse_ics_reads_todos_and_events():
+    (todo_line, todo), (event_line, event) = parse_ics(ICS.splitlines())
+    assert (todo_line, event_line) == (2, 8)
+    assert todo == {'title': 'Read chapter 4', 'dueDate': '2024-05-02T09:00:00', 'priority': 'High',
+                    'completed': True, 'description': 'Read chapter 4', 'type': 'Task'}
+    assert event['title'] == 'Midterm, part 1'
+    assert event['type'] == 'Exam' and event['dueDate'] == '2024-05-10'
+
+
+def test_import_validates_and_reports_by_line(collection):
+    report = import_tasks(parse_csv(CSV.splitlines()), collection)
+    assert report['processed'] == 3 and report['inserted'] == 2 and report['invalid'] == 1
+    assert report['errors'] == [{'line': 4, 'error': 'Missing required fields: dueDate'}]
+    stored = collection.find_one({'title': 'Essay draft'})
+    assert stored['dueDate'] == datetime(2024, 5, 1, 23, 59)
+    assert stored['title_tokens'] == ['essay', 'draft'] and stored['type_key'] == 'homework'
+
+
+def test_iter_import_yields_a_report_per_chunk(collection):
+    records = ((line, {'title': f'Task {line}', 'description': 'x', 'type': 'Homework', 'dueDate': '2024-05-01'})
+               for line in range(1, 6))
+    inserts = []
+    reports = list(iter_import(records, collection, chunk_size=2, on_insert=lambda: inserts.append(1)))
+    assert [report['processed'] for report in reports] == [2, 4, 5]
+    assert reports[-1]['inserted'] == 5
+    assert len(inserts) == 3
+
+
+def test_on_insert_skipped_for_chunks_without_inserts(collection):
+    inserts = []
+    report = import_tasks([(1, {'title': 'x'})], collection, on_insert=lambda: inserts.append(1))
+    assert report['invalid'] == 1 and inserts == []
+
+
+def test_malformed_csv_row_reports_progress_so_far(collection):
+    rows = ['Name,Due Date', 'Essay draft,2024-05-01', 'x' * (csv.field_size_limit() + 1)]
+    with pytest.raises(ImportFileError) as error:
+        import_tasks(parse_csv(rows), collection, chunk_size=1)
+    assert str(error.value).startswith('Could not read the file: field larger than field limit')
+    assert error.value.report['inserted'] == 1
+    assert collection.count_documents({}) == 1
+
+
+def test_file_that_is_not_utf8_raises_import_file_error(collection):
+    # As app.import_tasks wraps the upload
+    lines = io.TextIOWrapper(io.BytesIO(b'Name,Due Date\nEssay \xff,2024-05-01\n'), encoding='utf-8-sig', newline='')
+    with pytest.raises(ImportFileError) as error:
+        import_tasks(parse_csv(lines), collection)
+    assert "can't decode byte 0xff" in str(error.value)
+    assert error.value.report['processed'] == 0
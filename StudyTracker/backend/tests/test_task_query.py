@@ -0,0 +1,174 @@
+from datetime import datetime
+import os
+
+import mongomock
+import pytest
+from pymongo import MongoClient
+
+from backendcrew import task_query
+from backendcrew.task_query import (
+    assert_index_backed, compile_task_filter, due_date_range, ensure_task_indexes,
+    keyword_filter, legacy_due_date_string, search_tokens, with_search_fields,
+)
+
+NOW = datetime(2024, 5, 15, 12, 0)
+
+TASKS = [
+    {'title': 'Mathematics Homework', 'description': 'Exercises 5-10, chapter 4', 'type': 'Homework',
+     'dueDate': datetime(2024, 5, 16, 23, 59), 'priority': 'High', 'completed': False},
+    {'title': 'Intro to Calculus reading', 'description': 'Read the limits chapter', 'type': 'Reading',
+     'dueDate': datetime(2024, 5, 10, 23, 59), 'priority': 'Low', 'completed': False},
+    {'title': 'Chemistry lab report', 'description': 'Aftermath of the titration', 'type': 'homework',
+     'dueDate': '2024-05-20T23:59:00.000Z', 'priority': 'Medium', 'completed': True},
+]
+
+
+def _collection(client):
+    collection = client.studytracker_test.taskEntries
+    collection.drop()
+    task_query._indexed_collections.discard(collection.full_name)
+    return collection
+
+
+@pytest.fixture
+def tasks():
+    collection = _collection(mongomock.MongoClient())
+    collection.insert_many([with_search_fields(task) for task in TASKS])
+    return collection
+
+
+def titles(collection, query):
+    return sorted(task['title'] for task in collection.find(query))
+
+
+def _predicates(query):
+    """Every field predicate in a compiled filter, descending through $and/$or."""
+    for key, value in query.items():
+        if key in ('$and', '$or'):
+            for clause in value:
+                yield from _predicates(clause)
+        else:
+            yield key, value
+
+
+def test_search_tokens_are_lowercase_unique_words():
+    assert search_tokens('Math HW-2: math, Ünit_3') == ['math', 'hw', '2', 'ünit', '3']
+
+
+def test_with_search_fields_derives_only_present_fields():
+    assert with_search_fields({'progress': 50}) == {'progress': 50}
+    updated = with_search_fields({'title': 'Essay Draft', 'type': ' Essay '})
+    assert updated['title_tokens'] == ['essay', 'draft']
+    assert updated['type_key'] == 'essay'
+    assert updated['type'] == ' Essay '
+    assert 'description_tokens' not in updated
+
+
+@pytest.mark.parametrize('params', [
+    {'title': 'Math'},
+    {'description': 'intro calc'},
+    {'type': 'Homework'},
+    {'title': 'lab', 'type': 'HOMEWORK', 'status': 'completed'},
+])
+def test_text_filters_are_anchored_and_case_sensitive(params):
+    for field, predicate in _predicates(compile_task_filter(params, NOW)):
+        if field.endswith('_tokens'):
+            assert predicate['$regex'].startswith('^')
+        if isinstance(predicate, dict):
+            assert '$options' not in predicate
+        assert field not in ('title', 'description', 'type')
+
+
+def test_title_matches_word_prefix(tasks):
+    assert titles(tasks, compile_task_filter({'title': 'math'}, NOW)) == ['Mathematics Homework']
+    # Substrings inside a word are not word matches
+    assert titles(tasks, compile_task_filter({'title': 'ematics'}, NOW)) == []
+
+
+def test_multi_word_search_requires_every_word(tasks):
+    assert titles(tasks, compile_task_filter({'title': 'Intro calc'}, NOW)) == ['Intro to Calculus reading']
+    assert titles(tasks, compile_task_filter({'title': 'Intro chem'}, NOW)) == []
+
+
+def test_punctuation_only_search_matches_nothing(tasks):
+    assert titles(tasks, compile_task_filter({'title': '!!!'}, NOW)) == []
+
+
+def test_type_is_case_insensitive_equality(tasks):
+    query = compile_task_filter({'type': 'HOMEWORK'}, NOW)
+    assert query == {'type_key': 'homework'}
+    assert titles(tasks, query) == ['Chemistry lab report', 'Mathematics Homework']
+
+
+def test_keyword_searches_title_and_description(tasks):
+    assert titles(tasks, keyword_filter('chapter')) == ['Intro to Calculus reading', 'Mathematics Homework']
+    assert titles(tasks, keyword_filter('aftermath')) == ['Chemistry lab report']
+
+
+def test_status_filters_match_native_and_legacy_dates(tasks):
+    assert titles(tasks, compile_task_filter({'status': 'overdue'}, NOW)) == ['Intro to Calculus reading']
+    assert titles(tasks, compile_task_filter({'status': 'pending', 'type': 'homework'}, NOW)) == ['Mathematics Homework']
+
+
+def test_due_date_range_reads_legacy_strings(monkeypatch):
+    bounds = {'$gte': datetime(2024, 5, 1), '$lt': datetime(2024, 6, 1)}
+    monkeypatch.setattr(task_query, 'TASK_DATES_DUAL_READ', True)
+    assert due_date_range(bounds) == {'$or': [
+        {'dueDate': bounds},
+        {'dueDate': {'$gte': '2024-05-01T00:00:00.000Z', '$lt': '2024-06-01T00:00:00.000Z'}},
+    ]}
+    monkeypatch.setattr(task_query, 'TASK_DATES_DUAL_READ', False)
+    assert due_date_range(bounds) == {'dueDate': bounds}
+
+
+def test_due_window_and_explicit_bounds_intersect():
+    query = compile_task_filter({'due': 'this_week', 'due_before': '2024-05-15'}, NOW)
+    native = query['$or'][0]['dueDate']
+    # Date-only bounds mean 23:59, the same as a stored date-only dueDate
+    assert native == {'$gte': datetime(2024, 5, 13), '$lt': datetime(2024, 5, 15, 23, 59)}
+    assert legacy_due_date_string(native['$lt']) == '2024-05-15T23:59:00.000Z'
+
+
+def test_due_bounds_accept_one_digit_month_and_day(tasks):
+    # parse_task_date (and so validate_search_params) accepts these; fromisoformat did not
+    query = compile_task_filter({'due_after': '2024-5-1', 'due_before': '2024-5-12T0:00'}, NOW)
+    assert query['$or'][0]['dueDate'] == {'$gte': datetime(2024, 5, 1, 23, 59), '$lt': datetime(2024, 5, 12)}
+    assert titles(tasks, query) == ['Intro to Calculus reading']
+
+
+def test_ensure_indexes_backfills_tasks_written_without_search_fields():
+    collection = _collection(mongomock.MongoClient())
+    # As written by the frontend before it maintained the search fields
+    collection.insert_one({'title': 'Biology Quiz', 'description': 'Cells', 'type': 'Quiz'})
+    ensure_task_indexes(collection)
+    task = collection.find_one()
+    assert task['title_tokens'] == ['biology', 'quiz']
+    assert task['type_key'] == 'quiz'
+    assert titles(collection, compile_task_filter({'title': 'bio', 'type': 'QUIZ'}, NOW)) == ['Biology Quiz']
+
+
+@pytest.mark.skipif(not os.getenv('TEST_MONGODB_URI'), reason='explain needs a real mongod (set TEST_MONGODB_URI)')
+@pytest.mark.parametrize('params', [
+    {'title': 'Math'},
+    {'title': 'Intro calc'},
+    {'description': 'chapter'},
+    {'type': 'Homework'},
+    {'type': 'homework', 'status': 'pending'},
+    {'priority': 'High'},
+])
+def test_search_plans_examine_a_bounded_number_of_keys(params):
+    client = MongoClient(os.environ['TEST_MONGODB_URI'])
+    collection = _collection(client)
+    filler = [with_search_fields({'title': f'Filler task {i}', 'description': f'Nothing to see {i}',
+                                  'type': f'Other{i % 50}', 'priority': 'Low',
+                                  'dueDate': datetime(2024, 1, 1), 'completed': True})
+              for i in range(2000)]
+    collection.insert_many(filler + [with_search_fields(task) for task in TASKS])
+    ensure_task_indexes(collection)
+    try:
+        # A handful of matches, so an unbounded IXSCAN over ~2000 keys fails the check
+        assert_index_backed(collection, compile_task_filter(params, NOW), [('dueDate', 1)], max_keys_examined=20)
+        assert_index_backed(collection, keyword_filter('chapter'), max_keys_examined=20)
+    finally:
+        collection.drop()
+        client.close()
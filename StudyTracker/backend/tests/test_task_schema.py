@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from backendcrew.task_schema import DATE_FORMAT_ERROR, TASK_SCHEMA, parse_task_date
+
+TASK = {'title': 'Essay', 'description': 'Draft intro', 'type': 'Homework', 'dueDate': '2024-05-01'}
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-05-01T14:30:15', datetime(2024, 5, 1, 14, 30, 15)),
+    ('2024-05-01T14:30', datetime(2024, 5, 1, 14, 30)),
+    ('2024-05-01', datetime(2024, 5, 1, 23, 59)),
+    ('2024-5-1T9:05', datetime(2024, 5, 1, 9, 5)),
+    (datetime(2024, 5, 1, 8), datetime(2024, 5, 1, 8)),
+])
+def test_parse_task_date_accepts_the_three_formats(value, expected):
+    assert parse_task_date(value) == (True, expected)
+
+
+@pytest.mark.parametrize('value', ['2024-02-30', '05/01/2024', '2024-05-01 14:30', '2024-05-01T25:00', 20240501, None])
+def test_parse_task_date_rejects_without_raising(value):
+    assert parse_task_date(value) == (False, DATE_FORMAT_ERROR)
+
+
+def test_validate_returns_cleaned_copy():
+    data = dict(TASK, progress='40', completed='True')
+    is_valid, _, cleaned = TASK_SCHEMA.validate(data)
+    assert is_valid
+    assert cleaned['dueDate'] == datetime(2024, 5, 1, 23, 59)
+    assert cleaned['progress'] == 40 and cleaned['completed'] is True
+    assert data['dueDate'] == '2024-05-01'
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'title': 'Essay'}, 'Missing required fields: description, type, dueDate'),
+    (dict(TASK, title='  '), 'Invalid title: must be non-empty string'),
+    (dict(TASK, priority='Urgent'), 'Invalid priority. Must be one of: High, Medium, Low'),
+    (dict(TASK, progress=101), 'Progress must be between 0 and 100'),
+    (dict(TASK, progress=True), 'Progress must be an integer'),
+    (dict(TASK, completed='maybe'), 'Completed must be a boolean'),
+    ('not a dict', 'Task data must be a dictionary'),
+])
+def test_validate_errors(data, message):
+    assert TASK_SCHEMA.validate(data) == (False, message, {})
+
+
+def test_partial_validation_skips_required_fields():
+    assert TASK_SCHEMA.validate({'progress': 50}, partial=True) == (True, 'Valid task data', {'progress': 50})
+
+
+def test_validate_many_reports_errors_by_index():
+    valid, errors = TASK_SCHEMA.validate_many([TASK, {'title': 'x'}, dict(TASK, title='Lab')])
+    assert [index for index, _ in valid] == [0, 2]
+    assert valid[1][1]['title'] == 'Lab'
+    assert errors == [{'index': 1, 'error': 'Missing required fields: description, type, dueDate'}]
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from backendcrew.task_stats import (
+    DUE_DATE_EXPRESSION, query_tasks_with_stats, task_stats_pipeline, validate_page_options,
+)
+
+NOW = datetime(2024, 5, 15, 12, 0)
+
+
+def _stage_index(pipeline, name):
+    return next(index for index, stage in enumerate(pipeline) if name in stage)
+
+
+@pytest.mark.parametrize('sort_by', ['dueDate', 'priority'])
+def test_sort_uses_due_date_normalized_before_sorting(sort_by):
+    pipeline = task_stats_pipeline({'completed': False}, NOW, sort_by=sort_by)
+    due = next(index for index, stage in enumerate(pipeline)
+               if stage.get('$addFields', {}).get('_due') == DUE_DATE_EXPRESSION)
+    sort = _stage_index(pipeline, '$sort')
+    assert pipeline[0] == {'$match': {'completed': False}}
+    assert due < sort
+    assert '_due' in pipeline[sort]['$sort']
+    assert 'dueDate' not in pipeline[sort]['$sort']
+
+
+def test_descending_due_sort():
+    pipeline = task_stats_pipeline({}, NOW, descending=True)
+    assert pipeline[_stage_index(pipeline, '$sort')]['$sort'] == {'_due': -1, '_id': 1}
+
+
+def test_page_fetches_one_extra_task():
+    pipeline = task_stats_pipeline({}, NOW, limit=5, skip=10, fields=('title',))
+    page = pipeline[_stage_index(pipeline, '$facet')]['$facet']['tasks']
+    assert page == [{'$skip': 10}, {'$limit': 6}, {'$project': {'title': 1}}]
+
+
+def test_stats_query_may_spill_the_sort_to_disk():
+    calls = []
+
+    class Collection:
+        def aggregate(self, pipeline, **options):
+            calls.append(options)
+            return iter([{'by_status': [{'_id': 'pending', 'count': 1}], 'tasks': [{'title': 'Essay'}]}])
+
+    counts, tasks, next_cursor = query_tasks_with_stats(Collection(), {}, NOW)
+    assert calls == [{'allowDiskUse': True}]
+    assert counts['pending'] == 1 and tasks == [{'title': 'Essay'}] and next_cursor is None
+
+
+@pytest.mark.parametrize('options, message', [
+    ({'limit': 0}, 'Limit must be between'),
+    ({'cursor': 'abc'}, 'Invalid cursor'),
+    ({'fields': ['title', 'secret']}, 'Unknown fields: secret'),
+    ({'sort_by': 'title'}, 'Invalid sort_by'),
+])
+def test_invalid_page_options(options, message):
+    is_valid, error, _ = validate_page_options(options)
+    assert not is_valid
+    assert error.startswith(message)
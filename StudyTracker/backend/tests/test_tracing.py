@@ -0,0 +1,93 @@
+import pytest
+
+import tracing
+from tracing import (
+    Counter, Histogram, MetricsRegistry, TraceBuffer, current_span, record_span, render_gauges, span, traced,
+)
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    kept = TraceBuffer(size=10, sample_rate=1.0)
+    monkeypatch.setattr(tracing, 'trace_buffer', kept)
+    return kept
+
+
+def test_histogram_render_is_cumulative_with_inf_bucket():
+    histogram = Histogram('latency_seconds', 'Request latency', label_names=('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, route='/chat')
+    assert histogram.render() == [
+        '# HELP latency_seconds Request latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/chat",le="0.1"} 1',
+        'latency_seconds_bucket{route="/chat",le="1.0"} 3',
+        'latency_seconds_bucket{route="/chat",le="+Inf"} 4',
+        'latency_seconds_sum{route="/chat"} 4.050000',
+        'latency_seconds_count{route="/chat"} 4',
+    ]
+
+
+def test_histogram_without_labels_and_escaping():
+    histogram = Histogram('h', 'help', buckets=(1,))
+    histogram.observe(0.5)
+    assert histogram.render()[2] == 'h_bucket{le="1"} 1'
+    counter = Counter('c', 'help', label_names=('path',))
+    counter.inc(path='a"b\\c\n')
+    assert counter.render()[2] == 'c{path="a\\"b\\\\c\\n"} 1'
+
+
+def test_registry_reuses_metrics_by_name():
+    registry = MetricsRegistry()
+    assert registry.counter('hits', 'Hits') is registry.counter('hits', 'Hits')
+    registry.counter('hits', 'Hits').inc(2)
+    assert 'hits 2\n' in registry.render()
+
+
+def test_render_gauges_flattens_numeric_leaves():
+    assert render_gauges('pool', {'size': 2, 'cache': {'hit-rate': 0.5}, 'name': 'x'}) == (
+        '# TYPE pool_size gauge\npool_size 2.0\n'
+        '# TYPE pool_cache_hit_rate gauge\npool_cache_hit_rate 0.5\n'
+    )
+
+
+def test_nested_spans_form_one_trace(buffer):
+    with span('outer', chat_id='c1') as outer:
+        with span('inner'):
+            record_span('mongo.find', 0.002)
+        assert current_span() is outer
+    assert current_span() is None
+    (trace,) = buffer.recent()
+    assert trace['name'] == 'outer' and trace['attributes'] == {'chat_id': 'c1'}
+    inner = trace['children'][0]
+    assert inner['name'] == 'inner'
+    assert inner['children'][0]['name'] == 'mongo.find'
+
+
+def test_failed_traces_are_always_kept(buffer):
+    buffer.sample_rate = 0.0
+    with pytest.raises(ValueError):
+        with span('turn'):
+            raise ValueError('boom')
+    with span('quiet'):
+        pass
+    (trace,) = buffer.recent()
+    assert trace['error'] == 'ValueError: boom'
+    assert buffer.stats()['finished'] == 2
+
+
+def test_traced_decorator_and_duration_metric(buffer):
+    @traced('unit.work')
+    def work():
+        return current_span().name
+
+    assert work() == 'unit.work'
+    assert 'studybuddy_span_duration_seconds_count{span="unit.work"}' in tracing.metrics.render()
+
+
+def test_recent_limit_takes_newest_and_never_the_whole_buffer(buffer):
+    for name in ('a', 'b', 'c'):
+        with span(name):
+            pass
+    assert [trace['name'] for trace in buffer.recent(2)] == ['c', 'b']
+    assert buffer.recent(0) == [] and buffer.recent(-1) == []
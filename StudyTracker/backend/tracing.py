@@ -0,0 +1,342 @@
+"""In-process tracing and Prometheus-text metrics.
+
+span(name, **attributes) times a block. Spans opened inside another span
+become its children, so each HTTP request (or background job) produces one
+trace. This holds across the LangGraph worker threads too, since they copy
+the caller's context. Every finished span feeds the
+studybuddy_span_duration_seconds histogram, labelled by span name.
+
+A sample of finished traces (TRACE_SAMPLE_RATE, plus every trace that
+failed) is kept in a ring buffer of TRACE_BUFFER_SIZE entries for /traces.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
+import os
+import random
+import re
+import threading
+import time
+
+__all__ = [
+    'Histogram',
+    'Counter',
+    'MetricsRegistry',
+    'metrics',
+    'Span',
+    'TraceBuffer',
+    'trace_buffer',
+    'open_span',
+    'close_span',
+    'span',
+    'traced',
+    'record_span',
+    'current_span',
+    'set_attributes',
+    'render_gauges',
+]
+
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '200'))
+# Children kept per span; a crew run can issue hundreds of Mongo commands
+MAX_SPAN_CHILDREN = 200
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_METRIC_NAME = re.compile(r'[^a-zA-Z0-9_]+')
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _bound(value) -> str:
+    return f'le="{value}"'
+
+
+class Histogram:
+    """Cumulative Prometheus histogram, one series per label combination."""
+
+    def __init__(self, name: str, help: str, label_names: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, then sum and count
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, key, _bound(bound))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_labels(self.label_names, key, _bound("+Inf"))} {values[-1]}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, key)} {values[-2]:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, key)} {values[-1]}')
+        return lines
+
+
+class Counter:
+    """Monotonic Prometheus counter, one series per label combination."""
+
+    def __init__(self, name: str, help: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = dict(self._series)
+        for key, value in sorted(series.items()):
+            lines.append(f'{self.name}{_labels(self.label_names, key)} {value}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named histograms and counters, rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _get_or_create(self, name: str, factory: Callable[[], object]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def histogram(self, name: str, help: str, label_names: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, label_names, buckets))
+
+    def counter(self, name: str, help: str, label_names: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help, label_names))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def render_gauges(prefix: str, stats: dict) -> str:
+    """Render the numeric leaves of a stats() dict as gauges named prefix_key[_subkey]."""
+    lines = []
+
+    def walk(name: str, value) -> None:
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(f'{name}_{key}', child)
+        elif isinstance(value, (bool, int, float)):
+            metric = _METRIC_NAME.sub('_', name).strip('_').lower()
+            lines.append(f'# TYPE {metric} gauge')
+            lines.append(f'{metric} {float(value)}')
+
+    walk(prefix, stats)
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+metrics = MetricsRegistry()
+span_duration = metrics.histogram(
+    'studybuddy_span_duration_seconds', 'Duration of traced operations', label_names=('span',)
+)
+span_errors = metrics.counter(
+    'studybuddy_span_errors_total', 'Traced operations that raised or reported an error', label_names=('span',)
+)
+
+
+class Span:
+    __slots__ = ('name', 'attributes', 'trace_id', 'start', 'duration', 'error', 'children', 'dropped')
+
+    def __init__(self, name: str, attributes: dict, trace_id: str):
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = trace_id
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.children: List['Span'] = []
+        self.dropped = 0
+
+    def add_child(self, child: 'Span') -> None:
+        if len(self.children) < MAX_SPAN_CHILDREN:
+            self.children.append(child)
+        else:
+            self.dropped += 1
+
+    def to_dict(self, origin: Optional[float] = None) -> dict:
+        origin = self.start if origin is None else origin
+        data = {
+            'name': self.name,
+            'offset_ms': round((self.start - origin) * 1000, 2),
+            'duration_ms': round(self.duration * 1000, 2) if self.duration is not None else None,
+        }
+        if self.attributes:
+            data['attributes'] = self.attributes
+        if self.error:
+            data['error'] = self.error
+        if self.children:
+            data['children'] = [child.to_dict(origin) for child in list(self.children)]
+        if self.dropped:
+            data['dropped_children'] = self.dropped
+        return data
+
+
+class TraceBuffer:
+    """Ring buffer of sampled finished traces; traces with an error are always kept."""
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._traces = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.finished = 0
+        self.sampled = 0
+
+    @staticmethod
+    def _has_error(root: Span) -> bool:
+        return bool(root.error) or any(TraceBuffer._has_error(child) for child in list(root.children))
+
+    def offer(self, root: Span) -> None:
+        keep = random.random() < self.sample_rate or self._has_error(root)
+        with self._lock:
+            self.finished += 1
+            if keep:
+                self.sampled += 1
+                self._traces.append(root)
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        if limit < 1:
+            # [-0:] would be the whole buffer and a negative limit skips the newest
+            return []
+        with self._lock:
+            roots = list(self._traces)[-limit:]
+        return [{'trace_id': root.trace_id, 'started_at': root.start, **root.to_dict()} for root in reversed(roots)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'buffered': len(self._traces),
+                'finished': self.finished,
+                'sampled': self.sampled,
+                'sample_rate': self.sample_rate,
+            }
+
+
+trace_buffer = TraceBuffer()
+
+_current: ContextVar[Optional[Span]] = ContextVar('tracing_current_span', default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def set_attributes(**attributes) -> None:
+    """Annotate the innermost open span, if any."""
+    active = _current.get()
+    if active is not None:
+        active.attributes.update(attributes)
+
+
+def open_span(name: str, **attributes) -> Tuple[Span, Token]:
+    """Start a span under the current one (or a new trace); pair with close_span."""
+    parent = _current.get()
+    active = Span(name, attributes, parent.trace_id if parent is not None else uuid4().hex)
+    if parent is not None:
+        parent.add_child(active)
+    return active, _current.set(active)
+
+
+def close_span(active: Span, token: Token, error: Optional[BaseException] = None) -> None:
+    active.duration = time.time() - active.start
+    if error is not None and not active.error:
+        active.error = f'{type(error).__name__}: {error}'
+    parent = None if token.old_value is Token.MISSING else token.old_value
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Closed from another context (e.g. a streamed response finishing elsewhere)
+        if _current.get() is active:
+            _current.set(parent)
+    span_duration.observe(active.duration, span=active.name)
+    if active.error:
+        span_errors.inc(span=active.name)
+    if parent is None:
+        trace_buffer.offer(active)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    active, token = open_span(name, **attributes)
+    error = None
+    try:
+        yield active
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        close_span(active, token, error)
+
+
+def traced(name: str, **attributes):
+    """Decorator running the function inside span(name)."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name: str, duration: float, error: Optional[str] = None, **attributes) -> None:
+    """Record an operation timed elsewhere (e.g. by a driver event) as a finished child span."""
+    parent = _current.get()
+    if parent is not None:
+        finished = Span(name, attributes, parent.trace_id)
+        finished.start = time.time() - duration
+        finished.duration = duration
+        finished.error = error
+        parent.add_child(finished)
+    span_duration.observe(duration, span=name)
+    if error:
+        span_errors.inc(span=name)
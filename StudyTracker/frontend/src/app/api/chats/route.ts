@@ -2,11 +2,19 @@ import { NextResponse } from 'next/server'
 
 const BASE_URL = 'http://localhost:5000'
 
-export async function GET() {
+// The backend pages chats newest first (?limit=&cursor=) and returns the
+// cursor for the next page in the X-Next-Cursor header
+export async function GET(request: Request) {
     try {
-        const response = await fetch(`${BASE_URL}/chats`)
+        const { searchParams } = new URL(request.url)
+        const query = searchParams.toString()
+        const response = await fetch(`${BASE_URL}/chats${query ? `?${query}` : ''}`)
         const data = await response.json()
-        return NextResponse.json(data)
+        const nextCursor = response.headers.get('X-Next-Cursor')
+        return NextResponse.json(data, {
+            status: response.status,
+            headers: nextCursor ? { 'X-Next-Cursor': nextCursor } : undefined,
+        })
     } catch (error) {
         console.error('Error in GET route:', error)
         return NextResponse.json({ error: 'Failed to fetch chats' }, { status: 500 })
@@ -15,6 +15,25 @@ function isValidCollection(collection: string): boolean {
   return validCollections.includes(collection)
 }
 
+// Task search fields the backend's task tools query (see backendcrew/task_query.py).
+// title and type are stored as entered; these are the lowercase copies it indexes.
+const TOKEN = new RegExp('[\\p{L}\\p{N}]+', 'gu')
+
+function searchTokens(text: unknown): string[] {
+  return Array.from(new Set(String(text ?? '').toLowerCase().match(TOKEN) ?? []))
+}
+
+function withSearchFields(collection: string, entry: Record<string, unknown>) {
+  if (collection !== 'taskEntries') {
+    return entry
+  }
+  const fields: Record<string, unknown> = {}
+  if ('title' in entry) fields.title_tokens = searchTokens(entry.title)
+  if ('description' in entry) fields.description_tokens = searchTokens(entry.description)
+  if ('type' in entry) fields.type_key = String(entry.type ?? '').trim().toLowerCase()
+  return { ...entry, ...fields }
+}
+
 // Helper function to add CORS headers
 function corsHeaders(response: NextResponse) {
   response.headers.set('Access-Control-Allow-Origin', '*')
@@ -83,7 +102,7 @@ export async function POST(request: Request, { params }: RouteParams) {
   try {
     const { db } = await connectToDatabase()
     const entry = await request.json()
-    const result = await db.collection(collection).insertOne(entry)
+    const result = await db.collection(collection).insertOne(withSearchFields(collection, entry))
     return corsHeaders(NextResponse.json({ _id: result.insertedId, ...entry }))
   } catch (error) {
     console.error('Error in POST route:', error)
@@ -105,7 +124,7 @@ export async function PUT(request: Request, { params }: RouteParams) {
 
     await db.collection(collection).updateOne(
       { _id: new ObjectId(_id) },
-      { $set: updateData }
+      { $set: withSearchFields(collection, updateData) }
     )
     return corsHeaders(NextResponse.json({ message: 'Entry updated successfully' }))
     } catch (error) {
@@ -43,7 +43,7 @@ export default function AIAssistantDashboard({ chatId }: { chatId?: string }) {
         body: JSON.stringify({ title: "DashChat" }),
       });
       const newChat = await response.json();
-      setChats((prev) => [...prev, newChat]);
+      setChats((prev) => [newChat, ...prev]);
       setCurrentChat(newChat);
     } catch (error) {
       toast({
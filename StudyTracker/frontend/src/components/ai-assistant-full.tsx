@@ -48,22 +48,72 @@ export default function AIAssistantFull({ chatId }: { chatId: string }) {
         setInput('')
         setIsLoading(true)
 
+        // Placeholder that the streamed tokens are appended to
+        const pendingId = `pending-${newMessage.id}`
+        const updatePending = (update: (message: Message) => Message) => {
+            setCurrentChat(prev => prev ? {
+                ...prev,
+                messages: prev.messages.map(m => m.id === pendingId ? update(m) : m)
+            } : null)
+        }
+
         try {
-            const response = await fetch(`http://localhost:5000/chats/${chatId}/messages`, {
+            const response = await fetch(`http://localhost:5000/chats/${chatId}/messages?stream=1`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream',
                 },
                 body: JSON.stringify(newMessage),
             })
             if (!response.ok) throw new Error('Failed to send message')
-            const data = await response.json()
+
+            // Commands such as /clear are answered with plain JSON
+            if (!response.headers.get('Content-Type')?.includes('text/event-stream') || !response.body) {
+                const data = await response.json()
+                setCurrentChat(prev => prev ? {
+                    ...prev,
+                    messages: [...prev.messages, data]
+                } : null)
+                return
+            }
 
             setCurrentChat(prev => prev ? {
                 ...prev,
-                messages: [...prev.messages, data]
+                messages: [...prev.messages, { id: pendingId, role: 'assistant', content: '' }]
             } : null)
+
+            const reader = response.body.getReader()
+            const decoder = new TextDecoder()
+            let buffer = ''
+            while (true) {
+                const { value, done } = await reader.read()
+                if (done) break
+                buffer += decoder.decode(value, { stream: true })
+
+                const events = buffer.split('\n\n')
+                buffer = events.pop() ?? ''
+                for (const raw of events) {
+                    const event = raw.match(/^event: (.*)$/m)?.[1]
+                    const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] ?? '{}')
+                    if (event === 'token') {
+                        updatePending(m => ({ ...m, content: m.content + data.content }))
+                    } else if (event === 'progress' && data.status === 'started') {
+                        updatePending(m => m.content ? m : { ...m, content: 'Consulting study agents...' })
+                    } else if (event === 'progress' && data.status === 'finished') {
+                        updatePending(m => ({ ...m, content: '' }))
+                    } else if (event === 'message') {
+                        updatePending(() => data)
+                    } else if (event === 'error') {
+                        throw new Error(data.error)
+                    }
+                }
+            }
         } catch (error) {
+            setCurrentChat(prev => prev ? {
+                ...prev,
+                messages: prev.messages.filter(m => m.id !== pendingId)
+            } : null)
             toast({
                 title: "Error",
                 description: "Failed to send message",
@@ -56,6 +56,8 @@ export default function AppSidebar() {
     const [isLoading, setIsLoading] = useState(false)
     const [mounted, setMounted] = useState(false)
     const [isUtilitiesMenuOpen, setIsUtilitiesMenuOpen] = useState(false)
+    const [nextCursor, setNextCursor] = useState<string | null>(null)
+    const [isLoadingMore, setIsLoadingMore] = useState(false)
 
     useEffect(() => {
         setMounted(true)
@@ -67,11 +69,22 @@ export default function AppSidebar() {
         setTheme(theme === 'dark' ? 'light' : 'dark')
     }
 
-    const fetchChats = React.useCallback(async () => {
+    // Chats come newest first, one page at a time; a cursor fetches the page after it
+    const fetchChats = React.useCallback(async (cursor?: string) => {
         try {
-            const response = await fetch('/api/chats')
+            const response = await fetch(cursor ? `/api/chats?cursor=${encodeURIComponent(cursor)}` : '/api/chats')
+            if (!response.ok) throw new Error(`Failed to fetch chats: ${response.status}`)
             const data = await response.json()
-            setChats(data)
+            if (cursor) {
+                // Skip chats already listed, e.g. ones created since the first page loaded
+                setChats(prevChats => [
+                    ...prevChats,
+                    ...data.filter((chat: {id: string}) => !prevChats.some(prev => prev.id === chat.id)),
+                ])
+            } else {
+                setChats(data)
+            }
+            setNextCursor(response.headers.get('X-Next-Cursor'))
         } catch (error) {
             console.error('Error fetching chats:', error)
         }
@@ -79,7 +92,17 @@ export default function AppSidebar() {
 
     useEffect(() => {
         fetchChats()
-    })
+    }, [fetchChats])
+
+    const loadMoreChats = async () => {
+        if (!nextCursor) return
+        setIsLoadingMore(true)
+        try {
+            await fetchChats(nextCursor)
+        } finally {
+            setIsLoadingMore(false)
+        }
+    }
 
     const createNewChat = async () => {
         setIsLoading(true)
@@ -89,11 +112,14 @@ export default function AppSidebar() {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({title: `Chat ${chats.length + 1}`}),
+                // Only the first page of chats is loaded, so its length cannot number new chats
+                body: JSON.stringify({
+                    title: `Chat ${new Date().toLocaleString([], {month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit'})}`
+                }),
             })
             const newChat = await response.json()
-            setChats(prevChats => [...prevChats, newChat])
-            fetchChats()
+            // Newest first, like the list from the backend
+            setChats(prevChats => [newChat, ...prevChats])
             // Remove router.push - no longer redirecting
         } catch (error) {
             console.error('Error creating new chat:', error)
@@ -195,6 +221,19 @@ export default function AppSidebar() {
                                             </Link>
                                         </SidebarMenuSubItem>
                                     )))}
+                                    {nextCursor && (
+                                        <SidebarMenuSubItem>
+                                            <Button
+                                                onClick={loadMoreChats}
+                                                disabled={isLoadingMore}
+                                                className="w-full justify-start text-muted-foreground"
+                                                variant="ghost"
+                                            >
+                                                <ChevronDown className="mr-2 h-4 w-4"/>
+                                                {isLoadingMore ? 'Loading...' : 'Load more'}
+                                            </Button>
+                                        </SidebarMenuSubItem>
+                                    )}
                                     <SidebarMenuSubItem>
                                         <Button
                                             onClick={createNewChat}